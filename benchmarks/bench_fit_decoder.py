@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized FIT decoder against the fitparse reference.
+
+Usage:
+    python benchmarks/bench_fit_decoder.py [folder] [--synthetic N]
+
+Every binary FIT file in the folder (default: data/fit_files) is decoded
+with both implementations. TCX files saved with a .fit extension are
+skipped; if no FIT files are found, N synthetic one-hour activities are
+generated in a temporary folder instead (default 5).
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.parsers import is_fit_file, load_fit_to_df, load_fit_to_df_reference
+from running_analyzer.utils.synthetic import synthetic_track, write_fit_file
+
+DEFAULT_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+
+
+def best_of(func, path, repeat=3):
+    """Best wall time of ``repeat`` calls, plus the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(paths):
+    print(f"{'file':<50} {'rows':>7} {'fitparse':>10} {'vectorized':>11} {'speedup':>8}")
+    total_ref = total_fast = 0.0
+    for path in paths:
+        ref_s, _ = best_of(load_fit_to_df_reference, path, repeat=1)
+        fast_s, df = best_of(load_fit_to_df, path)
+        total_ref += ref_s
+        total_fast += fast_s
+        print(f"{path.name:<50} {len(df):>7} {ref_s:>9.3f}s {fast_s:>10.4f}s {ref_s / fast_s:>7.1f}x")
+    print(f"{'total':<50} {'':>7} {total_ref:>9.3f}s {total_fast:>10.4f}s {total_ref / total_fast:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", type=Path, default=DEFAULT_FOLDER)
+    parser.add_argument("--synthetic", type=int, default=5, help="synthetic files to use if none are found")
+    args = parser.parse_args()
+
+    candidates = sorted(args.folder.glob("*.fit"))
+    paths = [p for p in candidates if is_fit_file(p)]
+    print(f"{len(paths)} FIT files in {args.folder} ({len(candidates) - len(paths)} non-FIT .fit files skipped)")
+
+    if paths:
+        run(paths)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.synthetic):
+            write_fit_file(Path(tmp) / f"synthetic_{i}.fit", synthetic_track(3600, seed=i))
+        print(f"Using {args.synthetic} synthetic 1 h activities")
+        run(sorted(Path(tmp).glob("*.fit")))
+
+
+if __name__ == "__main__":
+    main()
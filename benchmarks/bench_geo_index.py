@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark city filtering with and without the run spatial index.
+
+Usage:
+    python benchmarks/bench_geo_index.py [--runs N] [--points P]
+
+Builds a synthetic archive of N runs (default 5000) of P samples each
+(default 600), started around the configured cities and at random places
+elsewhere, then times filter_runs_by_city (full scan) against
+RunSpatialIndex.filter_runs_by_city for every city, and checks that both
+return the same runs.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.geo import RunSpatialIndex, bounding_boxes, filter_runs_by_city
+
+
+def synthetic_archive(n_runs, n_points, seed=0):
+    """Runs with latitude/longitude random walks, 80% of them in a city box."""
+    rng = np.random.default_rng(seed)
+    boxes = [box for cities in bounding_boxes.values() for box in cities.values()]
+    runs = []
+    for i in range(n_runs):
+        if rng.random() < 0.8:
+            box = boxes[rng.integers(len(boxes))]
+            lat0 = rng.uniform(box["lat_min"], box["lat_max"])
+            lon0 = rng.uniform(box["lon_min"], box["lon_max"])
+        else:
+            lat0, lon0 = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        steps = rng.normal(0, 3e-5, (n_points, 2))
+        df = pd.DataFrame({
+            "latitude": lat0 + np.cumsum(steps[:, 0]),
+            "longitude": lon0 + np.cumsum(steps[:, 1]),
+        })
+        runs.append({"name": f"run {i}", "df": df})
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5000)
+    parser.add_argument("--points", type=int, default=600)
+    args = parser.parse_args()
+
+    runs = synthetic_archive(args.runs, args.points)
+    start = time.perf_counter()
+    index = RunSpatialIndex(runs)
+    build = time.perf_counter() - start
+    print(f"{args.runs} runs x {args.points} samples; index built in {build * 1e3:.0f} ms")
+
+    queries = [(city, boxes) for boxes in bounding_boxes.values() for city in boxes]
+    scan_total = indexed_total = 0.0
+    print(f"{'city':<25} {'runs':>5} {'scan ms':>9} {'index ms':>9}")
+    for city, boxes in queries:
+        start = time.perf_counter()
+        expected = filter_runs_by_city(runs, city, boxes)
+        scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        found = index.filter_runs_by_city(city, boxes)
+        indexed = time.perf_counter() - start
+
+        assert [r["name"] for r in found] == [r["name"] for r in expected], city
+        scan_total += scan
+        indexed_total += indexed
+        print(f"{city:<25} {len(found):>5} {scan * 1e3:>9.1f} {indexed * 1e3:>9.2f}")
+
+    print(f"{'mean':<25} {'':>5} {scan_total / len(queries) * 1e3:>9.1f} {indexed_total / len(queries) * 1e3:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
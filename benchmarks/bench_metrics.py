@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-run metrics: wall time and allocations.
+
+Usage:
+    python benchmarks/bench_metrics.py [--points N] [--repeat R] [--runs 1,5,50]
+
+Runs what the dashboard callbacks do for one run (HRV, pace and summary stats) on
+an N-sample synthetic activity (default 10800, i.e. 3 h at 1 Hz) with the
+previous copy-per-step implementation and with the column-level metrics
+API, and reports the best wall time and the tracemalloc peak of each.
+
+It then compares computing the same metrics for several 1 h runs one by
+one against a single pass of the batch engine.
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.metrics import RunBatch, add_hrv_metrics, add_pace_metrics, compute_run_stats
+from running_analyzer.parsers import normalize_columns, read_tcx_columns
+from running_analyzer.storage import compact_run_frame
+from running_analyzer.utils.synthetic import encode_tcx_activity, synthetic_track
+
+
+def legacy_hrv(df, window=10, method="std"):
+    """add_hrv_metrics as it was before the column-level API."""
+    df = df.copy()
+    if method == "std":
+        df["hrv"] = df["hr_bpm"].rolling(window=window).std()
+    elif method == "rmssd":
+        diffs = df["hr_bpm"].diff()
+        df["hrv"] = np.sqrt((diffs**2).rolling(window=window).mean())
+    return df
+
+
+def legacy_pace(df):
+    """add_pace_metrics as it was before the column-level API."""
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["dt"] = df["timestamp"].diff().dt.total_seconds()
+    df["dd"] = df["distance_m"].diff()
+    df["pace_sec_per_km"] = df["dt"] / (df["dd"] / 1000)
+    df["pace_min_per_km"] = df["pace_sec_per_km"] / 60
+    return df
+
+
+def legacy_stats(df):
+    """compute_run_stats as it was before the column-level API."""
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df["distance_m"] = pd.to_numeric(df["distance_m"], errors="coerce")
+    df = df.dropna(subset=["timestamp", "distance_m"])
+    total_time_sec = (df["timestamp"].iloc[-1] - df["timestamp"].iloc[0]).total_seconds()
+    total_dist_m = df["distance_m"].iloc[-1] - df["distance_m"].iloc[0]
+    pace = total_time_sec / (total_dist_m / 1000) if total_dist_m > 0 and total_time_sec > 0 else float("nan")
+    return {"distance_km": total_dist_m / 1000, "avg_hr": df["hr_bpm"].mean(), "avg_pace": pace}
+
+
+def legacy(df):
+    df = df.copy()
+    df = legacy_hrv(df)
+    df = legacy_pace(df)
+    return df, legacy_stats(df)
+
+
+def current(df):
+    df = add_pace_metrics(add_hrv_metrics(df))
+    return df, compute_run_stats(df)
+
+
+def per_run(frames):
+    return [current(df) for _, df in frames]
+
+
+def batched(frames):
+    batch = RunBatch.from_frames(frames)
+    return batch.pace(), batch.hrv(), batch.stats()
+
+
+def measure(func, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10800)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--runs", default="1,5,50", help="comma-separated run counts for the batch comparison")
+    args = parser.parse_args()
+
+    columns = read_tcx_columns(encode_tcx_activity(synthetic_track(args.points)).encode("utf-8"))
+    df = compact_run_frame(normalize_columns(columns), run_name="Synthetic Run")
+    frame_kib = df.memory_usage(deep=True).sum() / 1024
+
+    print(f"{args.points} samples, run frame {frame_kib:.0f} KiB")
+    print(f"{'implementation':<15} {'ms/run':>8} {'peak alloc':>12}")
+    for name, func in (("legacy", legacy), ("column-level", current)):
+        seconds, peak = measure(func, df, args.repeat)
+        print(f"{name:<15} {seconds * 1e3:>8.2f} {peak / 1024:>9.0f} KiB")
+
+    hour = encode_tcx_activity(synthetic_track(3600)).encode("utf-8")
+    run = compact_run_frame(normalize_columns(read_tcx_columns(hour)), run_name="Synthetic Run")
+
+    print(f"\n{'runs':>5} {'per-run ms':>11} {'batch ms':>9} {'speedup':>8}")
+    for count in (int(c) for c in args.runs.split(",")):
+        frames = [(f"run {i}", run) for i in range(count)]
+        loop, _ = measure(per_run, frames, args.repeat)
+        batch, _ = measure(batched, frames, args.repeat)
+        print(f"{count:>5} {loop * 1e3:>11.2f} {batch * 1e3:>9.2f} {loop / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
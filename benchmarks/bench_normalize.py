@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of parser post-processing cost per sample.
+
+Usage:
+    python benchmarks/bench_normalize.py [--points N]
+
+Compares the previous per-sample post-processing (Series.apply for
+semicircles, rename, separate unit and timestamp conversions) with the
+shared vectorized normalize_columns stage, on FIT-style and TCX-style raw
+columns of an N-sample synthetic activity (default 10800, i.e. 3 h at 1 Hz).
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.parsers import decode_fit_records, normalize_columns, read_tcx_columns
+from running_analyzer.parsers.fit_parser import semicircles_to_degrees
+from running_analyzer.utils.synthetic import encode_fit_activity, encode_tcx_activity, synthetic_track
+
+
+def legacy_fit(columns):
+    """FIT post-processing as it was done before normalize_columns."""
+    df = pd.DataFrame(columns)
+    df["latitude"] = df["position_lat"].apply(semicircles_to_degrees)
+    df["longitude"] = df["position_long"].apply(semicircles_to_degrees)
+    df = df.rename(columns={
+        "heart_rate": "hr_bpm",
+        "distance": "distance_m",
+        "speed": "speed_m_s",
+        "cadence": "cadence_spm",
+        "vertical_oscillation": "vertical_osc_mm",
+        "stance_time": "ground_contact_time_ms",
+        "temperature": "temperature_c",
+        "altitude": "elevation_m",
+        "power": "power_w",
+    })
+    df["vertical_osc_cm"] = df["vertical_osc_mm"] / 10
+    df["ground_contact_time_s"] = df["ground_contact_time_ms"] / 1000
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    return df
+
+
+def legacy_tcx(columns):
+    """TCX post-processing as it was done before normalize_columns."""
+    df = pd.DataFrame(columns)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    return df
+
+
+def per_sample_ns(func, columns, n_points, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(columns)
+        best = min(best, time.perf_counter() - start)
+    return best / n_points * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10800)
+    args = parser.parse_args()
+
+    track = synthetic_track(args.points)
+    inputs = {
+        "FIT": (decode_fit_records(encode_fit_activity(track)), legacy_fit),
+        "TCX": (read_tcx_columns(encode_tcx_activity(track).encode("utf-8")), legacy_tcx),
+    }
+
+    print(f"{args.points} samples")
+    print(f"{'format':<8} {'legacy ns/sample':>17} {'vectorized ns/sample':>21} {'speedup':>8}")
+    for name, (columns, legacy) in inputs.items():
+        old = per_sample_ns(legacy, columns, args.points)
+        new = per_sample_ns(normalize_columns, columns, args.points)
+        print(f"{name:<8} {old:>17.1f} {new:>21.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
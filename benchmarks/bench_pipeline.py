@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark downloading then parsing against the streaming pipeline.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--files N] [--latency S] [--workers W]
+
+Serves the sample activities (cycled up to N files, default 24) from a
+fake Garmin Connect client that waits S seconds per download (default 0.2)
+and compares two ways of filling the run cache:
+
+- two passes: download everything, then parse the folder (load_runs)
+- pipeline: parse and cache each activity as soon as it is downloaded
+
+Download and parse times are taken from the pipeline counters.
+"""
+
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from itertools import cycle, islice
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import load_runs
+from running_analyzer.downloader import GarminDownloader
+from running_analyzer.storage import IngestPipeline, RunCache
+
+DATA_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+
+
+class SlowGarmin:
+    """Fake client serving local files with a fixed download latency."""
+
+    def __init__(self, sources, latency):
+        self.sources = {1000 + i: path for i, path in enumerate(sources)}
+        self.latency = latency
+
+    def get_activities(self, start, limit):
+        ids = sorted(self.sources, reverse=True)[start:start + limit]
+        return [
+            {"activityId": i, "activityType": {"typeKey": "running"}, "startTimeLocal": f"2025-01-01 00:00:{i % 60:02}"}
+            for i in ids
+        ]
+
+    def download_activity(self, activity_id):
+        time.sleep(self.latency)
+        return self.sources[activity_id].read_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=4, help="download threads")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    samples = sorted(p for p in DATA_FOLDER.glob("*.fit") if p.stat().st_size > 0)
+    sources = list(islice(cycle(samples), args.files))
+    api = SlowGarmin(sources, args.latency)
+    options = {"rate": None, "workers": args.workers, "show_details": False, "limit": args.files}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        start = time.perf_counter()
+        downloader = GarminDownloader("user", "secret", tmp / "two-pass", api=api)
+        downloader.download_activities_batch(**options)
+        downloaded = time.perf_counter() - start
+        load_runs(sorted((tmp / "two-pass").glob("*.fit")), cache=RunCache(tmp / "two-pass-cache"))
+        two_pass = time.perf_counter() - start
+
+        start = time.perf_counter()
+        downloader = GarminDownloader("user", "secret", tmp / "pipeline", api=api)
+        with IngestPipeline(RunCache(tmp / "pipeline-cache")) as pipeline:
+            downloader.download_activities_batch(on_downloaded=pipeline, **options)
+        pipelined = time.perf_counter() - start
+        stats = pipeline.stats.as_dict()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{args.files} files, {args.latency:.2f}s latency, {args.workers} download threads")
+    print(f"{'two passes':<12} {two_pass:>7.2f}s  (download {downloaded:.2f}s, parse {two_pass - downloaded:.2f}s)")
+    print(
+        f"{'pipeline':<12} {pipelined:>7.2f}s  (download {stats['download_seconds']:.2f}s, "
+        f"parse {stats['parse_seconds']:.2f}s, cache {stats['cache_seconds']:.2f}s summed over files)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark column projection in the FIT and TCX parsers.
+
+Usage:
+    python benchmarks/bench_projection.py [folder] [--synthetic N]
+
+Parses every activity in the folder (default: data/fit_files) in full, with
+the dashboard's columns, and with heart rate and distance only. Binary FIT
+files and TCX files are timed separately; if the folder has no FIT files,
+N synthetic one-hour FIT activities are generated instead (default 5).
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import DASHBOARD_COLUMNS
+from running_analyzer.parsers import is_fit_file, parse_activity
+from running_analyzer.utils.synthetic import synthetic_track, write_fit_file
+
+DEFAULT_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+
+PROJECTIONS = {
+    "all": None,
+    "dashboard": DASHBOARD_COLUMNS,
+    "hr+distance": ("hr_bpm", "distance_m"),
+}
+
+
+def best_of(paths, columns, repeat=5):
+    """Best wall time of ``repeat`` passes over ``paths``, plus the column count."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            df = parse_activity(path, columns=columns)
+        best = min(best, time.perf_counter() - start)
+    return best, len(df.columns)
+
+
+def run(label, paths):
+    print(f"{label}: {len(paths)} files")
+    print(f"  {'projection':<14} {'columns':>8} {'time':>9} {'vs all':>7}")
+    full = None
+    for name, columns in PROJECTIONS.items():
+        seconds, width = best_of(paths, columns)
+        full = full or seconds
+        print(f"  {name:<14} {width:>8} {seconds:>8.3f}s {full / seconds:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", type=Path, default=DEFAULT_FOLDER)
+    parser.add_argument("--synthetic", type=int, default=5, help="synthetic FIT files to use if none are found")
+    args = parser.parse_args()
+
+    candidates = sorted(p for ext in ("*.fit", "*.tcx") for p in args.folder.glob(ext) if p.stat().st_size > 0)
+    fit_paths = [p for p in candidates if is_fit_file(p)]
+    tcx_paths = [p for p in candidates if p not in fit_paths]
+
+    if tcx_paths:
+        run(f"TCX ({args.folder})", tcx_paths)
+
+    if fit_paths:
+        run(f"FIT ({args.folder})", fit_paths)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.synthetic):
+            write_fit_file(Path(tmp) / f"synthetic_{i}.fit", synthetic_track(3600, seed=i))
+        run(f"FIT ({args.synthetic} synthetic 1 h activities)", sorted(Path(tmp).glob("*.fit")))
+
+
+if __name__ == "__main__":
+    main()
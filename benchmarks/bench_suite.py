@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Throughput suite for ingest and analysis, for tracking regressions over time.
+
+Usage:
+    python benchmarks/bench_suite.py [--archive FOLDER] [--runs N] [--load L]
+        [--repeat R] [--only a,b] [--save FILE] [--compare FILE] [--label TEXT]
+
+Times parsing, ingest, metrics, city filtering, the training rollups and
+the dashboard callbacks on a synthetic archive (see generate_archive.py). Without
+--archive, a temporary archive of N runs (default 40, half FIT and half
+TCX, 0.5-3 h at 1 Hz) is generated. Parsing cases use every file; the
+analysis cases use the first L loaded runs (default: all).
+
+Each case reports the best of R repeats (default 3) as items per second.
+--save appends the results as one JSON line to FILE, and --compare prints
+the change against the last line of FILE, marking cases more than 10%
+slower, so results can be tracked offline from commit to commit.
+"""
+
+import sys
+import json
+import itertools
+import time
+import logging
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import create_app, list_run_files, load_runs
+from running_analyzer.geo import RunSpatialIndex, bounding_boxes, filter_runs_by_city, load_regions
+from running_analyzer.metrics import MetricsCache, TrainingRollups, add_hrv_metrics
+from running_analyzer.parsers import is_fit_file, load_fit_to_df, parse_tcx
+from running_analyzer.utils.synthetic import generate_archive
+
+REGRESSION = 0.10
+
+# Cases that only read the files, and cases that need a dashboard app
+PARSE_CASES = ("parse_fit", "parse_tcx", "ingest")
+CALLBACK_CASES = ("select_city_cold", "select_city_warm", "hrv_window")
+
+
+def best_of(func, repeat):
+    """Best wall time of ``repeat`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def dashboard_callbacks(app):
+    """Server callbacks of a dashboard app by their output, e.g. 'hrv-store.data'."""
+    return {k.strip("."): v["callback"].__wrapped__ for k, v in app.callback_map.items() if "callback" in v}
+
+
+def callback_cases(runs, regions):
+    """
+    Dashboard callback cases on the city with the most runs.
+
+    Returns:
+        Cases as in :func:`cases`; none when no run is in a known city
+    """
+    by_city = {}
+    for run in runs:
+        if run.get("city"):
+            by_city.setdefault((run.get("country"), run["city"]), []).append(run)
+    if not by_city:
+        print("No loaded run is in a known city; skipping the dashboard callback cases")
+        return {}
+    (country, city), busiest = max(by_city.items(), key=lambda item: len(item[1]))
+    app = create_app(runs, regions=regions)
+    callbacks = dashboard_callbacks(app)
+    selection = (country, city, None)
+    windows = itertools.count(61)
+
+    def select_city():
+        # Everything a new city selection recomputes
+        callbacks["map-graph.figure...map-info.children"](*selection)
+        callbacks["summary-stats.children"](*selection)
+        callbacks["series-store.data"](*selection, "time")
+        callbacks["hrv-store.data"](*selection, "std", 10, "time")
+
+    def select_city_cold():
+        app.metrics_cache.invalidate()
+        select_city()
+
+    return {
+        "select_city_cold": (select_city_cold, len(busiest), "runs"),
+        "select_city_warm": (select_city, len(busiest), "runs"),
+        # Moving the HRV window slider to a window not seen before
+        "hrv_window": (lambda: callbacks["hrv-store.data"](*selection, "std", next(windows), "time"), len(busiest), "runs"),
+    }
+
+
+def cases(files, runs, regions, only=None):
+    """
+    Benchmark cases as name -> (function, item count, unit).
+
+    Args:
+        files: Activity files of the archive
+        runs: Runs loaded from them (for the analysis cases)
+        regions: City regions used for ingest and the dashboard
+        only: Names of the selected cases (default: all); the dashboard
+            app is only built when a callback case is selected
+    """
+    fit_files = [p for p in files if is_fit_file(p)]
+    tcx_files = [p for p in files if p not in fit_files]
+    samples = sum(len(r["df"]) for r in runs)
+    queries = [(city, boxes) for boxes in bounding_boxes.values() for city in boxes]
+
+    def rollup_queries():
+        # Queries right after a change, before the tables are cached
+        rollups = TrainingRollups(runs)
+        for period in ("day", "week", "month"):
+            rollups.table(period)
+        rollups.acwr()
+
+    def scan_filter():
+        for name, boxes in queries:
+            filter_runs_by_city(runs, name, boxes)
+
+    def index_filter():
+        index = RunSpatialIndex(runs)
+        for name, boxes in queries:
+            index.filter_runs_by_city(name, boxes)
+
+    result = {
+        "parse_fit": (lambda: [load_fit_to_df(p) for p in fit_files], len(fit_files), "files"),
+        "parse_tcx": (lambda: [parse_tcx(p) for p in tcx_files], len(tcx_files), "files"),
+        "ingest": (lambda: load_runs(files, workers=1, regions=regions), len(files), "files"),
+        "hrv": (lambda: [add_hrv_metrics(r["df"]) for r in runs], samples, "samples"),
+        "metrics_batch": (
+            lambda: MetricsCache().runs_metrics([(r["name"], r["df"]) for r in runs], 10, "std"), samples, "samples",
+        ),
+        "filter_scan": (scan_filter, len(queries), "queries"),
+        "filter_index": (index_filter, len(queries), "queries"),
+        "rollup_fold": (lambda: TrainingRollups(runs), len(runs), "runs"),
+        "rollup_query": (rollup_queries, len(runs), "runs"),
+    }
+    if not only or only & set(CALLBACK_CASES):
+        result.update(callback_cases(runs, regions))
+    return result
+
+
+def run_suite(files, load, repeat, only=None):
+    """Run the suite and return its results as a JSON-serializable dict."""
+    regions = load_regions()
+    # Parsing cases read the files themselves
+    runs = [] if only and only <= set(PARSE_CASES) else load_runs(files, workers=1, regions=regions)[:load]
+    results = {}
+    selected = cases(files, runs, regions, only)
+    print(f"{'case':<20} {'items':>8} {'unit':<8} {'best':>9} {'items/s':>11}")
+    for name, (func, items, unit) in selected.items():
+        if (only and name not in only) or not items:
+            continue
+        seconds = best_of(func, repeat)
+        results[name] = {"seconds": round(seconds, 6), "items": items, "unit": unit, "rate": round(items / seconds, 3)}
+        print(f"{name:<20} {items:>8} {unit:<8} {seconds:>8.3f}s {items / seconds:>11,.1f}")
+    return results
+
+
+def compare(results, previous):
+    """Print the throughput change of every case against a previous record."""
+    print(f"\nvs {previous.get('label') or previous['time']}:")
+    for name, result in results.items():
+        before = previous["results"].get(name)
+        if before is None or before["items"] != result["items"]:
+            print(f"  {name:<20} (not comparable)")
+            continue
+        change = result["rate"] / before["rate"] - 1
+        flag = "  <-- slower" if change < -REGRESSION else ""
+        print(f"  {name:<20} {change:>+7.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", type=Path, help="existing archive folder")
+    parser.add_argument("--runs", type=int, default=40, help="runs of the generated archive")
+    parser.add_argument("--load", type=int, default=None, help="runs used by the analysis cases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", default="", help="comma-separated case names")
+    parser.add_argument("--save", type=Path, help="append results to this JSON lines file")
+    parser.add_argument("--compare", type=Path, help="compare with the last results in this file")
+    parser.add_argument("--label", default="", help="label stored with saved results (e.g. a commit)")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    only = set(filter(None, args.only.split(",")))
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.archive
+        if folder is None:
+            folder = Path(tmp)
+            generate_archive(folder, args.runs, formats=("fit", "tcx"))
+        files = list_run_files(folder)
+        print(f"{len(files)} activities in {folder}")
+        results = run_suite(files, args.load, args.repeat, only)
+
+    if args.compare and args.compare.exists():
+        lines = args.compare.read_text(encoding="utf-8").splitlines()
+        if lines:
+            compare(results, json.loads(lines[-1]))
+
+    if args.save:
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "label": args.label,
+            "python": platform.python_version(),
+            "archive": str(args.archive or f"generated:{args.runs}"),
+            "results": results,
+        }
+        with open(args.save, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming TCX parser against the ElementTree reference.
+
+Usage:
+    python benchmarks/bench_tcx_parser.py [folder] [--hours H]
+
+Reports throughput over every TCX document in the folder (default:
+data/fit_files) and over one synthetic H-hour activity (default 6), plus
+the peak memory of parsing that long activity, measured in a fresh
+process per implementation.
+"""
+
+import sys
+import time
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.parsers import is_fit_file, parse_tcx, parse_tcx_reference
+from running_analyzer.utils.synthetic import synthetic_track, write_tcx_file
+
+DEFAULT_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+IMPLEMENTATIONS = {"reference": parse_tcx_reference, "streaming": parse_tcx}
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB."""
+    # ru_maxrss can carry over the parent's peak across exec on Linux; VmHWM does not
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure_child(name, path):
+    """Print the extra peak memory needed to parse ``path`` (child process)."""
+    before = peak_rss_kb()
+    IMPLEMENTATIONS[name](path)
+    print(peak_rss_kb() - before)
+
+
+def peak_memory_kb(name, path):
+    """Run measure_child in a new interpreter and return its result."""
+    try:
+        output = subprocess.run(
+            [sys.executable, __file__, "--measure", name, str(path)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        return int(output.strip().splitlines()[-1])
+    except (subprocess.CalledProcessError, ValueError, ImportError):
+        return None
+
+
+def throughput(paths):
+    print(f"{'implementation':<15} {'files':>6} {'points':>9} {'seconds':>9} {'points/s':>10}")
+    for name, func in IMPLEMENTATIONS.items():
+        start = time.perf_counter()
+        points = sum(len(func(path)) for path in paths)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<15} {len(paths):>6} {points:>9} {elapsed:>8.2f}s {points / elapsed:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?", type=Path, default=DEFAULT_FOLDER)
+    parser.add_argument("--hours", type=float, default=6.0, help="length of the synthetic activity")
+    parser.add_argument("--measure", nargs=2, metavar=("IMPL", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure_child(args.measure[0], Path(args.measure[1]))
+        return
+
+    paths = [p for ext in ("*.fit", "*.tcx") for p in sorted(args.folder.glob(ext)) if not is_fit_file(p)]
+    if paths:
+        print(f"\n{len(paths)} TCX documents in {args.folder}")
+        throughput(paths)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "long.tcx"
+        write_tcx_file(path, synthetic_track(int(args.hours * 3600)))
+        size_mb = path.stat().st_size / 1e6
+        print(f"\nSynthetic {args.hours:g} h activity ({size_mb:.1f} MB)")
+        throughput([path])
+
+        print(f"\n{'implementation':<15} {'peak extra RSS':>15}")
+        for name in IMPLEMENTATIONS:
+            peak = peak_memory_kb(name, path)
+            print(f"{name:<15} {'n/a' if peak is None else f'{peak / 1024:.1f} MiB':>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic archive of FIT/TCX running activities.
+
+Usage:
+    python benchmarks/generate_archive.py FOLDER [--runs N] [--formats fit,tcx]
+        [--hours MIN MAX] [--city-share F] [--seed S] [--workers W]
+
+Writes N activities (default 500) recorded at 1 Hz, each lasting between
+MIN and MAX hours (default 0.5 to 3), most of them starting in one of the
+configured cities. The same options always produce the same archive, and
+existing files are kept, so generation can be interrupted and resumed, or
+extended by asking for more runs. Point RUN_FIT_FOLDER at the folder to
+open it in the dashboard, or pass it to bench_suite.py.
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.utils.synthetic import generate_archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", type=Path)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--formats", default="fit", help="comma-separated: fit, tcx")
+    parser.add_argument("--hours", type=float, nargs=2, default=(0.5, 3.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--city-share", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = generate_archive(
+        args.folder,
+        args.runs,
+        workers=args.workers,
+        formats=tuple(args.formats.split(",")),
+        hours=tuple(args.hours),
+        city_share=args.city_share,
+        seed=args.seed,
+    )
+    size = sum(p.stat().st_size for p in paths)
+    print(f"{len(paths)} activities ({size / 2**20:.0f} MiB) in {args.folder} after {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
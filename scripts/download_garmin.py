@@ -9,6 +9,8 @@ Environment variables:
     GARMIN_EMAIL: Garmin Connect email
     GARMIN_PASSWORD: Garmin Connect password
     RUN_FIT_FOLDER: Output directory (default: data/fit_files)
+    RUN_CACHE_FOLDER: Run cache that downloads are parsed into as they
+        arrive (default: <output directory>/.cache; empty to skip parsing)
 """
 
 import os
@@ -21,6 +23,7 @@ from getpass import getpass
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from running_analyzer.downloader import GarminDownloader
+from running_analyzer.storage import IngestPipeline, RunCache
 
 # Configure logging
 logging.basicConfig(
@@ -52,6 +55,23 @@ def get_output_directory():
     return output_dir
 
 
+def make_pipeline(output_dir):
+    """Pipeline parsing downloads into the dashboard's run cache, or None if disabled."""
+    cache_dir = os.getenv("RUN_CACHE_FOLDER", str(output_dir / ".cache"))
+    if not cache_dir:
+        return None
+    return IngestPipeline(RunCache(Path(cache_dir)))
+
+
+def run_with_pipeline(output_dir, download):
+    """Run a download, parsing and caching each activity as it arrives."""
+    pipeline = make_pipeline(output_dir)
+    if pipeline is None:
+        return download(None)
+    with pipeline:
+        return download(pipeline)
+
+
 def interactive_menu():
     """Interactive menu for downloading activities."""
     logger.info("=" * 60)
@@ -78,6 +98,7 @@ def interactive_menu():
         logger.info("  1. Download activities by type")
         logger.info("  2. Download recent activities (all types)")
         logger.info("  3. Change output directory")
+        logger.info("  4. Sync new activities since the last sync")
         logger.info("  q. Quit")
         logger.info("=" * 60)
         
@@ -88,13 +109,19 @@ def interactive_menu():
             limit_str = input("How many recent activities? (default 20): ").strip()
             limit = int(limit_str) if limit_str.isdigit() else 20
             
-            downloader.download_activities_batch(activity_type, limit)
+            run_with_pipeline(
+                downloader.output_dir,
+                lambda pipeline: downloader.download_activities_batch(activity_type, limit, on_downloaded=pipeline),
+            )
             
         elif choice == "2":
             limit_str = input("\nHow many recent activities? (default 20): ").strip()
             limit = int(limit_str) if limit_str.isdigit() else 20
             
-            downloader.download_activities_batch(activity_type=None, limit=limit)
+            run_with_pipeline(
+                downloader.output_dir,
+                lambda pipeline: downloader.download_activities_batch(activity_type=None, limit=limit, on_downloaded=pipeline),
+            )
             
         elif choice == "3":
             new_dir = input("\nEnter new output directory: ").strip()
@@ -103,6 +130,16 @@ def interactive_menu():
             downloader.output_dir = output_dir
             logger.info(f"✅ Output directory changed to: {output_dir}")
             
+        elif choice == "4":
+            activity_type = input("\nEnter activity type (default running, 'all' for every type): ").strip() or "running"
+            
+            run_with_pipeline(
+                downloader.output_dir,
+                lambda pipeline: downloader.sync_activities(
+                    activity_type=None if activity_type == "all" else activity_type, on_downloaded=pipeline,
+                ),
+            )
+            
         elif choice == "q":
             logger.info("\n👋 Goodbye!")
             break
@@ -33,6 +33,9 @@ setup(
     
     # Dependencies
     install_requires=requirements,
+    extras_require={
+        "serve": ["gunicorn>=21"],
+    },
     
     python_requires=">=3.9",
     
@@ -40,6 +43,7 @@ setup(
     entry_points={
         "console_scripts": [
             "running-analyzer=running_analyzer.app:main",
+            "running-analyzer-serve=running_analyzer.serve:main",
             "garmin-download=scripts.download_garmin:main_menu",
         ],
     },
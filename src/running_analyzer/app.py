@@ -12,7 +12,7 @@ import os
 import sys
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Collection, List, Dict, Optional
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -21,14 +21,29 @@ import numpy as np
 import pandas as pd
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 
 # Project imports
-from running_analyzer.parsers import parse_tcx
-from running_analyzer.metrics import add_hrv_metrics, add_pace_metrics, compute_run_stats
-from running_analyzer.geo import bounding_boxes, filter_runs_by_city
-from running_analyzer.utils import format_run_name, format_pace, format_distance
+from running_analyzer.metrics import ALIGN_AXES, MetricsCache, TrainingRollups, resample_runs, training_summaries
+from running_analyzer.geo import TAG_KEYS, Region, load_regions, region_tree, regions_fingerprint, tag_runs
+from running_analyzer.storage import (
+    DEFAULT_MAX_FRAMES,
+    FolderWatcher,
+    FrameLoader,
+    LazyRun,
+    RunCache,
+    RunStore,
+    compact_run_frame,
+    memory_report,
+    parse_file,
+    parse_files,
+    run_summary,
+    summary_is_current,
+)
+from running_analyzer.utils import format_run_name, format_pace, format_distance, instrument_server, profiled, span
+from running_analyzer.viz import DEFAULT_MAX_POINTS, lttb_indices, track_indices
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,47 +53,328 @@ logger = logging.getLogger(__name__)
 DEFAULT_DATA_FOLDER = Path(__file__).parent.parent.parent / "data" / "fit_files"
 FIT_FOLDER = Path(os.environ.get("RUN_FIT_FOLDER", DEFAULT_DATA_FOLDER))
 
+# Parsed-run cache; set RUN_CACHE_FOLDER to an empty string to disable it
+CACHE_FOLDER = os.environ.get("RUN_CACHE_FOLDER", str(FIT_FOLDER / ".cache"))
+
+# Optional GeoJSON with extra city polygons (features with country and city properties)
+REGIONS_GEOJSON = os.environ.get("RUN_REGIONS_GEOJSON")
+
+# Seconds between scans of FIT_FOLDER for new downloads; 0 disables watching
+WATCH_INTERVAL = float(os.environ.get("RUN_WATCH_INTERVAL", "10"))
+
+# Metric tab -> (column, chart title, message shown when no run has the column)
+METRIC_SERIES = {
+    "hrv": ("hrv", "HRV Comparison", "HRV data not available"),
+    "pace": ("pace_min_per_km", "Pace (min/km) Comparison", "Pace data not available"),
+    "cadence": ("cadence_spm", "Cadence (spm) Comparison", "Cadence data not available"),
+    "elevation": ("elevation_m", "Elevation (m) Comparison", "Elevation data not available"),
+    "temperature": ("temperature_c", "Temperature (°C) Comparison", "Temperature data not available"),
+    "gct": ("ground_contact_time_ms", "Ground Contact Time (ms) Comparison", "Ground contact time data not available"),
+    "vo": ("vertical_osc_mm", "Vertical Oscillation (mm) Comparison", "Vertical oscillation data not available"),
+    "power": ("power_w", "Running Power (W) Comparison", "Power data not available"),
+}
+
+# Comparison chart x axis: "time" and "distance" resample every run onto a
+# common grid (ALIGN_AXES), "index" plots raw samples by position
+DEFAULT_ALIGN = "time"
+ALIGN_LABELS = {"elapsed_min": "Elapsed time (min)", "distance_km": "Distance (km)", "t": "Sample"}
+
+# Training trend -> (rollup column, chart title); trends cover the whole
+# history and are read from the rollups of the run store
+TREND_METRICS = {
+    "distance": ("distance_km", "Distance (km)"),
+    "duration": ("duration_h", "Running time (h)"),
+    "load": ("load", "Training load (zone-weighted minutes)"),
+    "zones": ("share", "Share of time in heart-rate zones"),
+    "pace": ("pace_min_per_km", "Average pace (min/km)"),
+    "hr": ("avg_hr", "Average heart rate (bpm)"),
+    "trimp": ("trimp", "Training impulse (TRIMP)"),
+    "decoupling": ("decoupling_pct", "Aerobic decoupling (%)"),
+    "acwr": ("acwr", "Acute:chronic workload ratio (7 / 28 days)"),
+}
+TREND_PERIODS = {"day": "Daily", "week": "Weekly", "month": "Monthly"}
+
+# Draws the comparison chart of the selected tab from the series stores,
+# so switching tabs only needs the data already in the page
+COMPARISON_FIGURE_JS = """
+function(metric, series, hrv) {
+    var chart = (hrv && hrv[metric]) || (series && series[metric]);
+    if (!chart) {
+        return [{data: [], layout: {title: {text: "No data available"}}}, ""];
+    }
+    var traces = chart.traces.map(function(trace) {
+        return {type: "scatter", mode: "lines", name: trace.name, x: trace.x, y: trace.y};
+    });
+    var layout = {
+        title: {text: chart.title},
+        xaxis: {title: {text: chart.x_label}},
+        yaxis: {title: {text: chart.y_label}},
+        legend: {title: {text: "run_name"}},
+    };
+    return [{data: traces, layout: layout}, chart.info];
+}
+"""
 
-def load_all_runs(fit_folder: Path) -> List[Dict[str, object]]:
-    """
-    Load all .fit (or .tcx) files from the fit_folder.
-    Returns a list of dicts: {"name": run_name, "df": dataframe}.
+# Columns the dashboard reads; other recorded fields are not decoded
+DASHBOARD_COLUMNS = (
+    "timestamp",
+    "hr_bpm",
+    "distance_m",
+    "speed_m_s",
+    "latitude",
+    "longitude",
+    *(column for column, _, _ in METRIC_SERIES.values() if column not in ("hrv", "pace_min_per_km")),
+)
+
+
+def list_run_files(fit_folder: Path) -> List[Path]:
+    """List the .fit and .tcx files of a folder, in load order."""
+    return [p for ext in ("*.fit", "*.tcx") for p in sorted(fit_folder.glob(ext))]
+
+
+def frame_loader(
+    cache: Optional[RunCache] = None,
+    max_frames: int = DEFAULT_MAX_FRAMES,
+    columns: Optional[Collection[str]] = None,
+) -> FrameLoader:
     """
-    runs: List[Dict[str, object]] = []
-    if not fit_folder.exists():
-        logger.warning("Fit folder does not exist: %s", fit_folder)
-        return runs
+    LRU loader of run samples keyed by source path.
 
-    # Process both .fit and .tcx if present
-    for ext in ("*.fit", "*.tcx"):
-        for file_path in sorted(fit_folder.glob(ext)):
-            logger.info("Parsing %s", file_path)
-            try:
-                df = parse_tcx(file_path)
-            except Exception as exc:
-                logger.exception("Failed to parse %s: %s", file_path, exc)
+    Samples (only ``columns``, if given) are read from the cache, or parsed
+    again when the cache no longer holds them, and compacted like in
+    :func:`load_runs`.
+    """
+    def load(path: str) -> pd.DataFrame:
+        path = Path(path)
+        df = cache.get(path, columns=columns) if cache is not None else None
+        if df is None:
+            result = parse_file(path, columns=columns)
+            if result.error is not None:
+                raise ValueError(f"Failed to parse {path}:\n{result.error}")
+            df = result.df
+        return compact_run_frame(df, run_name=format_run_name(path.stem))
+
+    return FrameLoader(load, max_frames)
+
+
+def load_runs(
+    files: List[Path],
+    cache: Optional[RunCache] = None,
+    workers: Optional[int] = None,
+    regions: Optional[List[Region]] = None,
+    loader: Optional[FrameLoader] = None,
+    columns: Optional[Collection[str]] = None,
+    failed: Optional[List[Path]] = None,
+) -> List[Dict[str, object]]:
+    """
+    Load the given activity files.
+    Returns a list of dicts: {"name": run_name, "df": dataframe, "path":
+    source file, "summary": :func:`run_summary`} plus the country/city labels
+    added by :func:`tag_runs` (default regions: the city bounding boxes and
+    RUN_REGIONS_GEOJSON).
+
+    When a cache is given, files whose size and mtime are unchanged since the
+    last load are read from it instead of being parsed again. Remaining files
+    are parsed across ``workers`` processes (default: RUN_INGEST_WORKERS or
+    the CPU count); runs are always returned in file order.
+
+    With both a cache and a ``loader``, runs are returned as
+    :class:`LazyRun` built from the summary and labels stored in the cache,
+    so cached files are not read at all; their samples are loaded through
+    the loader when first used.
+
+    With ``columns`` (e.g. :data:`DASHBOARD_COLUMNS`), only those columns are
+    parsed and cached, which skips decoding every other recorded field.
+
+    Files that fail to parse are logged and skipped; when a ``failed`` list
+    is given, their paths are appended to it.
+    """
+    regions = regions if regions is not None else load_regions(REGIONS_GEOJSON)
+    fingerprint = regions_fingerprint(regions)
+    lazy = cache is not None and loader is not None
+
+    metas: Dict[Path, Dict[str, object]] = {}
+    frames: Dict[Path, pd.DataFrame] = {}
+    parsed = set()
+    if cache is not None:
+        with span("ingest.cache_read") as s:
+            for file_path in files:
+                meta = cache.get_meta(file_path, columns=columns) if lazy else None
+                if meta is not None and summary_is_current(meta["summary"]):
+                    metas[file_path] = meta
+                    continue
+                df = cache.get(file_path, columns=columns)
+                if df is not None:
+                    frames[file_path] = df
+            s.rows = sum(len(df) for df in frames.values())
+
+    to_parse = [p for p in files if p not in frames and p not in metas]
+    if to_parse:
+        logger.info("Parsing %d of %d files", len(to_parse), len(files))
+
+    with span("ingest.parse") as s:
+        for result in parse_files(to_parse, workers=workers, columns=columns):
+            if result.error is not None:
+                logger.error("Failed to parse %s:\n%s", result.path, result.error)
+                if failed is not None:
+                    failed.append(result.path)
                 continue
 
-            if df is None or df.empty:
-                logger.info("Empty dataframe for %s", file_path.name)
-                continue
+            logger.info("Parsed %s in %.2fs", result.path.name, result.seconds)
+            if result.df is not None:
+                frames[result.path] = result.df
+                parsed.add(result.path)
+        s.rows = sum(len(frames[p]) for p in parsed)
 
-            df = df.copy()
-            # Format run name to be more readable
-            readable_name = format_run_name(file_path.stem)
-            df["run_name"] = readable_name
-            # safe parse timestamp
-            if "timestamp" in df.columns:
-                df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    runs: List[Dict[str, object]] = []
+    to_tag: List[Dict[str, object]] = []
+    to_summarize: List[Dict[str, object]] = []
+    for file_path in files:
+        # Format run name to be more readable
+        readable_name = format_run_name(file_path.stem)
+
+        if file_path in metas:
+            summary = metas[file_path]["summary"]
+            if not summary["samples"]:
+                continue
+            run = LazyRun(loader, str(file_path), name=readable_name, path=str(file_path), summary=summary, extent=summary["extent"])
+            labels = metas[file_path].get("labels") or {}
+            if labels.get("regions") == fingerprint:
+                run.update({key: labels.get(key) for key in TAG_KEYS})
             else:
-                df["timestamp"] = pd.NaT
+                to_tag.append(run)
+            runs.append(run)
+            continue
+
+        df = frames.get(file_path)
+        if df is None:
+            continue
+        if df.empty:
+            logger.info("Empty dataframe for %s", file_path.name)
+            if cache is not None and file_path in parsed:
+                cache.put(file_path, df, meta={"summary": run_summary(df)}, columns=columns)
+            continue
+
+        with span("ingest.compact") as s:
+            compact = compact_run_frame(df, run_name=readable_name)
+            run = {"name": readable_name, "df": compact, "path": str(file_path), "summary": None}
+            s.rows = len(compact)
+        to_summarize.append(run)
+        to_tag.append(run)
+        runs.append(run)
+
+    # Physiological metrics of the new runs come out of a few batched passes
+    if to_summarize:
+        with span("ingest.summarize") as s:
+            trainings = training_summaries([run["df"] for run in to_summarize])
+            for run, training in zip(to_summarize, trainings):
+                run["summary"] = run_summary(run["df"], training=training)
+            s.rows = sum(len(run["df"]) for run in to_summarize)
+
+    if to_tag:
+        with span("ingest.tag") as s:
+            tag_runs(to_tag, regions)
+            s.rows = len(to_tag)
+
+    # Store summaries and labels so the next start can skip the samples
+    with span("ingest.cache_write") as s:
+        written = 0
+        for i, run in enumerate(runs):
+            file_path = Path(run["path"])
+            meta = {"summary": run["summary"], "labels": {"regions": fingerprint, **{key: run[key] for key in TAG_KEYS}}}
+            if cache is not None:
+                if file_path in parsed:
+                    cache.put(file_path, frames[file_path], meta=meta, columns=columns)
+                    written += len(frames[file_path])
+                elif cache.get_meta(file_path, columns=columns) != meta:
+                    cache.set_meta(file_path, meta, columns=columns)
+            if lazy and not isinstance(run, LazyRun):
+                loader.put(run["path"], run["df"])
+                runs[i] = LazyRun(loader, run["path"], **{key: value for key, value in run.items() if key != "df"})
+                runs[i]["extent"] = run["summary"]["extent"]
+
+        if cache is not None:
+            cache.flush()
+        s.rows = written
+
+    untagged = sum(1 for r in runs if r["city"] is None)
+    if untagged:
+        logger.info("%d runs are outside every known city", untagged)
+
+    return runs
+
+
+def load_all_runs(
+    fit_folder: Path,
+    cache: Optional[RunCache] = None,
+    workers: Optional[int] = None,
+    regions: Optional[List[Region]] = None,
+    loader: Optional[FrameLoader] = None,
+    columns: Optional[Collection[str]] = None,
+) -> List[Dict[str, object]]:
+    """
+    Load all .fit (or .tcx) files from the fit_folder with :func:`load_runs`.
+
+    Cache entries of files that are no longer in the folder are dropped.
+    """
+    if not fit_folder.exists():
+        logger.warning("Fit folder does not exist: %s", fit_folder)
+        return []
 
-            runs.append({"name": readable_name, "df": df})
+    files = list_run_files(fit_folder)
+    if cache is not None:
+        cache.prune(files)
 
-    logger.info("Loaded %d runs", len(runs))
+    runs = load_runs(files, cache=cache, workers=workers, regions=regions, loader=loader, columns=columns)
+    in_memory = [r for r in runs if not isinstance(r, LazyRun) or r.loaded]
+    logger.info(
+        "Loaded %d runs, %d in memory (%.1f MiB)",
+        len(runs), len(in_memory), memory_report(in_memory)["bytes"].sum() / 2**20,
+    )
     return runs
 
 
+def watch_folder(
+    fit_folder: Path,
+    store: RunStore,
+    cache: Optional[RunCache] = None,
+    regions: Optional[List[Region]] = None,
+    metrics_cache: Optional[MetricsCache] = None,
+    interval: float = WATCH_INTERVAL,
+    loader: Optional[FrameLoader] = None,
+    columns: Optional[Collection[str]] = None,
+) -> FolderWatcher:
+    """
+    Create a watcher that loads new and changed files into ``store``.
+
+    Files are parsed in the watcher thread (serially, so the dashboard
+    keeps a CPU); derived metrics of replaced or removed runs are dropped
+    from ``metrics_cache``, and cache entries of removed files from
+    ``cache``. Runs of files that fail to parse are dropped from the store
+    and the files are retried by later polls. Call ``prime()`` before
+    loading the folder and ``start()`` once the dashboard is up.
+    """
+    def ingest(changed: List[Path], removed: List[Path]):
+        if loader is not None:
+            for path in changed + removed:
+                loader.discard(str(path))
+        if cache is not None and removed:
+            for path in removed:
+                cache.invalidate(path)
+            cache.flush()
+        failed: List[Path] = []
+        runs = load_runs(changed, cache=cache, workers=1, regions=regions, loader=loader, columns=columns, failed=failed) if changed else []
+        # The old run of a file that no longer parses would point at the bad file
+        stale = store.update(runs, removed=[str(p) for p in removed + failed])
+        if metrics_cache is not None:
+            for name in stale:
+                metrics_cache.invalidate(name)
+        logger.info("Added %d runs; %d runs in store", len(runs), len(store))
+        return failed
+
+    return FolderWatcher(fit_folder, ingest, interval=interval)
+
+
 def empty_map_fig():
     """Return empty map figure."""
     return {
@@ -98,21 +394,199 @@ def empty_line_fig(title: str = "No data available"):
     }
 
 
-def create_layout(runs: List[Dict[str, object]]):
-    """Create Dash application layout."""
+def map_fig(df: pd.DataFrame):
+    """Scatter map of run tracks, colored by run."""
+    # plotly >= 5.24 renders maps with MapLibre (scatter_map); older versions only have scatter_mapbox
+    if hasattr(px, "scatter_map"):
+        return px.scatter_map(df, lat="latitude", lon="longitude", color="run_name", map_style="open-street-map", zoom=12)
+    return px.scatter_mapbox(df, lat="latitude", lon="longitude", color="run_name", mapbox_style="open-street-map", zoom=12)
+
+
+def trend_fig(rollups: TrainingRollups, period: str = "week", metric: str = "distance"):
+    """
+    Figure of a training trend over the whole history.
+
+    Args:
+        rollups: Training rollups of the runs
+        period: 'day', 'week' or 'month' (the workload ratio is always daily)
+        metric: Key of TREND_METRICS
+    """
+    column, title = TREND_METRICS.get(metric, TREND_METRICS["distance"])
+    if metric == "acwr":
+        df, x = rollups.acwr(), "date"
+    elif metric == "zones":
+        df, x = rollups.zone_shares(period).melt(id_vars="start", var_name="zone", value_name="share"), "start"
+    else:
+        df, x = rollups.table(period), "start"
+        if metric == "duration":
+            df = df.assign(duration_h=df["duration_s"] / 3600)
+    if df.empty:
+        return empty_line_fig("No runs with a start time")
+
+    title = f"{TREND_PERIODS.get(period, '')} {title[0].lower()}{title[1:]}" if metric != "acwr" else title
+    labels = {x: "", column: ""}
+    if metric == "zones":
+        return px.bar(df, x=x, y=column, color="zone", title=title, labels=labels)
+    if metric in ("pace", "hr", "decoupling", "acwr"):
+        return px.line(df, x=x, y=column, title=title, labels=labels, markers=metric != "acwr")
+    return px.bar(df, x=x, y=column, title=title, labels=labels, hover_data=["runs"])
+
+
+def render_info(kind: str, points: int, raw: int, target: int) -> str:
+    """Text comparing rendered and raw point counts of the chart or the map."""
+    return f"Rendering {points:,} of {raw:,} {kind} points (at most {target:,} per run)"
+
+
+def stats_card(name: str, stats: Dict[str, float], training: Optional[Dict[str, object]] = None):
+    """Summary card of one run, with its TRIMP and decoupling when known."""
+    lines = [
+        html.H4(name),
+        html.P(f"Distance: {format_distance(stats.get('distance_km', 0) * 1000)}"),
+        html.P(f"Avg HR: {stats.get('avg_hr', 0):.1f} bpm"),
+        html.P(f"Pace: {format_pace(stats.get('avg_pace', 0))}"),
+    ]
+    training = training or {}
+    if training.get("avg_hr") is not None:
+        lines.append(html.P(f"TRIMP: {training.get('trimp') or 0:.0f}"))
+    if training.get("decoupling_pct") is not None:
+        lines.append(html.P(f"Decoupling: {training['decoupling_pct']:+.1f}%"))
+    return html.Div(
+        lines,
+        style={"padding": "10px", "border": "1px solid #ccc", "margin": "5px", "width": "220px"},
+    )
+
+
+def json_values(values) -> List[Optional[float]]:
+    """Values as a list for the browser, rounded, with None for NaN."""
+    values = np.round(np.asarray(values, dtype=np.float64), 4)
+    return [None if v != v else v for v in values.tolist()]
+
+
+def prepare_track(df: pd.DataFrame, max_points: int = DEFAULT_MAX_POINTS):
+    """
+    Map track of a run, downsampled to evenly spaced points.
+
+    Returns:
+        (latitude/longitude/run_name frame or None without a position,
+        number of samples)
+    """
+    if not {"latitude", "longitude"}.issubset(df.columns):
+        return None, 0
+    keep = track_indices(df["latitude"], df["longitude"], max_points)
+    return df.iloc[keep][["latitude", "longitude", "run_name"]], len(df)
+
+
+def prepare_series(
+    frames: List[pd.DataFrame],
+    columns: List[str],
+    align: str = DEFAULT_ALIGN,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> List[Dict[str, Dict[str, object]]]:
+    """
+    Chart series of several runs, ready to be sent to the browser.
+
+    The columns of all runs are put on a common grid (see
+    :func:`resample_runs`; ``align='index'`` keeps the raw samples), then
+    every series is downsampled with LTTB to about ``max_points`` points.
+
+    Args:
+        frames: Run DataFrames with the metric columns
+        columns: Metric columns to prepare
+        align: 'time', 'distance' or 'index'
+        max_points: Target points per series
+
+    Returns:
+        One dict per run mapping each of ``columns`` the run has to
+        {"x": [...], "y": [...], "raw": samples of the run}
+    """
+    if align in ALIGN_AXES:
+        x = ALIGN_AXES[align][0]
+        grids = resample_runs(frames, columns, axis=align)
+    else:
+        x = "t"
+        grids = [pd.DataFrame({"t": np.arange(len(df)), **{c: df[c] for c in columns if c in df.columns}}) for df in frames]
+
+    prepared = []
+    for df, grid in zip(frames, grids):
+        series = {}
+        for column in columns:
+            if column not in df.columns or not len(grid):
+                continue
+            keep = lttb_indices(grid[x], grid[column], max_points)
+            series[column] = {
+                "x": json_values(grid[x].to_numpy()[keep]),
+                "y": json_values(grid[column].to_numpy()[keep]),
+                "raw": len(df),
+            }
+        prepared.append(series)
+    return prepared
+
+
+def chart_series(
+    metric: str,
+    names: List[str],
+    prepared: List[Dict[str, Dict[str, object]]],
+    align: str = DEFAULT_ALIGN,
+    max_points: int = DEFAULT_MAX_POINTS,
+) -> Dict[str, object]:
+    """
+    Comparison chart of one metric tab, as drawn by COMPARISON_FIGURE_JS.
+
+    Args:
+        metric: Metric tab (key of METRIC_SERIES)
+        names: Run names
+        prepared: Series of the runs from :func:`prepare_series` (None for
+            runs that could not be loaded, which are left out)
+        align: 'time', 'distance' or 'index'
+        max_points: Target points per series, for the render info
+
+    Returns:
+        Dictionary with title, x_label, y_label, traces (name, x, y) and info
+    """
+    column, title, missing = METRIC_SERIES[metric]
+    x = ALIGN_AXES[align][0] if align in ALIGN_AXES else "t"
+    runs = [(name, series[column]) for name, series in zip(names, prepared) if series is not None and column in series]
+    points = sum(len(part["x"]) for _, part in runs)
+    return {
+        "title": title if runs else missing,
+        "x_label": ALIGN_LABELS[x],
+        "y_label": column,
+        "traces": [{"name": name, "x": part["x"], "y": part["y"]} for name, part in runs],
+        "info": render_info("chart", points, sum(part["raw"] for _, part in runs), max_points) if runs else "",
+    }
+
+
+def run_options(runs: List[Dict[str, object]]) -> List[Dict[str, str]]:
+    """Run dropdown options."""
+    return [{"label": r["name"], "value": r["name"]} for r in runs]
+
+
+def create_layout(
+    runs: List[Dict[str, object]],
+    regions: Optional[List[Region]] = None,
+    refresh_seconds: float = 0,
+    version: int = 0,
+):
+    """
+    Create Dash application layout.
+
+    With ``refresh_seconds`` > 0 the page polls the server at that interval
+    for runs added since ``version``.
+    """
+    countries = list(region_tree(regions if regions is not None else load_regions(REGIONS_GEOJSON)))
     return html.Div(
         [
             html.H1("Interactive Run Explorer (FIT + Running Dynamics)"),
             dcc.Dropdown(
                 id="country-dropdown",
-                options=[{"label": c, "value": c} for c in bounding_boxes.keys()],
-                value=list(bounding_boxes.keys())[0] if bounding_boxes else None,
+                options=[{"label": c, "value": c} for c in countries],
+                value=countries[0] if countries else None,
                 clearable=False,
             ),
             dcc.Dropdown(id="city-dropdown", clearable=False, placeholder="Select a city"),
             dcc.Dropdown(
                 id="run-dropdown",
-                options=[{"label": r["name"], "value": r["name"]} for r in runs],
+                options=run_options(runs),
                 multi=True,
                 placeholder="Select runs to compare",
             ),
@@ -130,6 +604,21 @@ def create_layout(runs: List[Dict[str, object]]):
                     dcc.Tab(label="Power", value="power"),
                 ],
             ),
+            html.Div(
+                [
+                    html.Label("Compare by:"),
+                    dcc.RadioItems(
+                        id="align-mode",
+                        options=[
+                            {"label": f"Elapsed time ({ALIGN_AXES['time'][1]:g} s steps)", "value": "time"},
+                            {"label": f"Distance ({ALIGN_AXES['distance'][1]:g} m steps)", "value": "distance"},
+                            {"label": "Sample index", "value": "index"},
+                        ],
+                        value=DEFAULT_ALIGN,
+                        labelStyle={"display": "inline-block", "margin-right": "15px"},
+                    ),
+                ]
+            ),
             html.Div(
                 [
                     html.Label("HRV method:"),
@@ -160,153 +649,247 @@ def create_layout(runs: List[Dict[str, object]]):
             html.Hr(),
             html.Div(id="summary-stats", style={"display": "flex", "flex-wrap": "wrap"}),
             dcc.Graph(id="comparison-graph"),
+            html.Div(id="render-info", style={"color": "#666", "font-size": "small"}),
             dcc.Graph(id="map-graph"),
+            html.Div(id="map-info", style={"color": "#666", "font-size": "small"}),
+            html.Hr(),
+            html.H2("Training history"),
+            html.Div(
+                [
+                    dcc.RadioItems(
+                        id="trend-period",
+                        options=[{"label": label, "value": value} for value, label in TREND_PERIODS.items()],
+                        value="week",
+                        labelStyle={"display": "inline-block", "margin-right": "15px"},
+                    ),
+                    dcc.Dropdown(
+                        id="trend-metric",
+                        options=[{"label": title, "value": metric} for metric, (_, title) in TREND_METRICS.items()],
+                        value="distance",
+                        clearable=False,
+                    ),
+                ]
+            ),
+            dcc.Graph(id="trend-graph"),
+            dcc.Store(id="series-store"),
+            dcc.Store(id="hrv-store"),
+            dcc.Store(id="runs-version", data=version),
+            dcc.Interval(
+                id="refresh-interval",
+                interval=int(max(refresh_seconds, 1) * 1000),
+                disabled=refresh_seconds <= 0,
+            ),
         ]
     )
 
 
-def create_app(runs: List[Dict[str, object]]):
-    """Create and configure Dash app."""
+def create_app(
+    runs,
+    metrics_cache: Optional[MetricsCache] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    regions: Optional[List[Region]] = None,
+    refresh_seconds: float = 0,
+):
+    """
+    Create and configure Dash app.
+
+    The map, the summary cards and the chart series each have their own
+    callback, so an input only recomputes the outputs that depend on it.
+    Derived metrics, chart series and map tracks are kept per run in
+    ``metrics_cache`` (a new MetricsCache by default), so reselecting runs
+    does not recompute them. Chart series are resampled onto a common
+    elapsed-time or distance grid (see :func:`resample_runs`), and chart
+    series and map tracks are downsampled to about ``max_points`` points per
+    run (RUN_MAX_POINTS). The series of every metric tab are sent to the
+    page at once and the chart is drawn in the browser, so switching tabs
+    needs no request. Runs are listed per city from their country/city
+    labels; runs that were not tagged by :func:`load_all_runs` are tagged
+    here.
+
+    ``runs`` is a list of runs or a :class:`RunStore`. With a store that a
+    folder watcher keeps updating, pass ``refresh_seconds`` > 0 so pages
+    pick up new runs without a restart.
+
+    With RUN_INSTRUMENT set, callback and ingest stages are timed and the
+    aggregates are served as JSON at ``/metrics`` (see
+    :mod:`running_analyzer.utils.instrumentation`).
+    """
+    if regions is None:
+        regions = load_regions(REGIONS_GEOJSON)
+    store = runs if isinstance(runs, RunStore) else None
+    if store is None:
+        if any("city" not in r for r in runs):
+            tag_runs(runs, regions)
+        store = RunStore(runs)
+    cities_by_country = region_tree(regions)
+
     app = dash.Dash(__name__)
-    app.layout = create_layout(runs)
+    app.layout = lambda: create_layout(store.runs(), regions, refresh_seconds, store.version)
+    if metrics_cache is None:
+        metrics_cache = MetricsCache()
+    app.metrics_cache = metrics_cache
+    app.run_store = store
+    instrument_server(app.server)
+
+    @app.callback(
+        [Output("run-dropdown", "options"), Output("runs-version", "data")],
+        Input("refresh-interval", "n_intervals"),
+        State("runs-version", "data"),
+    )
+    def refresh_runs(n_intervals, version):
+        # Only touch the page when the watcher has changed the store
+        current = store.version
+        if version == current:
+            raise PreventUpdate
+        return run_options(store.runs()), current
 
     @app.callback(
         [Output("city-dropdown", "options"), Output("city-dropdown", "value")],
         Input("country-dropdown", "value"),
     )
     def update_city_dropdown(selected_country: Optional[str]):
-        if not selected_country or selected_country not in bounding_boxes:
+        if not selected_country or selected_country not in cities_by_country:
             return [], None
-        cities = list(bounding_boxes[selected_country].keys())
+        cities = cities_by_country[selected_country]
         if not cities:
             return [], None
         return [{"label": c, "value": c} for c in cities], cities[0]
 
+    def selection(country, city, selected_runs) -> List[Dict[str, object]]:
+        """Runs of a city, narrowed to the selected runs if there are any."""
+        # Runs were tagged with their city at ingest, so filtering is a lookup
+        runs = store.by_label().get((country, city), []) if city is not None else []
+        if selected_runs:
+            runs = [r for r in runs if r["name"] in selected_runs]
+        return runs
+
+    def frames(runs):
+        # Frames are passed as getters so lazily loaded runs are only read on a
+        # cache miss; runs that fail to load come back as None and are skipped
+        return [(r["name"], lambda r=r: r["df"]) for r in runs]
+
+    # Each output has its own callback and only listens to the inputs it
+    # depends on. Per-run results (metrics, chart series, map tracks) are
+    # prepared once and kept in metrics_cache, and the chart is drawn in the
+    # browser from the series stores, so switching tabs sends no request
+    selection_inputs = [
+        Input("country-dropdown", "value"),
+        Input("city-dropdown", "value"),
+        Input("run-dropdown", "value"),
+    ]
+
     @app.callback(
-        [
-            Output("map-graph", "figure"),
-            Output("comparison-graph", "figure"),
-            Output("summary-stats", "children"),
-        ],
-        [
-            Input("country-dropdown", "value"),
-            Input("city-dropdown", "value"),
-            Input("run-dropdown", "value"),
-            Input("metric-tabs", "value"),
-            Input("hrv-method", "value"),
-            Input("window-slider", "value"),
-        ],
+        [Output("map-graph", "figure"), Output("map-info", "children")],
+        [*selection_inputs, Input("runs-version", "data")],
     )
-    def update_graphs(country, city, selected_runs, metric, method, window):
-        if city is None:
-            return empty_map_fig(), empty_line_fig(), []
+    @profiled("update_map")
+    def update_map(country, city, selected_runs, runs_version=None):
+        with span("update_map.filter") as s:
+            runs = selection(country, city, selected_runs)
+            s.rows = len(runs)
+        if not runs:
+            return empty_map_fig(), ""
+
+        with span("update_map.downsample") as s:
+            tracks = metrics_cache.runs_derived(
+                frames(runs), ("track", max_points), lambda items: [prepare_track(df, max_points) for _, df in items],
+            )
+            tracks = [track for track in tracks if track is not None]
+            parts = [track for track, _ in tracks if track is not None]
+            s.rows = sum(len(track) for track in parts)
 
-        # Filter runs by city using provided bounding boxes
-        country_boxes = bounding_boxes.get(country, {})
-        filtered_runs = filter_runs_by_city(runs, city, country_boxes)
+        with span("update_map.figure"):
+            # Map figure (requires latitude & longitude columns)
+            figure = map_fig(pd.concat(parts, ignore_index=True)) if parts else empty_map_fig()
 
-        # Filter by selected runs (if the user selected any)
-        if selected_runs:
-            filtered_runs = [r for r in filtered_runs if r["name"] in selected_runs]
-
-        if not filtered_runs:
-            return empty_map_fig(), empty_line_fig(), []
-
-        aligned = []
-        stats_cards = []
-
-        for r in filtered_runs:
-            df = r["df"].copy()
-
-            # add HRV & pace metrics (functions are expected to handle NaN/short signals)
-            try:
-                df = add_hrv_metrics(df, window=window, method=method)
-            except Exception:
-                logger.exception("add_hrv_metrics failed for %s", r["name"])
-
-            try:
-                df = add_pace_metrics(df)
-            except Exception:
-                logger.exception("add_pace_metrics failed for %s", r["name"])
-
-            # Relative index for x-axis
-            df["t"] = np.arange(len(df))
-
-            # Summary stats
-            try:
-                stats = compute_run_stats(df)
-            except Exception:
-                logger.exception("compute_run_stats failed for %s", r["name"])
-                stats = {"distance_km": float("nan"), "avg_hr": float("nan"), "avg_pace": float("nan")}
-
-            stats_cards.append(
-                html.Div(
-                    [
-                        html.H4(r["name"]),
-                        html.P(f"Distance: {format_distance(stats.get('distance_km', 0) * 1000)}"),
-                        html.P(f"Avg HR: {stats.get('avg_hr', 0):.1f} bpm"),
-                        html.P(f"Pace: {format_pace(stats.get('avg_pace', 0))}"),
-                    ],
-                    style={"padding": "10px", "border": "1px solid #ccc", "margin": "5px", "width": "220px"},
-                )
-            )
+        info = render_info("map", sum(len(track) for track in parts), sum(raw for _, raw in tracks), max_points)
+        logger.debug(info)
+        return figure, info
 
-            aligned.append(df)
+    @app.callback(
+        Output("summary-stats", "children"),
+        [*selection_inputs, Input("runs-version", "data")],
+    )
+    @profiled("update_stats")
+    def update_stats(country, city, selected_runs, runs_version=None):
+        runs = selection(country, city, selected_runs)
+        with span("update_stats.metrics") as s:
+            stats_per_run = metrics_cache.runs_stats(frames(runs))
+            s.rows = len(runs)
+        return [
+            stats_card(r["name"], stats, (r.get("summary") or {}).get("training"))
+            for r, stats in zip(runs, stats_per_run)
+            if stats is not None
+        ]
 
-        df_all = pd.concat(aligned, ignore_index=True)
+    @app.callback(
+        Output("series-store", "data"),
+        [*selection_inputs, Input("align-mode", "value"), Input("runs-version", "data")],
+    )
+    @profiled("update_series")
+    def update_series(country, city, selected_runs, align=DEFAULT_ALIGN, runs_version=None):
+        runs = selection(country, city, selected_runs)
+        if not runs:
+            return None
+
+        # Series of every metric but HRV, which is the only one that depends on
+        # the HRV settings, so moving the window slider leaves these alone
+        columns = [column for metric, (column, _, _) in METRIC_SERIES.items() if metric != "hrv"]
+        with span("update_series.prepare") as s:
+            prepared = metrics_cache.runs_derived(
+                frames(runs),
+                ("series", align, max_points),
+                lambda items: prepare_series(metrics_cache.runs_pace(items), columns, align, max_points),
+            )
+            s.rows = len(runs)
+        names = [r["name"] for r in runs]
+        return {
+            metric: chart_series(metric, names, prepared, align, max_points)
+            for metric in METRIC_SERIES if metric != "hrv"
+        }
 
-        # Build comparison figure depending on selected metric
-        if metric == "hrv":
-            fig = px.line(df_all, x="t", y="hrv", color="run_name", title="HRV Comparison")
-        elif metric == "pace":
-            fig = px.line(df_all, x="t", y="pace_min_per_km", color="run_name", title="Pace (min/km) Comparison")
-        elif metric == "cadence":
-            if "cadence_spm" in df_all.columns:
-                fig = px.line(df_all, x="t", y="cadence_spm", color="run_name", title="Cadence (spm) Comparison")
-            else:
-                fig = empty_line_fig("Cadence data not available")
-        elif metric == "elevation":
-            if "elevation_m" in df_all.columns:
-                fig = px.line(df_all, x="t", y="elevation_m", color="run_name", title="Elevation (m) Comparison")
-            else:
-                fig = empty_line_fig("Elevation data not available")
-        elif metric == "temperature":
-            if "temperature_c" in df_all.columns:
-                fig = px.line(df_all, x="t", y="temperature_c", color="run_name", title="Temperature (°C) Comparison")
-            else:
-                fig = empty_line_fig("Temperature data not available")
-        elif metric == "gct":
-            if "ground_contact_time_ms" in df_all.columns:
-                fig = px.line(df_all, x="t", y="ground_contact_time_ms", color="run_name", title="Ground Contact Time (ms) Comparison")
-            else:
-                fig = empty_line_fig("Ground contact time data not available")
-        elif metric == "vo":
-            if "vertical_osc_mm" in df_all.columns:
-                fig = px.line(df_all, x="t", y="vertical_osc_mm", color="run_name", title="Vertical Oscillation (mm) Comparison")
-            else:
-                fig = empty_line_fig("Vertical oscillation data not available")
-        elif metric == "power":
-            if "power_w" in df_all.columns:
-                fig = px.line(df_all, x="t", y="power_w", color="run_name", title="Running Power (W) Comparison")
-            else:
-                fig = empty_line_fig("Power data not available")
-        else:
-            fig = empty_line_fig()
-
-        # Map figure (requires latitude & longitude columns)
-        if {"latitude", "longitude"}.issubset(df_all.columns):
-            map_fig = px.scatter_mapbox(
-                df_all,
-                lat="latitude",
-                lon="longitude",
-                color="run_name",
-                mapbox_style="open-street-map",
-                zoom=12,
+    @app.callback(
+        Output("hrv-store", "data"),
+        [
+            *selection_inputs,
+            Input("hrv-method", "value"),
+            Input("window-slider", "value"),
+            Input("align-mode", "value"),
+            Input("runs-version", "data"),
+        ],
+    )
+    @profiled("update_hrv_series")
+    def update_hrv_series(country, city, selected_runs, method, window, align=DEFAULT_ALIGN, runs_version=None):
+        runs = selection(country, city, selected_runs)
+        if not runs:
+            return None
+
+        # HRV is memoized per (run, window, method); cache misses are computed
+        # together by the batch engine
+        with span("update_hrv_series.prepare") as s:
+            prepared = metrics_cache.runs_derived(
+                frames(runs),
+                ("hrv-series", align, max_points, window, method),
+                lambda items: prepare_series(metrics_cache.runs_metrics(items, window, method), ["hrv"], align, max_points),
             )
-        else:
-            map_fig = empty_map_fig()
+            s.rows = len(runs)
+        return {"hrv": chart_series("hrv", [r["name"] for r in runs], prepared, align, max_points)}
 
-        return map_fig, fig, stats_cards
+    @app.callback(
+        Output("trend-graph", "figure"),
+        [Input("trend-period", "value"), Input("trend-metric", "value"), Input("runs-version", "data")],
+    )
+    @profiled("update_trends")
+    def update_trends(period, metric, runs_version=None):
+        # Rollups are kept up to date by the store, so no run is read here
+        with span("update_trends.figure"):
+            return trend_fig(store.rollups, period, metric)
+
+    app.clientside_callback(
+        COMPARISON_FIGURE_JS,
+        [Output("comparison-graph", "figure"), Output("render-info", "children")],
+        [Input("metric-tabs", "value"), Input("series-store", "data"), Input("hrv-store", "data")],
+    )
 
     return app
 
@@ -316,8 +899,28 @@ def main():
     # Get debug mode from environment
     debug_mode = os.environ.get("DEBUG", "True").lower() in ("true", "1", "yes")
     
-    runs = load_all_runs(FIT_FOLDER)
-    app = create_app(runs)
+    cache = RunCache(Path(CACHE_FOLDER)) if CACHE_FOLDER else None
+    # With a cache, only run summaries are loaded at startup; samples are
+    # read on demand and at most RUN_LOADED_RUNS runs are kept decoded
+    loader = frame_loader(cache, columns=DASHBOARD_COLUMNS) if cache is not None else None
+    regions = load_regions(REGIONS_GEOJSON)
+    store = RunStore()
+    metrics_cache = MetricsCache()
+
+    # The debug reloader runs main() in a parent process that only watches
+    # the code; only the serving process watches the data folder
+    watch = WATCH_INTERVAL > 0 and (not debug_mode or os.environ.get("WERKZEUG_RUN_MAIN") == "true")
+    watcher = (
+        watch_folder(FIT_FOLDER, store, cache, regions, metrics_cache, loader=loader, columns=DASHBOARD_COLUMNS)
+        if watch else None
+    )
+    if watcher is not None:
+        watcher.prime()
+
+    store.update(load_all_runs(FIT_FOLDER, cache=cache, regions=regions, loader=loader, columns=DASHBOARD_COLUMNS))
+    app = create_app(store, metrics_cache=metrics_cache, regions=regions, refresh_seconds=WATCH_INTERVAL if watch else 0)
+    if watcher is not None:
+        watcher.start()
     app.run(debug=debug_mode)
 
 
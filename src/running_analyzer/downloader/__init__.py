@@ -4,10 +4,18 @@ Garmin Connect downloader module.
 
 from running_analyzer.downloader.garmin_client import (
     GarminDownloader,
+    activity_filename,
     download_activities,
 )
+from running_analyzer.downloader.transfer import DownloadManifest, SyncState, TokenBucket, call_with_retries, write_atomic
 
 __all__ = [
     'GarminDownloader',
+    'activity_filename',
     'download_activities',
+    'DownloadManifest',
+    'SyncState',
+    'TokenBucket',
+    'call_with_retries',
+    'write_atomic',
 ]
@@ -2,19 +2,55 @@
 Garmin Connect API client for downloading activities.
 """
 
+import os
+import re
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
+
+from running_analyzer.downloader.transfer import (
+    MANIFEST_NAME,
+    SYNC_STATE_NAME,
+    DownloadManifest,
+    SyncState,
+    TokenBucket,
+    call_with_retries,
+    write_atomic,
+)
 
 logger = logging.getLogger(__name__)
 
+# Parallel downloads and Garmin Connect requests per second
+DEFAULT_WORKERS = int(os.environ.get("RUN_DOWNLOAD_WORKERS", "4"))
+DEFAULT_RATE = float(os.environ.get("RUN_DOWNLOAD_RATE", "2"))
+
+# Activity ID at the end of the filenames written by activity_filename
+ACTIVITY_ID_PATTERN = re.compile(r"_(\d+)\.fit$")
+
+
+def activity_filename(activity: Dict, activity_type: Optional[str]) -> str:
+    """
+    Output filename of an activity.
+
+    Args:
+        activity: Activity dictionary from Garmin Connect
+        activity_type: Type used in the filename prefix
+
+    Returns:
+        Filename such as running_2025-09-18_14-28-28_123.fit
+    """
+    start_time = activity["startTimeLocal"].replace(":", "-").replace(" ", "_")
+    return f"{activity_type}_{start_time}_{activity['activityId']}.fit"
+
 
 class GarminDownloader:
     """
     Client for downloading FIT files from Garmin Connect.
     """
     
-    def __init__(self, email: str, password: str, output_dir: Path):
+    def __init__(self, email: str, password: str, output_dir: Path, api=None):
         """
         Initialize Garmin downloader.
         
@@ -22,12 +58,15 @@ class GarminDownloader:
             email: Garmin Connect email
             password: Garmin Connect password
             output_dir: Directory to save FIT files
+            api: Already authenticated client with the ``get_activities``
+                and ``download_activity`` methods of ``garminconnect.Garmin``
+                (e.g. a fake client in tests)
         """
         self.email = email
         self.password = password
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.api = None
+        self.api = api
         
     def authenticate(self) -> bool:
         """
@@ -90,50 +129,97 @@ class GarminDownloader:
             logger.error(f"❌ Error fetching activities: {e}")
             return []
     
-    def download_activity(self, activity_id: int, filename: str) -> bool:
+    def download_activity(
+        self,
+        activity_id: int,
+        filename: str,
+        retries: int = 0,
+        limiter: Optional[TokenBucket] = None,
+        backoff: float = 1.0,
+    ) -> bool:
         """
         Download a single activity as FIT file.
+
+        The file is written under a temporary ``.part`` name and renamed once
+        complete, so a failed or interrupted download leaves no partial file.
         
         Args:
             activity_id: Garmin activity ID
             filename: Output filename (without path)
+            retries: Number of retries after a failed attempt
+            limiter: Rate limiter to take a token from before each attempt
+            backoff: Base delay in seconds of the exponential backoff
             
         Returns:
             True if download successful, False otherwise
         """
+        return self._fetch_activity(activity_id, filename, retries, limiter, backoff) is not None
+
+    def _fetch_activity(
+        self,
+        activity_id: int,
+        filename: str,
+        retries: int,
+        limiter: Optional[TokenBucket],
+        backoff: float,
+    ) -> Optional[bytes]:
+        """Download and write an activity, returning its contents (None on failure)."""
         if not self.api:
             logger.error("Not authenticated. Call authenticate() first.")
-            return False
-        
+            return None
+
+        def attempt():
+            if limiter is not None:
+                limiter.acquire()
+            return self.api.download_activity(activity_id)
+
         try:
-            fit_path = self.output_dir / filename
-            fit_data = self.api.download_activity(activity_id)
-            
-            with open(fit_path, "wb") as f:
-                f.write(fit_data)
+            fit_data = call_with_retries(attempt, retries=retries, base_delay=backoff, description=f"Activity {activity_id}")
+            write_atomic(self.output_dir / filename, fit_data)
             
             logger.info(f"✅ Downloaded: {filename}")
-            return True
+            return fit_data
         except Exception as e:
             logger.error(f"❌ Failed to download activity {activity_id}: {e}")
-            return False
+            return None
     
     def download_activities_batch(
         self, 
         activity_type: str = "running", 
         limit: int = 20,
-        show_details: bool = True
+        show_details: bool = True,
+        workers: int = DEFAULT_WORKERS,
+        rate: Optional[float] = DEFAULT_RATE,
+        retries: int = 3,
+        backoff: float = 1.0,
+        resume: bool = True,
+        on_downloaded: Optional[Callable[[Path, bytes, float], None]] = None,
     ) -> int:
         """
         Download multiple activities in batch.
+
+        Downloads run on ``workers`` threads sharing a token-bucket limit of
+        ``rate`` requests per second; failed downloads are retried with
+        exponential backoff. Finished downloads are recorded in a manifest in
+        the output directory, so an interrupted batch can be run again and
+        only fetches what is missing.
         
         Args:
             activity_type: Type of activities to download
             limit: Maximum number to fetch
             show_details: Show activity details before downloading
+            workers: Number of parallel downloads (RUN_DOWNLOAD_WORKERS)
+            rate: Requests per second (RUN_DOWNLOAD_RATE); None for no limit
+            retries: Number of retries of a failed download
+            backoff: Base delay in seconds of the exponential backoff
+            resume: Skip activities the manifest records as downloaded
+            on_downloaded: Called from the download thread with the path,
+                contents and download seconds of each new file (e.g. an
+                :class:`~running_analyzer.storage.IngestPipeline`)
             
         Returns:
-            Number of successfully downloaded activities
+            Number of successfully downloaded activities, including those
+            skipped because they were already downloaded
         """
         activities = self.get_activities(activity_type, limit)
         
@@ -156,21 +242,226 @@ class GarminDownloader:
                     f"{act_name} | {distance} km in {duration} min"
                 )
         
-        # Download activities
-        logger.info(f"\n📦 Starting download of {len(activities)} activities...")
-        success_count = 0
-        
-        for act in activities:
-            activity_id = act["activityId"]
-            start_time = act["startTimeLocal"].replace(":", "-").replace(" ", "_")
-            filename = f"{activity_type}_{start_time}_{activity_id}.fit"
-            
-            if self.download_activity(activity_id, filename):
-                success_count += 1
-        
+        manifest = DownloadManifest(self.output_dir / MANIFEST_NAME)
+        pending = [act for act in activities if not (resume and self._is_downloaded(act, activity_type, manifest))]
+        skipped = len(activities) - len(pending)
+        if skipped:
+            logger.info(f"\n⏭️ Skipping {skipped} activities that are already downloaded")
+
+        limiter = TokenBucket(rate) if rate else None
+        results = self._download_many(pending, activity_type, manifest, workers, limiter, retries, backoff, on_downloaded)
+
+        success_count = skipped + sum(results)
         logger.info(f"\n✅ Successfully downloaded {success_count}/{len(activities)} activities")
         return success_count
 
+    def _is_downloaded(self, activity: Dict, activity_type: Optional[str], manifest: DownloadManifest) -> bool:
+        """Whether an activity's file is already in the output directory."""
+        return (
+            manifest.is_done(activity["activityId"])
+            or (self.output_dir / activity_filename(activity, activity_type)).exists()
+        )
+
+    def _newest_local_id(self, manifest: DownloadManifest, activity_type: Optional[str]) -> Optional[int]:
+        """
+        Newest activity ID of a type in the download manifest or the output directory.
+
+        Only files named for ``activity_type`` by :func:`activity_filename`
+        count, so e.g. a newer cycling download does not end a running sync
+        before older running activities.
+        """
+        prefix = f"{activity_type}_"
+        ids = [
+            int(activity_id)
+            for activity_id, entry in manifest.entries.items()
+            if manifest.is_done(activity_id) and str(entry.get("filename", "")).startswith(prefix)
+        ]
+        for path in self.output_dir.glob(f"{prefix}*.fit"):
+            match = ACTIVITY_ID_PATTERN.search(path.name)
+            if match:
+                ids.append(int(match.group(1)))
+        return max(ids, default=None)
+
+    def _download_many(
+        self,
+        activities: List[Dict],
+        activity_type: Optional[str],
+        manifest: DownloadManifest,
+        workers: int,
+        limiter: Optional[TokenBucket],
+        retries: int,
+        backoff: float,
+        on_downloaded: Optional[Callable[[Path, bytes, float], None]] = None,
+    ) -> List[bool]:
+        """
+        Download activities on a thread pool, recording outcomes in the manifest.
+
+        Returns:
+            Success flag of each activity, in input order
+        """
+        logger.info(f"\n📦 Starting download of {len(activities)} activities with {workers} workers...")
+
+        def download(act) -> bool:
+            activity_id = act["activityId"]
+            filename = activity_filename(act, activity_type)
+            start = time.perf_counter()
+            data = self._fetch_activity(activity_id, filename, retries, limiter, backoff)
+            seconds = time.perf_counter() - start
+            if data is None:
+                manifest.record(activity_id, filename, "failed")
+                return False
+
+            manifest.record(activity_id, filename, "done", size=len(data), seconds=round(seconds, 3))
+            if on_downloaded is not None:
+                on_downloaded(self.output_dir / filename, data, seconds)
+            return True
+
+        if workers > 1 and len(activities) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(download, activities))
+        return [download(act) for act in activities]
+
+    def sync_activities(
+        self,
+        activity_type: Optional[str] = "running",
+        page_size: int = 50,
+        max_pages: Optional[int] = None,
+        workers: int = DEFAULT_WORKERS,
+        rate: Optional[float] = DEFAULT_RATE,
+        retries: int = 3,
+        backoff: float = 1.0,
+        on_downloaded: Optional[Callable[[Path, bytes, float], None]] = None,
+    ) -> int:
+        """
+        Download the activities added since the last sync.
+
+        Pages through the activity list, newest first, until it reaches the
+        newest known activity, so a daily sync costs one or two requests.
+        The newest known activity is the one recorded by the previous sync
+        in a sync state file or, before the first sync, the newest activity
+        of that type in the download manifest or the output directory;
+        without any, the whole history is walked. The sync point only
+        advances up to the first failed download, so failures are retried
+        by the next sync. A failure to fetch the activity list is logged and
+        nothing is downloaded.
+
+        A walk cut short by ``max_pages`` stores a resume cursor (page
+        offset and oldest activity walked) in the sync state; the next syncs
+        carry on from there, down to the same known activity, before the
+        sync point moves and newer activities are looked at again.
+
+        Args:
+            activity_type: Type of activities to download; None for all
+            page_size: Activities requested per page
+            max_pages: Stop after this many pages (default: no limit); the
+                sync point is then kept, and the next sync carries on
+            workers: Number of parallel downloads
+            rate: Requests per second, shared by paging and downloads
+            retries: Number of retries of a failed request
+            backoff: Base delay in seconds of the exponential backoff
+            on_downloaded: Called with the path, contents and download
+                seconds of each new file, as in :meth:`download_activities_batch`
+
+        Returns:
+            Number of newly downloaded activities
+        """
+        if not self.api:
+            logger.error("Not authenticated. Call authenticate() first.")
+            return 0
+
+        state = SyncState(self.output_dir / SYNC_STATE_NAME)
+        key = activity_type or "all"
+        manifest = DownloadManifest(self.output_dir / MANIFEST_NAME)
+        resume = state.resume_point(key)
+        if resume is not None:
+            # Carry on with a walk cut short by max_pages, down to where it was headed
+            newest_known = resume["stop_id"]
+            offset = resume["offset"]
+            walked_down_to = resume["oldest_id"]
+            top_id = resume["top_id"]
+            failed_id = resume["failed_id"]
+            logger.info(f"🔄 Resuming the previous sync at activity {offset}")
+        else:
+            newest_known = state.newest_id(key)
+            if newest_known is None:
+                newest_known = self._newest_local_id(manifest, activity_type)
+            offset = 0
+            walked_down_to = top_id = failed_id = None
+        limiter = TokenBucket(rate) if rate else None
+
+        def fetch_page(start):
+            if limiter is not None:
+                limiter.acquire()
+            return self.api.get_activities(start, page_size)
+
+        # Activities come newest first; collect until the first known one
+        fetched = []
+        new_activities = []
+        pages = 0
+        complete = False
+        oldest_walked = walked_down_to
+        while not complete and (max_pages is None or pages < max_pages):
+            try:
+                page = call_with_retries(
+                    lambda: fetch_page(offset + pages * page_size),
+                    retries=retries, base_delay=backoff, description="Activity list",
+                )
+            except Exception as e:
+                # The sync point stays put, so the next sync starts over
+                logger.error(f"❌ Error fetching activities: {e}")
+                return 0
+            pages += 1
+            for act in page:
+                # Activities added since a resumed walk began shift the pages
+                if walked_down_to is not None and act["activityId"] >= walked_down_to:
+                    continue
+                oldest_walked = act["activityId"] if oldest_walked is None else min(oldest_walked, act["activityId"])
+                if activity_type and act["activityType"]["typeKey"].lower() != activity_type.lower():
+                    continue
+                if newest_known is not None and act["activityId"] <= newest_known:
+                    complete = True
+                    break
+                fetched.append(act)
+                if not self._is_downloaded(act, activity_type, manifest):
+                    new_activities.append(act)
+            if len(page) < page_size:
+                complete = True
+
+        logger.info(f"🔄 Found {len(new_activities)} new activities in {pages} pages")
+        results = self._download_many(new_activities, activity_type, manifest, workers, limiter, retries, backoff, on_downloaded)
+
+        failed = [act["activityId"] for act, ok in zip(new_activities, results) if not ok]
+        if failed:
+            failed_id = min(failed + ([failed_id] if failed_id is not None else []))
+        if fetched:
+            top_id = max([act["activityId"] for act in fetched] + ([top_id] if top_id is not None else []))
+
+        # Everything below the first failure is downloaded once the walk is
+        # complete, so the sync point moves just below it (or to the newest
+        # walked activity) and failures are fetched again next time. After a
+        # partial walk (max_pages) older activities are still missing, so it
+        # stays put and the cursor is kept instead.
+        if complete:
+            if failed_id is not None:
+                newest_known = failed_id - 1
+            elif top_id is not None:
+                newest_known = max(newest_known or 0, top_id)
+            if newest_known is not None:
+                state.update(key, newest_known, pages=pages, downloaded=sum(results))
+        else:
+            cursor = {
+                "offset": offset + pages * page_size,
+                "oldest_id": oldest_walked,
+                "stop_id": newest_known,
+                "top_id": top_id,
+                "failed_id": failed_id,
+            }
+            state.update(key, state.newest_id(key), resume=cursor, pages=pages, downloaded=sum(results))
+            logger.warning(f"⚠️ Stopped after {pages} pages before reaching known activities; sync again to continue")
+
+        logger.info(f"\n✅ Synced {sum(results)}/{len(new_activities)} new activities")
+        return sum(results)
+
 
 def download_activities(
     email: str,
@@ -0,0 +1,242 @@
+"""
+Building blocks for robust batch downloads.
+
+- TokenBucket: thread-safe rate limiter shared by the download workers
+- call_with_retries: exponential backoff with jitter for transient failures
+- write_atomic: write to a ``.part`` file and rename it into place, so an
+  interrupted download never leaves a truncated activity file behind
+- DownloadManifest: JSON record of finished downloads, used to resume
+- SyncState: newest activity synced per activity type
+"""
+
+import json
+import os
+import random
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MANIFEST_NAME = ".download_manifest.json"
+SYNC_STATE_NAME = ".sync_state.json"
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Tokens accumulate at ``rate`` per second up to ``capacity``; each call
+    to :meth:`acquire` takes one, waiting until one is available.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (default: max(1, rate))
+            clock: Monotonic clock, in seconds
+            sleep: Function used to wait
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long to wait before using it."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is paid back by waiting; later callers queue up behind
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        Wait for a token.
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+def call_with_retries(
+    func: Callable[[], T],
+    retries: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    sleep: Callable[[float], None] = time.sleep,
+    description: str = "request",
+) -> T:
+    """
+    Call a function, retrying failures with exponential backoff.
+
+    The n-th retry waits a random time up to ``base_delay * 2**n`` seconds
+    (capped at ``max_delay``), so parallel workers do not retry in lockstep.
+
+    Args:
+        func: Function to call
+        retries: Number of retries after the first attempt
+        base_delay: Backoff base in seconds
+        max_delay: Longest wait between attempts
+        sleep: Function used to wait
+        description: Name used in log messages
+
+    Returns:
+        Return value of ``func``
+
+    Raises:
+        The last exception once all attempts failed
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            logger.warning(f"⚠️ {description} failed ({e}); retry {attempt + 1}/{retries} in {delay:.1f}s")
+            sleep(delay)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Write a file so that it is either complete or absent.
+
+    Args:
+        path: Destination file
+        data: File contents
+    """
+    path = Path(path)
+    part = path.with_name(path.name + ".part")
+    try:
+        with open(part, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(part, path)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+
+
+class DownloadManifest:
+    """
+    Thread-safe record of downloaded activities, saved after every change.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Load the manifest, if it exists.
+
+        Args:
+            path: JSON file holding the manifest
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, object]] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable download manifest {self.path}: {e}")
+
+    def is_done(self, activity_id) -> bool:
+        """Whether an activity was downloaded and its file is still there."""
+        entry = self.entries.get(str(activity_id))
+        return (
+            entry is not None and entry.get("status") == "done"
+            and (self.path.parent / entry["filename"]).exists()
+        )
+
+    def record(self, activity_id, filename: str, status: str, **details) -> None:
+        """
+        Record the outcome of a download and save the manifest.
+
+        Args:
+            activity_id: Garmin activity ID
+            filename: Output filename (without path)
+            status: 'done' or 'failed'
+            **details: Extra JSON-serializable fields (size, error, ...)
+        """
+        with self._lock:
+            self.entries[str(activity_id)] = {"filename": filename, "status": status, **details}
+            write_atomic(self.path, json.dumps(self.entries, indent=1).encode("utf-8"))
+
+
+class SyncState:
+    """
+    Newest activity ID up to which each activity type has been synced.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Load the sync state, if it exists.
+
+        Args:
+            path: JSON file holding the state
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, object]] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable sync state {self.path}: {e}")
+
+    def newest_id(self, key: str) -> Optional[int]:
+        """Newest synced activity ID of an activity type, or None."""
+        entry = self.entries.get(key)
+        return None if entry is None else entry.get("newest_id")
+
+    def resume_point(self, key: str) -> Optional[Dict[str, object]]:
+        """Cursor of a walk through the activity list that was cut short, or None."""
+        entry = self.entries.get(key)
+        return None if entry is None else entry.get("resume")
+
+    def update(
+        self,
+        key: str,
+        newest_id: Optional[int],
+        resume: Optional[Dict[str, object]] = None,
+        **details,
+    ) -> None:
+        """
+        Record a sync and save the state.
+
+        Args:
+            key: Activity type ('all' for every type)
+            newest_id: Newest activity ID up to which everything is
+                downloaded (None if not known yet)
+            resume: Cursor to carry on an unfinished walk from; None once
+                the walk is complete
+            **details: Extra JSON-serializable fields (pages, downloaded, ...)
+        """
+        entry = {"newest_id": newest_id, "synced_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **details}
+        if resume is not None:
+            entry["resume"] = resume
+        self.entries[key] = entry
+        write_atomic(self.path, json.dumps(self.entries, indent=1).encode("utf-8"))
@@ -3,10 +3,22 @@ Geographic filtering and coordinates module.
 """
 
 from running_analyzer.geo.coordinates import bounding_boxes
-from running_analyzer.geo.filters import filter_runs_by_city, expand_bbox_with_tolerance
+from running_analyzer.geo.filters import filter_runs_by_city, expand_bbox_with_tolerance, expand_extent_with_tolerance
+from running_analyzer.geo.index import RunSpatialIndex, run_extent
+from running_analyzer.geo.tagging import TAG_KEYS, Region, load_regions, region_tree, regions_fingerprint, runs_by_label, tag_runs
 
 __all__ = [
     'bounding_boxes',
     'filter_runs_by_city',
     'expand_bbox_with_tolerance',
+    'expand_extent_with_tolerance',
+    'RunSpatialIndex',
+    'run_extent',
+    'TAG_KEYS',
+    'Region',
+    'load_regions',
+    'region_tree',
+    'regions_fingerprint',
+    'runs_by_label',
+    'tag_runs',
 ]
@@ -13,14 +13,36 @@ def expand_bbox_with_tolerance(df, bbox, tol_lat=0.01, tol_lon=0.01):
         tol_lat: Tolerance in degrees latitude (~0.01° ≈ 1.1 km)
         tol_lon: Tolerance in degrees longitude
         
+    Returns:
+        Expanded bounding box dictionary
+    """
+    extent = {
+        "lat_min": df["latitude"].min(),
+        "lat_max": df["latitude"].max(),
+        "lon_min": df["longitude"].min(),
+        "lon_max": df["longitude"].max(),
+    }
+    return expand_extent_with_tolerance(extent, bbox, tol_lat, tol_lon)
+
+
+def expand_extent_with_tolerance(extent, bbox, tol_lat=0.01, tol_lon=0.01):
+    """
+    Expand bounding box if a run's extent falls slightly outside.
+
+    Args:
+        extent: Dictionary with the run's lat_min, lat_max, lon_min, lon_max
+        bbox: Dictionary with lat_min, lat_max, lon_min, lon_max
+        tol_lat: Tolerance in degrees latitude
+        tol_lon: Tolerance in degrees longitude
+
     Returns:
         Expanded bounding box dictionary
     """
     lat_min, lat_max = bbox["lat_min"], bbox["lat_max"]
     lon_min, lon_max = bbox["lon_min"], bbox["lon_max"]
 
-    run_lat_min, run_lat_max = df["latitude"].min(), df["latitude"].max()
-    run_lon_min, run_lon_max = df["longitude"].min(), df["longitude"].max()
+    run_lat_min, run_lat_max = extent["lat_min"], extent["lat_max"]
+    run_lon_min, run_lon_max = extent["lon_min"], extent["lon_max"]
 
     # Expand only if within tolerance
     if run_lat_min < lat_min and abs(run_lat_min - lat_min) <= tol_lat:
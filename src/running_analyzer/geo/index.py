@@ -0,0 +1,185 @@
+"""
+Spatial index over run extents for city filtering.
+
+Each run's bounding box is computed once. The boxes are registered in a
+uniform latitude/longitude grid, so a city query only looks at the runs
+registered in the grid cells the city covers. A candidate run lying entirely
+inside the (tolerance-expanded) city box is returned as is. Only runs that
+cross the box edge are sliced point by point.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from running_analyzer.geo.filters import expand_extent_with_tolerance
+
+# Grid cell size in degrees (~11 km of latitude); city boxes span a few cells
+DEFAULT_CELL_DEG = 0.1
+
+# Runs whose extent covers more cells than this (e.g. a GPS glitch) are
+# checked on every query instead of being registered cell by cell
+MAX_CELLS_PER_RUN = 4096
+
+
+def run_extent(df) -> Optional[Dict[str, float]]:
+    """
+    Bounding box of a run's positions.
+
+    Args:
+        df: DataFrame with latitude and longitude columns
+
+    Returns:
+        Dictionary with lat_min, lat_max, lon_min, lon_max and missing (True
+        if some samples have no position), or None if no sample has one
+    """
+    if "latitude" not in df or "longitude" not in df:
+        return None
+    lat = np.asarray(df["latitude"], dtype=np.float64)
+    lon = np.asarray(df["longitude"], dtype=np.float64)
+    positioned = ~(np.isnan(lat) | np.isnan(lon))
+    if not positioned.any():
+        return None
+    lat, lon = lat[positioned], lon[positioned]
+    return {
+        "lat_min": float(lat.min()),
+        "lat_max": float(lat.max()),
+        "lon_min": float(lon.min()),
+        "lon_max": float(lon.max()),
+        "missing": not positioned.all(),
+    }
+
+
+class RunSpatialIndex:
+    """
+    Grid index of run bounding boxes.
+    """
+
+    def __init__(self, runs: List[Dict[str, object]], cell_deg: float = DEFAULT_CELL_DEG):
+        """
+        Compute run extents and register them in the grid.
+
+        Args:
+            runs: List of run dictionaries with 'name' and 'df' keys; a
+                precomputed 'extent' (see :func:`run_extent`) is used
+                instead of the samples when present
+            cell_deg: Grid cell size in degrees
+        """
+        self.runs = runs
+        self.cell_deg = cell_deg
+        self.extents: List[Optional[Dict[str, float]]] = [
+            run["extent"] if "extent" in run else run_extent(run["df"]) for run in runs
+        ]
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._oversized: List[int] = []
+
+        for i, extent in enumerate(self.extents):
+            if extent is None:
+                continue
+            rows, cols = self._cell_range(extent)
+            if len(rows) * len(cols) > MAX_CELLS_PER_RUN:
+                self._oversized.append(i)
+                continue
+            for row in rows:
+                for col in cols:
+                    self._cells[(row, col)].append(i)
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def _cell_range(self, box) -> Tuple[range, range]:
+        """Grid rows and columns covered by a bounding box."""
+        rows = range(math.floor(box["lat_min"] / self.cell_deg), math.floor(box["lat_max"] / self.cell_deg) + 1)
+        cols = range(math.floor(box["lon_min"] / self.cell_deg), math.floor(box["lon_max"] / self.cell_deg) + 1)
+        return rows, cols
+
+    def candidates(self, bbox, margin_lat: float = 0.0, margin_lon: float = 0.0) -> List[int]:
+        """
+        Positions of the runs whose extent overlaps a bounding box.
+
+        Args:
+            bbox: Dictionary with lat_min, lat_max, lon_min, lon_max
+            margin_lat: Degrees added to the box on both latitude sides
+            margin_lon: Degrees added to the box on both longitude sides
+
+        Returns:
+            Sorted list of positions in ``runs``
+        """
+        box = {
+            "lat_min": bbox["lat_min"] - margin_lat,
+            "lat_max": bbox["lat_max"] + margin_lat,
+            "lon_min": bbox["lon_min"] - margin_lon,
+            "lon_max": bbox["lon_max"] + margin_lon,
+        }
+        rows, cols = self._cell_range(box)
+
+        found: Set[int] = set(self._oversized)
+        if len(rows) * len(cols) > len(self._cells):
+            # Query larger than the populated grid: walk the occupied cells instead
+            for (row, col), members in self._cells.items():
+                if row in rows and col in cols:
+                    found.update(members)
+        else:
+            for row in rows:
+                for col in cols:
+                    found.update(self._cells.get((row, col), ()))
+
+        return sorted(
+            i for i in found
+            if self.extents[i]["lat_max"] >= box["lat_min"] and self.extents[i]["lat_min"] <= box["lat_max"]
+            and self.extents[i]["lon_max"] >= box["lon_min"] and self.extents[i]["lon_min"] <= box["lon_max"]
+        )
+
+    def filter_runs(self, bbox, tol_lat=0.01, tol_lon=0.01) -> List[Dict[str, object]]:
+        """
+        Filter runs by a bounding box with tolerance expansion.
+
+        Gives the same result as :func:`filter_runs_by_city`, but only looks
+        at runs overlapping the box. Runs entirely inside it are returned
+        without copying their DataFrame.
+
+        Args:
+            bbox: Dictionary with lat_min, lat_max, lon_min, lon_max
+            tol_lat: Tolerance in degrees latitude
+            tol_lon: Tolerance in degrees longitude
+
+        Returns:
+            List of filtered runs, in the original run order
+        """
+        filtered_runs = []
+        for i in self.candidates(bbox, tol_lat, tol_lon):
+            run, extent = self.runs[i], self.extents[i]
+            box = expand_extent_with_tolerance(extent, bbox, tol_lat, tol_lon)
+
+            inside = (
+                box["lat_min"] <= extent["lat_min"] and extent["lat_max"] <= box["lat_max"]
+                and box["lon_min"] <= extent["lon_min"] and extent["lon_max"] <= box["lon_max"]
+            )
+            if inside and not extent["missing"]:
+                filtered_runs.append({"name": run["name"], "df": run["df"]})
+                continue
+
+            df = run["df"]
+            df_filtered = df[
+                df["latitude"].between(box["lat_min"], box["lat_max"]) &
+                df["longitude"].between(box["lon_min"], box["lon_max"])
+            ]
+            if not df_filtered.empty:
+                filtered_runs.append({"name": run["name"], "df": df_filtered})
+
+        return filtered_runs
+
+    def filter_runs_by_city(self, city, country_boxes) -> List[Dict[str, object]]:
+        """
+        Indexed equivalent of :func:`filter_runs_by_city`.
+
+        Args:
+            city: City name to filter by
+            country_boxes: Dictionary of bounding boxes for cities
+
+        Returns:
+            List of filtered runs
+        """
+        return self.filter_runs(country_boxes[city])
@@ -0,0 +1,266 @@
+"""
+Ingest-time country/city tagging of runs.
+
+Regions are the city boxes of :data:`bounding_boxes`, plus optional
+polygons from a GeoJSON file whose features carry ``country`` and ``city``
+(or ``name``) properties. Each run is tagged once, when it is loaded, with
+the region holding its start point and the region holding most of its
+points, so the dashboard can filter runs by label instead of scanning
+coordinates.
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from running_analyzer.geo.coordinates import bounding_boxes
+from running_analyzer.geo.index import RunSpatialIndex
+
+logger = logging.getLogger(__name__)
+
+TAG_KEYS = ("country", "city", "start_country", "start_city")
+
+
+class Region:
+    """
+    A named area: a bounding box, or polygons with optional holes.
+    """
+
+    def __init__(self, country: str, city: str, bbox: Dict[str, float], polygons: Optional[List[List[np.ndarray]]] = None):
+        """
+        Initialize a region.
+
+        Args:
+            country: Country name
+            city: City name
+            bbox: Dictionary with lat_min, lat_max, lon_min, lon_max
+            polygons: List of polygons, each a list of (lon, lat) rings
+                (exterior first, then holes); None for a plain box
+        """
+        self.country = country
+        self.city = city
+        self.bbox = bbox
+        self.polygons = polygons
+        self.area = (bbox["lat_max"] - bbox["lat_min"]) * (bbox["lon_max"] - bbox["lon_min"])
+
+    def __repr__(self) -> str:
+        return f"Region({self.country!r}, {self.city!r})"
+
+    @classmethod
+    def from_geojson_geometry(cls, country: str, city: str, geometry: Dict[str, object]) -> "Region":
+        """
+        Build a region from a GeoJSON Polygon or MultiPolygon geometry.
+
+        Raises:
+            ValueError: If the geometry is of another type
+        """
+        if geometry["type"] == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry["type"] == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+        rings = [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon] for polygon in polygons]
+        points = np.concatenate([polygon[0] for polygon in rings])
+        bbox = {
+            "lat_min": float(points[:, 1].min()),
+            "lat_max": float(points[:, 1].max()),
+            "lon_min": float(points[:, 0].min()),
+            "lon_max": float(points[:, 0].max()),
+        }
+        return cls(country, city, bbox, rings)
+
+    def contains(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """
+        Whether each point lies in the region.
+
+        Args:
+            lat: Latitudes in degrees
+            lon: Longitudes in degrees
+
+        Returns:
+            Boolean array
+        """
+        inside = (
+            (lat >= self.bbox["lat_min"]) & (lat <= self.bbox["lat_max"])
+            & (lon >= self.bbox["lon_min"]) & (lon <= self.bbox["lon_max"])
+        )
+        if self.polygons is None or not inside.any():
+            return inside
+
+        candidates = np.flatnonzero(inside)
+        in_polygon = np.zeros(len(candidates), dtype=bool)
+        for rings in self.polygons:
+            # Even-odd rule over all rings, so holes cancel out the exterior
+            crossings = np.zeros(len(candidates), dtype=bool)
+            for ring in rings:
+                crossings ^= _ray_crossings(ring, lat[candidates], lon[candidates])
+            in_polygon |= crossings
+        inside[candidates] = in_polygon
+        return inside
+
+
+def _ray_crossings(ring: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Parity of ring edge crossings of an eastward ray from each point."""
+    odd = np.zeros(len(lat), dtype=bool)
+    x1, y1 = ring[:-1, 0], ring[:-1, 1]
+    x2, y2 = ring[1:, 0], ring[1:, 1]
+    for ax, ay, bx, by in zip(x1, y1, x2, y2):
+        spans = (ay > lat) != (by > lat)
+        if not spans.any():
+            continue
+        x_cross = ax + (lat[spans] - ay) * (bx - ax) / (by - ay)
+        odd[spans] ^= lon[spans] < x_cross
+    return odd
+
+
+def load_regions(geojson: Optional[Union[str, Path]] = None, boxes: Optional[Dict[str, Dict[str, Dict[str, float]]]] = None) -> List[Region]:
+    """
+    Regions from the city bounding boxes and an optional GeoJSON file.
+
+    Args:
+        geojson: Path of a GeoJSON FeatureCollection with Polygon or
+            MultiPolygon features and country and city (or name) properties
+        boxes: Country -> city -> bounding box dictionary (default:
+            :data:`bounding_boxes`)
+
+    Returns:
+        List of regions, boxes first
+    """
+    boxes = bounding_boxes if boxes is None else boxes
+    regions = [Region(country, city, bbox) for country, cities in boxes.items() for city, bbox in cities.items()]
+
+    if geojson:
+        with open(geojson, encoding="utf-8") as f:
+            collection = json.load(f)
+        for feature in collection.get("features", []):
+            props = feature.get("properties") or {}
+            country, city = props.get("country"), props.get("city") or props.get("name")
+            if not country or not city or not feature.get("geometry"):
+                logger.warning("Skipping GeoJSON feature without country/city or geometry: %s", props)
+                continue
+            try:
+                regions.append(Region.from_geojson_geometry(country, city, feature["geometry"]))
+            except (ValueError, KeyError, IndexError) as e:
+                logger.warning("Skipping GeoJSON feature %s/%s: %s", country, city, e)
+
+    return regions
+
+
+def regions_fingerprint(regions: Sequence[Region]) -> str:
+    """
+    Digest of region names and shapes, to tell whether stored labels are current.
+
+    Args:
+        regions: Regions as returned by :func:`load_regions`
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha1()
+    for region in regions:
+        shape = [[ring.tolist() for ring in rings] for rings in region.polygons] if region.polygons else None
+        digest.update(json.dumps([region.country, region.city, region.bbox, shape], sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def region_tree(regions: Sequence[Region]) -> "OrderedDict[str, List[str]]":
+    """
+    Countries and their cities, in region order.
+
+    Args:
+        regions: Regions as returned by :func:`load_regions`
+
+    Returns:
+        Ordered mapping of country to city names
+    """
+    tree: "OrderedDict[str, List[str]]" = OrderedDict()
+    for region in regions:
+        cities = tree.setdefault(region.country, [])
+        if region.city not in cities:
+            cities.append(region.city)
+    return tree
+
+
+def _most_specific(matches):
+    """Smallest region among (region, count) matches."""
+    return min(matches, key=lambda match: match[0].area)[0]
+
+
+def tag_runs(runs: List[Dict[str, object]], regions: Sequence[Region], index: Optional[RunSpatialIndex] = None) -> None:
+    """
+    Tag runs in place with country/city labels.
+
+    ``start_country``/``start_city`` name the region holding the first
+    positioned sample. ``country``/``city`` name the region holding more than
+    half of the positioned samples (the smallest one when regions are
+    nested), or else the region holding most of them. Labels of runs
+    outside every region are None.
+
+    Args:
+        runs: List of run dictionaries with 'name' and 'df' keys
+        regions: Regions as returned by :func:`load_regions`
+        index: Spatial index over ``runs``; built if not given
+    """
+    index = index if index is not None else RunSpatialIndex(runs)
+    matches: Dict[int, List] = {}
+    starts: Dict[int, List] = {}
+    positions: Dict[int, tuple] = {}
+
+    for region in regions:
+        for i in index.candidates(region.bbox):
+            if i not in positions:
+                df = runs[i]["df"]
+                lat = np.asarray(df["latitude"], dtype=np.float64)
+                lon = np.asarray(df["longitude"], dtype=np.float64)
+                positioned = ~(np.isnan(lat) | np.isnan(lon))
+                positions[i] = (lat[positioned], lon[positioned])
+            lat, lon = positions[i]
+
+            inside = region.contains(lat, lon)
+            count = int(inside.sum())
+            if count:
+                matches.setdefault(i, []).append((region, count))
+                if inside[0]:
+                    starts.setdefault(i, []).append((region, count))
+
+    for i, run in enumerate(runs):
+        for key in TAG_KEYS:
+            run[key] = None
+
+        start = _most_specific(starts[i]) if i in starts else None
+        if start is not None:
+            run["start_country"], run["start_city"] = start.country, start.city
+
+        if i not in matches:
+            continue
+        total = len(positions[i][0])
+        majority = [m for m in matches[i] if m[1] * 2 > total]
+        if majority:
+            region = _most_specific(majority)
+        else:
+            region = max(matches[i], key=lambda match: (match[1], -match[0].area))[0]
+        run["country"], run["city"] = region.country, region.city
+
+
+def runs_by_label(runs: Sequence[Dict[str, object]]) -> Dict[tuple, List[Dict[str, object]]]:
+    """
+    Lookup of tagged runs by (country, city), keeping run order.
+
+    Args:
+        runs: Tagged run dictionaries
+
+    Returns:
+        Dictionary mapping (country, city) to the runs with that label
+    """
+    lookup: Dict[tuple, List[Dict[str, object]]] = {}
+    for run in runs:
+        if run.get("city") is not None:
+            lookup.setdefault((run["country"], run["city"]), []).append(run)
+    return lookup
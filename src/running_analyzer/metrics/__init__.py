@@ -6,10 +6,57 @@ from running_analyzer.metrics.calculations import (
     add_hrv_metrics,
     add_pace_metrics,
     compute_run_stats,
+    hrv_values,
+    pace_values,
+)
+from running_analyzer.metrics.batch import RunBatch
+from running_analyzer.metrics.cache import MetricsCache, run_stats
+from running_analyzer.metrics.resample import ALIGN_AXES, axis_values, resample_runs
+from running_analyzer.metrics.physiology import (
+    HR_ZONE_BOUNDS,
+    MAX_HR,
+    PACE_ZONE_BOUNDS,
+    PHYSIOLOGY_SETTINGS,
+    POWER_ZONE_BOUNDS,
+    hr_zone_seconds,
+    physiology_metrics,
+    segmented_decoupling,
+    segmented_trimp,
+    segmented_zone_seconds,
+)
+from running_analyzer.metrics.training import (
+    ROLLUP_PERIODS,
+    TrainingRollups,
+    edwards_load,
+    training_summaries,
+    training_summary,
 )
 
 __all__ = [
     'add_hrv_metrics',
     'add_pace_metrics',
     'compute_run_stats',
+    'hrv_values',
+    'pace_values',
+    'RunBatch',
+    'MetricsCache',
+    'run_stats',
+    'ALIGN_AXES',
+    'axis_values',
+    'resample_runs',
+    'HR_ZONE_BOUNDS',
+    'MAX_HR',
+    'PACE_ZONE_BOUNDS',
+    'PHYSIOLOGY_SETTINGS',
+    'POWER_ZONE_BOUNDS',
+    'hr_zone_seconds',
+    'physiology_metrics',
+    'segmented_decoupling',
+    'segmented_trimp',
+    'segmented_zone_seconds',
+    'ROLLUP_PERIODS',
+    'TrainingRollups',
+    'edwards_load',
+    'training_summaries',
+    'training_summary',
 ]
@@ -0,0 +1,314 @@
+"""
+Batch metrics engine.
+
+Many runs are concatenated into one columnar buffer with run offsets
+(run ``i`` occupies rows ``offsets[i]:offsets[i + 1]``), and HRV, pace and
+summary statistics are computed for all of them with segmented array
+operations. Rolling windows never cross a run boundary, so every run gets
+the same values as when it is computed on its own, but the cost no longer
+grows with the number of Python-level per-run calls.
+"""
+
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def float_values(series) -> np.ndarray:
+    """Column as a float64 array, converting object columns of numbers/None."""
+    if series.dtype == object:
+        series = pd.to_numeric(series, errors="coerce")
+    return np.asarray(series, dtype=np.float64)
+
+
+def datetime_values(series) -> np.ndarray:
+    """Column as datetime64 (UTC for tz-aware columns), parsing only when needed."""
+    if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        series = pd.to_datetime(series, errors="coerce")
+    # .values of a tz-aware column is a view of its UTC datetime64 data
+    return np.asarray(series.values)
+
+
+def _positions(offsets: np.ndarray) -> np.ndarray:
+    """Row position of every sample within its own run."""
+    lengths = np.diff(offsets)
+    return np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+
+
+def _segment_sums(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Sum of each run's values (empty runs sum to 0)."""
+    csum = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    return csum[offsets[1:]] - csum[offsets[:-1]]
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing-window sums of a NaN-free array (NaN before the first full window)."""
+    sums = np.full(len(values), np.nan)
+    csum = np.cumsum(values)
+    sums[window - 1] = csum[window - 1]
+    np.subtract(csum[window:], csum[:-window], out=sums[window:])
+    return sums
+
+
+def _window_valid(nan: np.ndarray, offsets: np.ndarray, window: int) -> np.ndarray:
+    """Whether each trailing window lies inside one run and holds no NaN."""
+    valid = _window_sums(nan.astype(np.float64), window) == 0
+    valid &= _positions(offsets) >= window - 1
+    return valid
+
+
+def rolling_sums(values: np.ndarray, offsets: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trailing-window sums that do not cross run boundaries.
+
+    Args:
+        values: Concatenated values of all runs
+        offsets: Run offsets (length = number of runs + 1)
+        window: Window size
+
+    Returns:
+        Tuple of (sums, valid). A window is valid when it lies inside one run
+        and holds no NaN; sums of invalid windows are meaningless.
+    """
+    if window < 1 or len(values) < window:
+        return np.full(len(values), np.nan), np.zeros(len(values), dtype=bool)
+
+    nan = np.isnan(values)
+    return _window_sums(np.where(nan, 0.0, values), window), _window_valid(nan, offsets, window)
+
+
+def step_diff(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Difference to the previous sample of the same run (NaN at run starts).
+
+    Args:
+        values: Concatenated float or datetime64 values of all runs
+        offsets: Run offsets
+
+    Returns:
+        Float64 array (seconds for datetime64 input)
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) > 1:
+        diffs = np.diff(values)
+        if diffs.dtype.kind == "m":
+            diffs = diffs / np.timedelta64(1, "s")
+        out[1:] = diffs
+    starts = offsets[:-1]
+    out[starts[starts < len(out)]] = np.nan
+    return out
+
+
+def segmented_hrv(hr: np.ndarray, offsets: np.ndarray, window: int = 10, method: str = "std") -> np.ndarray:
+    """
+    Rolling HRV of concatenated heart-rate series.
+
+    Matches ``rolling(window).std()`` (sample standard deviation) and the
+    rolling RMSSD of successive differences applied to each run separately.
+
+    Args:
+        hr: Concatenated heart rate values (float64)
+        offsets: Run offsets
+        window: Rolling window size
+        method: 'std' for standard deviation or 'rmssd' for RMSSD
+
+    Returns:
+        Float64 array with one value per sample
+    """
+    if method == "std":
+        if window < 1 or len(hr) < window:
+            return np.full(len(hr), np.nan)
+
+        # Center each run on its mean so the sum of squares does not cancel badly
+        nan = np.isnan(hr)
+        counts = _segment_sums(~nan, offsets)
+        centered = np.where(nan, 0.0, hr)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = _segment_sums(centered, offsets) / counts
+        centered -= np.repeat(np.nan_to_num(means), np.diff(offsets))
+        centered[nan] = 0.0
+
+        s1 = _window_sums(centered, window)
+        centered *= centered
+        s2 = _window_sums(centered, window)
+        valid = _window_valid(nan, offsets, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (s2 - s1 * s1 / window) / (window - 1)
+        out = np.sqrt(np.maximum(var, 0.0, out=var), out=var)
+
+    elif method == "rmssd":
+        diffs = step_diff(hr, offsets)
+        s2, valid = rolling_sums(diffs * diffs, offsets, window)
+        out = np.sqrt(s2 / window)
+
+    else:
+        raise ValueError(f"Unknown HRV method: {method}")
+
+    out[~valid] = np.nan
+    return out
+
+
+def segmented_pace(timestamps: np.ndarray, distance: np.ndarray, offsets: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-sample time step, distance step and pace of concatenated runs.
+
+    Args:
+        timestamps: Concatenated datetime64 sample times
+        distance: Concatenated cumulative distances in meters
+        offsets: Run offsets
+
+    Returns:
+        Dictionary with dt, dd, pace_sec_per_km and pace_min_per_km arrays
+    """
+    dt = step_diff(timestamps, offsets)
+    dd = step_diff(distance, offsets)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pace_sec_per_km = dt / (dd / 1000)
+    return {
+        "dt": dt,
+        "dd": dd,
+        "pace_sec_per_km": pace_sec_per_km,
+        "pace_min_per_km": pace_sec_per_km / 60,
+    }
+
+
+def segmented_stats(
+    timestamps: np.ndarray,
+    distance: np.ndarray,
+    hr: np.ndarray,
+    offsets: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Summary statistics of each run, over samples with timestamp and distance.
+
+    Args:
+        timestamps: Concatenated datetime64 sample times
+        distance: Concatenated cumulative distances in meters
+        hr: Concatenated heart rate values
+        offsets: Run offsets
+
+    Returns:
+        Dictionary of per-run arrays: distance_km, avg_hr, avg_pace and
+        samples (number of usable samples; 0 means the stats are NaN)
+    """
+    n_runs = len(offsets) - 1
+    valid = ~(np.isnat(timestamps) | np.isnan(distance))
+    samples = _segment_sums(valid, offsets).astype(np.int64)
+
+    total_time_sec = np.full(n_runs, np.nan)
+    total_dist_m = np.full(n_runs, np.nan)
+    usable = samples > 0
+    if usable.any():
+        rows = np.arange(len(valid))
+        starts = offsets[:-1][usable]
+        first = np.minimum.reduceat(np.where(valid, rows, len(valid)), starts)
+        # Each reduceat segment runs up to the next usable start; the runs
+        # skipped in between have no valid rows, so they do not change the result
+        last = np.maximum.reduceat(np.where(valid, rows, -1), starts)
+        total_time_sec[usable] = (timestamps[last] - timestamps[first]) / np.timedelta64(1, "s")
+        total_dist_m[usable] = distance[last] - distance[first]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hr_present = valid & ~np.isnan(hr)
+        avg_hr = _segment_sums(np.where(hr_present, hr, 0.0), offsets) / _segment_sums(hr_present, offsets)
+
+        pace = np.where(
+            (total_dist_m > 0) & (total_time_sec > 0),
+            total_time_sec / (total_dist_m / 1000),
+            np.nan,
+        )
+
+    return {
+        "distance_km": total_dist_m / 1000,
+        "avg_hr": avg_hr,
+        "avg_pace": pace,
+        "samples": samples,
+    }
+
+
+class RunBatch:
+    """
+    Timestamp, heart-rate and distance columns of many runs in one buffer.
+    """
+
+    def __init__(self, keys: Sequence[Hashable], offsets: np.ndarray, timestamps: np.ndarray,
+                 hr: np.ndarray, distance: np.ndarray):
+        """
+        Initialize from already concatenated columns.
+
+        Args:
+            keys: Run keys, one per run
+            offsets: Run offsets (length = number of runs + 1)
+            timestamps: Concatenated datetime64 sample times
+            hr: Concatenated heart rate values (float64)
+            distance: Concatenated cumulative distances (float64)
+        """
+        self.keys = list(keys)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.timestamps = timestamps
+        self.hr = hr
+        self.distance = distance
+
+    @classmethod
+    def from_frames(cls, frames: Sequence[Tuple[Hashable, pd.DataFrame]]) -> "RunBatch":
+        """
+        Concatenate the metric input columns of several run DataFrames.
+
+        Args:
+            frames: Sequence of (run key, DataFrame) pairs. Frames need
+                timestamp and distance_m columns; hr_bpm is optional.
+
+        Returns:
+            RunBatch holding every run in order
+        """
+        keys = [key for key, _ in frames]
+        lengths = [len(df) for _, df in frames]
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+        timestamps, hr, distance = [], [], []
+        for _, df in frames:
+            timestamps.append(datetime_values(df["timestamp"]))
+            distance.append(float_values(df["distance_m"]))
+            hr.append(float_values(df["hr_bpm"]) if "hr_bpm" in df else np.full(len(df), np.nan))
+
+        if not frames:
+            return cls(keys, offsets, np.array([], dtype="datetime64[ns]"), np.array([]), np.array([]))
+        return cls(keys, offsets, np.concatenate(timestamps), np.concatenate(hr), np.concatenate(distance))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def split(self, values: np.ndarray) -> List[np.ndarray]:
+        """
+        Split a concatenated per-sample array into per-run views.
+
+        Args:
+            values: Array aligned with the batch buffer
+
+        Returns:
+            List of arrays, one per run
+        """
+        return [values[start:end] for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def hrv(self, window: int = 10, method: str = "std") -> np.ndarray:
+        """Rolling HRV of every run (see :func:`segmented_hrv`)."""
+        return segmented_hrv(self.hr, self.offsets, window=window, method=method)
+
+    def pace(self) -> Dict[str, np.ndarray]:
+        """Pace columns of every run (see :func:`segmented_pace`)."""
+        return segmented_pace(self.timestamps, self.distance, self.offsets)
+
+    def stats(self) -> List[Dict[str, float]]:
+        """
+        Summary statistics of every run.
+
+        Returns:
+            List with one dictionary (distance_km, avg_hr, avg_pace) per run,
+            in the same form as :func:`compute_run_stats`
+        """
+        stats = segmented_stats(self.timestamps, self.distance, self.hr, self.offsets)
+        return [
+            {"distance_km": float(d), "avg_hr": float(h), "avg_pace": float(p)}
+            for d, h, p in zip(stats["distance_km"], stats["avg_hr"], stats["avg_pace"])
+        ]
@@ -0,0 +1,366 @@
+"""
+Memoized per-run metrics.
+
+Dashboard callbacks fire on every dropdown, slider and tab change, but the
+derived metrics of a run only depend on the run itself and the HRV
+settings. :class:`MetricsCache` keeps the results of recent computations in
+a bounded LRU so repeated interactions reuse them.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from running_analyzer.metrics.batch import RunBatch
+from running_analyzer.metrics.calculations import add_hrv_metrics, add_pace_metrics, compute_run_stats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RUN_METRICS_CACHE_SIZE", "256"))
+
+NAN_STATS = {"distance_km": float("nan"), "avg_hr": float("nan"), "avg_pace": float("nan")}
+
+
+class MetricsCache:
+    """
+    Thread-safe LRU cache of derived run metrics.
+
+    Keys are ``(run, window, method)`` tuples. Entries that do not depend on
+    the HRV settings (pace, summary stats) use ``None`` for window and method,
+    and other values derived from a run (see :meth:`runs_derived`) use
+    ``(run, kind, None)``.
+
+    Values are computed outside the lock. Every :meth:`invalidate` bumps a
+    generation of the run (or of the whole cache), and a value whose run
+    was invalidated while it was computed is returned but not stored, so a
+    result from a replaced frame is never served for its replacement.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Number of entries kept before the least recently
+                used one is evicted
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, object]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self._entries
+
+    def _generation(self, run: Hashable) -> Tuple[int, int]:
+        """Invalidation count of the cache and of one run; call with the lock held."""
+        return self._epoch, self._generations.get(run, 0)
+
+    def _store(self, key: Tuple, value: object, generation: Tuple[int, int]) -> None:
+        """Store a computed value unless its run was invalidated meanwhile; call with the lock held."""
+        if self._generation(key[0]) != generation:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], object]) -> object:
+        """
+        Return the cached value for ``key``, computing and storing it on a miss.
+
+        Args:
+            key: ``(run, window, method)`` tuple
+            compute: Zero-argument function producing the value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            generation = self._generation(key[0])
+
+        # Compute outside the lock so one slow run does not block other callbacks
+        value = compute()
+
+        with self._lock:
+            self._store(key, value, generation)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, run: Optional[Hashable] = None) -> None:
+        """
+        Drop the entries of one run, or all entries if ``run`` is None.
+
+        Args:
+            run: Run key as used in the cache keys
+        """
+        with self._lock:
+            if run is None:
+                self._epoch += 1
+                self._entries.clear()
+                return
+            self._generations[run] = self._generations.get(run, 0) + 1
+            for key in [k for k in self._entries if k[0] == run]:
+                del self._entries[key]
+
+    def _get_or_compute_many(
+        self,
+        keys: Sequence[Tuple],
+        items: Sequence[Tuple[Hashable, object]],
+        compute_many: Callable[[List[Tuple[Hashable, object]]], List[object]],
+    ) -> List[object]:
+        """
+        Batched :meth:`get_or_compute`: all misses are computed in one call.
+
+        Inputs that cannot be loaded (a getter raising, or None) are logged
+        and left out of the computation; their value is None and is not
+        cached, so the other runs still render and the run is tried again
+        on the next call.
+
+        Args:
+            keys: Cache key of each item
+            items: (run, input) pairs, aligned with ``keys``; an input may be
+                a function returning it, which is only called on a miss
+            compute_many: Function mapping a list of missed items to values
+
+        Returns:
+            Values aligned with ``keys`` (None for runs that failed to load)
+        """
+        results: List[object] = [None] * len(keys)
+        missing: List[int] = []
+        generations: List[Tuple[int, int]] = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    results[i] = self._entries[key]
+                    self.hits += 1
+                else:
+                    missing.append(i)
+                    generations.append(self._generation(key[0]))
+            self.misses += len(missing)
+
+        if not missing:
+            return results
+
+        loaded: List[int] = []
+        missed: List[Tuple[Hashable, object]] = []
+        for j, i in enumerate(missing):
+            run, value = items[i]
+            try:
+                value = value() if callable(value) else value
+            except Exception as exc:
+                logger.error("Could not load run %s: %s", run, exc)
+                continue
+            if value is not None:
+                loaded.append(j)
+                missed.append((run, value))
+        values = compute_many(missed) if missed else []
+
+        with self._lock:
+            for j, value in zip(loaded, values):
+                i = missing[j]
+                results[i] = value
+                self._store(keys[i], value, generations[j])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+
+    def runs_metrics(
+        self,
+        runs: Sequence[Tuple[Hashable, pd.DataFrame]],
+        window: int,
+        method: str,
+    ) -> List[pd.DataFrame]:
+        """
+        Run DataFrames with pace and HRV columns for the given HRV settings.
+
+        Runs missing from the cache are computed together by the batch
+        engine. The returned frames are shared between callers and must not
+        be modified.
+
+        Args:
+            runs: Sequence of (run key, full run DataFrame) pairs; the frame
+                may be given as a function returning it, so runs whose
+                metrics are cached need not be loaded
+            window: HRV rolling window size
+            method: HRV method ('std' or 'rmssd')
+
+        Returns:
+            DataFrames with pace and hrv columns added, in input order
+            (None for runs that failed to load)
+        """
+        keys = [run for run, _ in runs]
+        bases = self.runs_pace(runs)
+        return self._get_or_compute_many(
+            [(k, window, method) for k in keys],
+            list(zip(keys, bases)),
+            lambda items: _hrv_frames(items, window, method),
+        )
+
+    def runs_pace(self, runs: Sequence[Tuple[Hashable, pd.DataFrame]]) -> List[pd.DataFrame]:
+        """
+        Run DataFrames with pace columns, which do not depend on the HRV settings.
+
+        The returned frames are shared between callers and must not be
+        modified.
+
+        Args:
+            runs: Sequence of (run key, full run DataFrame or function
+                returning it) pairs
+
+        Returns:
+            DataFrames with pace columns added, in input order (None for
+            runs that failed to load)
+        """
+        return self._get_or_compute_many([(run, None, None) for run, _ in runs], runs, _pace_frames)
+
+    def runs_derived(
+        self,
+        runs: Sequence[Tuple[Hashable, object]],
+        kind: Hashable,
+        compute_many: Callable[[List[Tuple[Hashable, object]]], List[object]],
+    ) -> List[object]:
+        """
+        Other values derived from single runs, cached under ``(run, kind, None)``.
+
+        Like the metrics, these entries are dropped by :meth:`invalidate`
+        when their run changes.
+
+        Args:
+            runs: Sequence of (run key, input or function returning it) pairs
+            kind: Hashable describing the value and everything it depends on
+                besides the run (e.g. ``("track", 1500)``)
+            compute_many: Function mapping a list of missed (run, input)
+                pairs to their values, in order
+
+        Returns:
+            Values in input order (None for runs that failed to load)
+        """
+        return self._get_or_compute_many([(run, kind, None) for run, _ in runs], runs, compute_many)
+
+    def runs_stats(self, runs: Sequence[Tuple[Hashable, pd.DataFrame]]) -> List[Dict[str, float]]:
+        """
+        Summary statistics of several runs (see :func:`compute_run_stats`).
+
+        Args:
+            runs: Sequence of (run key, full run DataFrame or function
+                returning it) pairs
+
+        Returns:
+            Dictionaries with distance_km, avg_hr and avg_pace, in input
+            order (None for runs that failed to load)
+        """
+        return self._get_or_compute_many([(run, "stats", None) for run, _ in runs], runs, _stats)
+
+    def run_metrics(self, run: Hashable, df: pd.DataFrame, window: int, method: str) -> pd.DataFrame:
+        """
+        Run DataFrame with pace and HRV columns for the given HRV settings.
+
+        The returned frame is shared between callers and must not be modified.
+
+        Args:
+            run: Run key (e.g. the run name)
+            df: Full run DataFrame
+            window: HRV rolling window size
+            method: HRV method ('std' or 'rmssd')
+
+        Returns:
+            DataFrame with pace and hrv columns added
+        """
+        return self.runs_metrics([(run, df)], window, method)[0]
+
+    def run_stats(self, run: Hashable, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Summary statistics of a run (see :func:`compute_run_stats`).
+
+        Args:
+            run: Run key (e.g. the run name)
+            df: Full run DataFrame
+
+        Returns:
+            Dictionary with distance_km, avg_hr and avg_pace
+        """
+        return self.runs_stats([(run, df)])[0]
+
+
+def _pace_frames(items: List[Tuple[Hashable, pd.DataFrame]]) -> List[pd.DataFrame]:
+    """Add pace columns to several runs in one batch, falling back run by run."""
+    try:
+        batch = RunBatch.from_frames(items)
+        columns = {name: batch.split(values) for name, values in batch.pace().items()}
+    except Exception:
+        logger.exception("Batch pace metrics failed; computing run by run")
+        return [_safe(add_pace_metrics, df, run) for run, df in items]
+
+    frames = []
+    for i, (_, df) in enumerate(items):
+        new = {name: parts[i] for name, parts in columns.items()}
+        if not pd.api.types.is_datetime64_any_dtype(df["timestamp"].dtype):
+            new["timestamp"] = pd.to_datetime(df["timestamp"])
+        frames.append(df.assign(**new))
+    return frames
+
+
+def _hrv_frames(items: List[Tuple[Hashable, pd.DataFrame]], window: int, method: str) -> List[pd.DataFrame]:
+    """Add the hrv column to several runs in one batch, falling back run by run."""
+    try:
+        hrv = RunBatch.from_frames(items).hrv(window=window, method=method)
+        offsets = np.cumsum([0] + [len(df) for _, df in items])
+    except Exception:
+        logger.exception("Batch HRV metrics failed; computing run by run")
+        return [_safe(add_hrv_metrics, df, run, window=window, method=method) for run, df in items]
+    return [df.assign(hrv=hrv[offsets[i]:offsets[i + 1]]) for i, (_, df) in enumerate(items)]
+
+
+def _stats(items: List[Tuple[Hashable, pd.DataFrame]]) -> List[Dict[str, float]]:
+    """Summary statistics of several runs in one batch, falling back run by run."""
+    try:
+        return RunBatch.from_frames(items).stats()
+    except Exception:
+        logger.exception("Batch run stats failed; computing run by run")
+        return [run_stats(df, run) for run, df in items]
+
+
+def _safe(func, df: pd.DataFrame, run: Hashable, **kwargs) -> pd.DataFrame:
+    """Apply a metrics function, keeping the input frame if it fails."""
+    try:
+        return func(df, **kwargs)
+    except Exception:
+        logger.exception("%s failed for %s", func.__name__, run)
+        return df
+
+
+def run_stats(df: pd.DataFrame, run: Hashable = None) -> Dict[str, float]:
+    """
+    Compute run statistics, returning NaN values instead of raising.
+
+    Args:
+        df: Run DataFrame
+        run: Run key used in the log message
+
+    Returns:
+        Dictionary with distance_km, avg_hr and avg_pace
+    """
+    try:
+        return compute_run_stats(df)
+    except Exception:
+        logger.exception("compute_run_stats failed for %s", run)
+        return dict(NAN_STATS)
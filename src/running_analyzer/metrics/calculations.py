@@ -1,83 +1,132 @@
 """
 Metrics calculations for running data (HRV, pace, statistics).
+
+The ``*_values`` functions work on NumPy column views and return only the
+new columns; they are the single-run case of the batch engine in
+:mod:`running_analyzer.metrics.batch`. The ``add_*`` wrappers attach those
+columns to a DataFrame, either to a new frame that shares the existing
+columns or, with ``inplace=True``, to the caller's frame.
 """
 
+from typing import Dict
+
 import pandas as pd
 import numpy as np
 
+from running_analyzer.metrics.batch import (
+    datetime_values,
+    float_values,
+    segmented_hrv,
+    segmented_pace,
+    segmented_stats,
+)
+
 
-def add_hrv_metrics(df, window=10, method="std"):
+def _single(n):
+    """Offsets of a single run of n samples."""
+    return np.array([0, n], dtype=np.int64)
+
+
+def hrv_values(hr, window=10, method="std"):
     """
-    Add HRV (Heart Rate Variability) metrics to DataFrame.
-    
+    Rolling HRV of a heart-rate series.
+
+    Matches ``rolling(window).std()`` (sample standard deviation) and the
+    rolling RMSSD of successive differences: windows that are incomplete or
+    contain a missing value are NaN.
+
     Args:
-        df: DataFrame with hr_bpm column
-        window: Rolling window size for calculation
+        hr: Heart rate values (array or Series)
+        window: Rolling window size
         method: 'std' for standard deviation or 'rmssd' for RMSSD
-        
+
     Returns:
-        DataFrame with hrv column added
+        Float64 array with one value per sample
     """
-    df = df.copy()
+    hr = float_values(hr if hasattr(hr, "dtype") else np.asarray(hr))
+    return segmented_hrv(hr, _single(len(hr)), window=window, method=method)
+
+
+def pace_values(timestamps, distance) -> Dict[str, np.ndarray]:
+    """
+    Per-sample time step, distance step and pace.
+
+    Args:
+        timestamps: datetime64 array of sample times
+        distance: Cumulative distance in meters
 
-    if method == "std":
-        df["hrv"] = df["hr_bpm"].rolling(window=window).std()
+    Returns:
+        Dictionary with dt, dd, pace_sec_per_km and pace_min_per_km arrays
+    """
+    return segmented_pace(np.asarray(timestamps), np.asarray(distance, dtype=np.float64), _single(len(distance)))
 
-    elif method == "rmssd":
-        diffs = df["hr_bpm"].diff()
-        df["hrv"] = np.sqrt((diffs**2).rolling(window=window).mean())
 
+def _attach(df, columns, inplace):
+    """Add new columns to ``df`` in place, or to a new frame sharing its data."""
+    if not inplace:
+        return df.assign(**columns)
+    for name, values in columns.items():
+        df[name] = values
     return df
 
 
-def add_pace_metrics(df):
+def add_hrv_metrics(df, window=10, method="std", inplace=False):
+    """
+    Add HRV (Heart Rate Variability) metrics to DataFrame.
+
+    Args:
+        df: DataFrame with hr_bpm column
+        window: Rolling window size for calculation
+        method: 'std' for standard deviation or 'rmssd' for RMSSD
+        inplace: Write the column into ``df`` instead of a new frame
+
+    Returns:
+        DataFrame with hrv column added
+    """
+    if method not in ("std", "rmssd"):
+        return df if inplace else df.assign()
+    return _attach(df, {"hrv": hrv_values(df["hr_bpm"], window=window, method=method)}, inplace)
+
+
+def add_pace_metrics(df, inplace=False):
     """
     Add pace metrics (min/km) to DataFrame.
-    
+
     Args:
         df: DataFrame with timestamp and distance_m columns
-        
+        inplace: Write the columns into ``df`` instead of a new frame
+
     Returns:
         DataFrame with pace columns added
     """
-    df = df.copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df["dt"] = df["timestamp"].diff().dt.total_seconds()
-    df["dd"] = df["distance_m"].diff()
-    df["pace_sec_per_km"] = df["dt"] / (df["dd"] / 1000)
-    df["pace_min_per_km"] = df["pace_sec_per_km"] / 60
-    return df
+    columns = {}
+    timestamps = datetime_values(df["timestamp"])
+    if not pd.api.types.is_datetime64_any_dtype(df["timestamp"].dtype):
+        columns["timestamp"] = pd.to_datetime(df["timestamp"])
+    columns.update(pace_values(timestamps, float_values(df["distance_m"])))
+    return _attach(df, columns, inplace)
 
 
 def compute_run_stats(df):
     """
     Compute summary statistics for a run.
-    
+
     Args:
         df: DataFrame with running data
-        
+
     Returns:
         Dictionary with distance_km, avg_hr, and avg_pace
     """
-    df = df.copy()
-
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    df["distance_m"] = pd.to_numeric(df["distance_m"], errors="coerce")
-
-    df = df.dropna(subset=["timestamp", "distance_m"])
-
-    total_time_sec = (df["timestamp"].iloc[-1] - df["timestamp"].iloc[0]).total_seconds()
-    total_dist_m = df["distance_m"].iloc[-1] - df["distance_m"].iloc[0]
-
-    avg_hr = df["hr_bpm"].mean()
+    timestamps = datetime_values(df["timestamp"])
+    distance = float_values(df["distance_m"])
+    hr = float_values(df["hr_bpm"])
 
-    if total_dist_m > 0 and total_time_sec > 0:
-        pace_sec_per_km = total_time_sec / (total_dist_m / 1000)
-    else:
-        pace_sec_per_km = float("nan")
+    stats = segmented_stats(timestamps, distance, hr, _single(len(df)))
+    if stats["samples"][0] == 0:
+        raise IndexError("No samples with both timestamp and distance")
 
     return {
-        "distance_km": total_dist_m / 1000,
-        "avg_hr": avg_hr,
-        "avg_pace": pace_sec_per_km
+        "distance_km": float(stats["distance_km"][0]),
+        "avg_hr": float(stats["avg_hr"][0]),
+        "avg_pace": float(stats["avg_pace"][0])
     }
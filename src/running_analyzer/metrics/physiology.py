@@ -0,0 +1,311 @@
+"""
+Physiological metrics of runs: time in zones, TRIMP and decoupling.
+
+Like the batch engine (:mod:`running_analyzer.metrics.batch`), the
+``segmented_*`` functions work on the concatenated samples of one or many
+runs with run offsets and return one value (or row) per run, so the
+metrics of a whole ingest batch come out of a few NumPy passes. They are
+computed once per run at ingest into its training summary (see
+:func:`running_analyzer.metrics.training.training_summaries`), which is
+stored in the run cache, rather than for every view.
+
+Zones and TRIMP depend on the athlete; set RUN_MAX_HR, RUN_REST_HR,
+RUN_TRIMP_SEX, RUN_THRESHOLD_PACE (min/km) and RUN_FTP_W.
+"""
+
+import os
+import logging
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from running_analyzer.metrics.batch import datetime_values, float_values, step_diff
+
+logger = logging.getLogger(__name__)
+
+# Banister TRIMP weighting (a, b) of the heart-rate reserve fraction x:
+# minutes * x * a * exp(b * x)
+TRIMP_WEIGHTS = {"male": (0.64, 1.92), "female": (0.86, 1.67)}
+
+
+def _trimp_sex(value: str) -> str:
+    """TRIMP weighting named by RUN_TRIMP_SEX; unknown names fall back to 'male'."""
+    sex = value.strip().lower()
+    if sex not in TRIMP_WEIGHTS:
+        logger.warning("Unknown RUN_TRIMP_SEX %r (expected %s); using 'male'", value, " or ".join(TRIMP_WEIGHTS))
+        return "male"
+    return sex
+
+
+MAX_HR = float(os.environ.get("RUN_MAX_HR", "190"))
+REST_HR = float(os.environ.get("RUN_REST_HR", "60"))
+TRIMP_SEX = _trimp_sex(os.environ.get("RUN_TRIMP_SEX", "male"))
+THRESHOLD_PACE = float(os.environ.get("RUN_THRESHOLD_PACE", "5.0"))
+FTP_W = float(os.environ.get("RUN_FTP_W", "250"))
+
+# Settings the stored metrics depend on; summaries computed with other
+# settings are computed again
+PHYSIOLOGY_SETTINGS = {
+    "max_hr": MAX_HR,
+    "rest_hr": REST_HR,
+    "trimp_sex": TRIMP_SEX,
+    "threshold_pace": THRESHOLD_PACE,
+    "ftp_w": FTP_W,
+}
+
+# Lower bounds of zones 1-5: heart rate as fractions of MAX_HR, speed as
+# fractions of the threshold speed, power as fractions of FTP
+HR_ZONE_BOUNDS = (0.5, 0.6, 0.7, 0.8, 0.9)
+PACE_ZONE_BOUNDS = (0.7, 0.8, 0.9, 0.97, 1.03)
+POWER_ZONE_BOUNDS = (0.65, 0.8, 0.9, 1.0, 1.15)
+
+# Longer gaps between samples (pauses) count as no time
+MAX_SAMPLE_GAP_S = 10.0
+
+# Shortest half of a run for decoupling and heart-rate drift
+MIN_DECOUPLING_HALF_S = 600.0
+
+
+def _run_ids(offsets: np.ndarray) -> np.ndarray:
+    """Run index of every sample."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def _single(n: int) -> np.ndarray:
+    """Offsets of a single run of n samples."""
+    return np.array([0, n], dtype=np.int64)
+
+
+def threshold_speed(threshold_pace: float = THRESHOLD_PACE) -> float:
+    """Speed in m/s of a pace in min/km."""
+    return 1000.0 / (threshold_pace * 60.0)
+
+
+def sample_seconds(timestamps: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Time each sample stands for: the time until the next sample of its run.
+
+    The last sample of every run, samples next to a missing timestamp and
+    samples before a gap longer than MAX_SAMPLE_GAP_S count as 0 seconds.
+
+    Args:
+        timestamps: Concatenated datetime64 sample times
+        offsets: Run offsets
+
+    Returns:
+        float64 array of seconds, one per sample
+    """
+    t = timestamps.astype("datetime64[ms]")
+    seconds = t.astype(np.int64).astype(np.float64) / 1000
+    seconds[np.isnat(t)] = np.nan
+    dt = np.zeros(len(seconds))
+    dt[:-1] = np.diff(seconds)
+    ends = offsets[1:][np.diff(offsets) > 0] - 1
+    dt[ends] = 0.0
+    dt[~(np.isfinite(dt) & (dt >= 0) & (dt <= MAX_SAMPLE_GAP_S))] = 0.0
+    return dt
+
+
+def segmented_zone_seconds(
+    values: np.ndarray,
+    seconds: np.ndarray,
+    thresholds: Sequence[float],
+    offsets: np.ndarray,
+) -> np.ndarray:
+    """
+    Time each run spends in each zone, with one bincount over all runs.
+
+    Args:
+        values: Concatenated sample values (heart rate, speed, power)
+        seconds: Time of every sample (see :func:`sample_seconds`)
+        thresholds: Ascending lower bounds of zones 1, 2, ...
+        offsets: Run offsets
+
+    Returns:
+        Array of shape (runs, len(thresholds) + 1): seconds below zone 1,
+        then in zones 1 to len(thresholds); samples without a value are
+        not counted
+    """
+    n_runs, n_zones = len(offsets) - 1, len(thresholds) + 1
+    known = np.isfinite(values)
+    zones = np.searchsorted(np.asarray(thresholds, dtype=np.float64), values[known], side="right")
+    bins = _run_ids(offsets)[known] * n_zones + zones
+    return np.bincount(bins, weights=seconds[known], minlength=n_runs * n_zones).reshape(n_runs, n_zones)
+
+
+def segmented_trimp(
+    hr: np.ndarray,
+    seconds: np.ndarray,
+    offsets: np.ndarray,
+    rest_hr: float = REST_HR,
+    max_hr: float = MAX_HR,
+    sex: str = TRIMP_SEX,
+) -> np.ndarray:
+    """
+    Banister TRIMP of every run.
+
+    Args:
+        hr: Concatenated heart rate in bpm
+        seconds: Time of every sample (see :func:`sample_seconds`)
+        offsets: Run offsets
+        rest_hr: Resting heart rate
+        max_hr: Maximum heart rate
+        sex: 'male' or 'female' (key of TRIMP_WEIGHTS)
+
+    Returns:
+        float64 array with the TRIMP of every run (0 without heart rate)
+    """
+    if sex not in TRIMP_WEIGHTS:
+        raise ValueError(f"Unknown TRIMP weighting: {sex}")
+    a, b = TRIMP_WEIGHTS[sex]
+    reserve = np.clip((hr - rest_hr) / (max_hr - rest_hr), 0.0, 1.0)
+    known = np.isfinite(reserve)
+    load = seconds[known] / 60 * reserve[known] * a * np.exp(b * reserve[known])
+    return np.bincount(_run_ids(offsets)[known], weights=load, minlength=len(offsets) - 1)
+
+
+def segmented_decoupling(
+    hr: np.ndarray,
+    output: np.ndarray,
+    seconds: np.ndarray,
+    offsets: np.ndarray,
+    min_half_s: float = MIN_DECOUPLING_HALF_S,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aerobic decoupling and heart-rate drift between the halves of every run.
+
+    Only samples with both heart rate and output are used; each run's time
+    over those samples is split into a first and a second half. Efficiency
+    is the time-weighted mean output per mean heart rate of a half.
+
+    Args:
+        hr: Concatenated heart rate in bpm
+        output: Concatenated speed (Pa:HR) or power (Pw:HR)
+        seconds: Time of every sample (see :func:`sample_seconds`)
+        offsets: Run offsets
+        min_half_s: Shortest half; shorter runs get NaN
+
+    Returns:
+        (decoupling_pct, hr_drift_pct) arrays: the efficiency loss from
+        the first to the second half, and the heart-rate rise, in percent
+    """
+    n_runs = len(offsets) - 1
+    runs = _run_ids(offsets)
+    used = np.isfinite(hr) & np.isfinite(output) & (seconds > 0)
+    weight = np.where(used, seconds, 0.0)
+
+    # Counted time before every sample within its run
+    elapsed = np.cumsum(weight) - weight
+    elapsed -= np.concatenate(([0.0], np.cumsum(weight)))[offsets[:-1]][runs]
+    total = np.bincount(runs, weights=weight, minlength=n_runs)
+    halves = runs * 2 + (elapsed >= total[runs] / 2)
+
+    time = np.bincount(halves, weights=weight, minlength=2 * n_runs).reshape(n_runs, 2)
+    hr_sum = np.bincount(halves, weights=np.where(used, hr, 0.0) * weight, minlength=2 * n_runs).reshape(n_runs, 2)
+    out_sum = np.bincount(halves, weights=np.where(used, output, 0.0) * weight, minlength=2 * n_runs).reshape(n_runs, 2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_hr = hr_sum / time
+        efficiency = out_sum / hr_sum
+        valid = (time >= min_half_s).all(axis=1) & (efficiency[:, 0] > 0)
+        decoupling = np.where(valid, (efficiency[:, 0] - efficiency[:, 1]) / efficiency[:, 0] * 100, np.nan)
+        drift = np.where(valid, (mean_hr[:, 1] - mean_hr[:, 0]) / mean_hr[:, 0] * 100, np.nan)
+    return decoupling, drift
+
+
+def speed_values(df: pd.DataFrame) -> np.ndarray:
+    """
+    Speed of every sample in m/s.
+
+    Uses the recorded speed_m_s column, or the distance covered since the
+    previous sample when a run has no recorded speed (e.g. TCX files).
+    """
+    if "speed_m_s" in df:
+        speed = float_values(df["speed_m_s"])
+        if np.isfinite(speed).any():
+            return speed
+    if "distance_m" not in df or "timestamp" not in df:
+        return np.full(len(df), np.nan)
+    offsets = _single(len(df))
+    dt = step_diff(datetime_values(df["timestamp"]), offsets)
+    dd = step_diff(float_values(df["distance_m"]), offsets)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(dt > 0, dd / dt, np.nan)
+
+
+def hr_zone_seconds(timestamps, hr, max_hr: float = MAX_HR, bounds: Sequence[float] = HR_ZONE_BOUNDS) -> np.ndarray:
+    """
+    Time a single run spends in each heart-rate zone.
+
+    Args:
+        timestamps: Sample times (datetime64 array or Series)
+        hr: Heart rate in bpm
+        max_hr: Maximum heart rate
+        bounds: Lower bound of every zone as a fraction of ``max_hr``
+
+    Returns:
+        float64 array of ``len(bounds) + 1`` seconds: below zone 1, then
+        zones 1 to ``len(bounds)``
+    """
+    t = datetime_values(timestamps) if isinstance(timestamps, pd.Series) else np.asarray(timestamps)
+    hr = float_values(hr) if isinstance(hr, pd.Series) else np.asarray(hr, dtype=np.float64)
+    offsets = _single(len(hr))
+    return segmented_zone_seconds(hr, sample_seconds(t, offsets), np.asarray(bounds) * max_hr, offsets)[0]
+
+
+def physiology_metrics(frames: Sequence[pd.DataFrame]) -> Dict[str, np.ndarray]:
+    """
+    Physiological metrics of several runs, computed in one batch.
+
+    Args:
+        frames: Run DataFrames with timestamp, hr_bpm, speed_m_s (or
+            distance_m) and power_w columns, where recorded
+
+    Returns:
+        Dictionary of per-run arrays: avg_hr, hr_s (seconds with a heart
+        rate), hr_zone_s, pace_zone_s and power_zone_s (runs x zones 1-5),
+        trimp, decoupling_pct and hr_drift_pct
+    """
+    offsets = np.concatenate(([0], np.cumsum([len(df) for df in frames], dtype=np.int64)))
+
+    def column(df, name):
+        return float_values(df[name]) if name in df else np.full(len(df), np.nan)
+
+    def times(df):
+        if "timestamp" not in df:
+            return np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ms]")
+        return datetime_values(df["timestamp"]).astype("datetime64[ms]")
+
+    if frames:
+        timestamps = np.concatenate([times(df) for df in frames])
+        hr = np.concatenate([column(df, "hr_bpm") for df in frames])
+        speed = np.concatenate([speed_values(df) for df in frames])
+        power = np.concatenate([column(df, "power_w") for df in frames])
+    else:
+        timestamps = np.array([], dtype="datetime64[ms]")
+        hr = speed = power = np.array([], dtype=np.float64)
+
+    seconds = sample_seconds(timestamps, offsets)
+    hr_zones = segmented_zone_seconds(hr, seconds, np.asarray(HR_ZONE_BOUNDS) * MAX_HR, offsets)
+    pace_zones = segmented_zone_seconds(speed, seconds, np.asarray(PACE_ZONE_BOUNDS) * threshold_speed(), offsets)
+    power_zones = segmented_zone_seconds(power, seconds, np.asarray(POWER_ZONE_BOUNDS) * FTP_W, offsets)
+    decoupling, drift = segmented_decoupling(hr, speed, seconds, offsets)
+
+    runs = _run_ids(offsets)
+    known = np.isfinite(hr)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_hr = (
+            np.bincount(runs[known], weights=hr[known], minlength=len(frames))
+            / np.bincount(runs[known], minlength=len(frames))
+        )
+    return {
+        "avg_hr": avg_hr,
+        "hr_s": hr_zones.sum(axis=1),
+        "hr_zone_s": hr_zones[:, 1:],
+        "pace_zone_s": pace_zones[:, 1:],
+        "power_zone_s": power_zones[:, 1:],
+        "trimp": segmented_trimp(hr, seconds, offsets),
+        "decoupling_pct": decoupling,
+        "hr_drift_pct": drift,
+    }
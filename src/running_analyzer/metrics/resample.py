@@ -0,0 +1,127 @@
+"""
+Resampling of runs onto a common elapsed-time or distance grid.
+
+Runs recorded at different intervals (1 s smart recording, 5 s, ...) only
+line up when they are compared over the same axis. Each run's samples are
+binned by elapsed time or distance from the start, every bin holding the
+mean of its samples; bins without samples are interpolated from their
+neighbours. Like the batch engine, all runs are concatenated and binned
+with a single ``np.bincount`` per column.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from running_analyzer.metrics.batch import datetime_values, float_values
+
+# Alignment axis -> (output column, grid step, divisor from seconds/meters to the output unit)
+ALIGN_AXES = {
+    "time": ("elapsed_min", 10.0, 60.0),
+    "distance": ("distance_km", 50.0, 1000.0),
+}
+
+
+def axis_values(df: pd.DataFrame, axis: str) -> np.ndarray:
+    """
+    Position of every sample along an alignment axis.
+
+    Args:
+        df: Run DataFrame with timestamp (``time``) or distance_m
+            (``distance``) column
+        axis: 'time' (seconds since the first sample) or 'distance' (meters
+            since the first sample with a distance)
+
+    Returns:
+        float64 array, NaN where the position is unknown
+    """
+    if axis == "time":
+        timestamps = datetime_values(df["timestamp"]).astype("datetime64[ms]")
+        known = ~np.isnat(timestamps)
+        if not known.any():
+            return np.full(len(df), np.nan)
+        seconds = (timestamps - timestamps[known][0]).astype(np.float64) / 1000
+        seconds[~known] = np.nan
+        return seconds
+    if axis == "distance":
+        if "distance_m" not in df:
+            return np.full(len(df), np.nan)
+        distance = float_values(df["distance_m"])
+        known = np.isfinite(distance)
+        return distance - distance[known][0] if known.any() else distance
+    raise ValueError(f"Unknown alignment axis: {axis}")
+
+
+def resample_runs(
+    frames: Sequence[pd.DataFrame],
+    columns: Sequence[str],
+    axis: str = "time",
+    step: Optional[float] = None,
+) -> List[pd.DataFrame]:
+    """
+    Resample runs onto a common grid along an alignment axis.
+
+    Bin ``k`` of a run covers ``[k * step, (k + 1) * step)`` and is reported
+    at its center. Bins run from the start to the last sample of each run;
+    samples with an unknown position or NaN values are ignored, and a bin
+    whose samples are all NaN stays NaN so gaps in a recording stay visible.
+
+    Args:
+        frames: Run DataFrames
+        columns: Columns to resample; columns a run lacks are all NaN
+        axis: Alignment axis, a key of ALIGN_AXES
+        step: Grid step in seconds or meters (default: from ALIGN_AXES)
+
+    Returns:
+        One DataFrame per run with the axis column from ALIGN_AXES (in
+        minutes or kilometers) followed by ``columns``
+    """
+    if axis not in ALIGN_AXES:
+        raise ValueError(f"Unknown alignment axis: {axis}")
+    x_column, default_step, divisor = ALIGN_AXES[axis]
+    step = default_step if step is None else float(step)
+    if step <= 0:
+        raise ValueError("step must be positive")
+
+    # Global bin id of every sample: run i's bins follow those of run i - 1
+    positions = [axis_values(df, axis) for df in frames]
+    bins, counts = [], []
+    for x in positions:
+        local = np.floor(x[np.isfinite(x) & (x >= 0)] / step).astype(np.int64)
+        bins.append(local)
+        counts.append(int(local.max()) + 1 if len(local) else 0)
+    first_bin = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+    total = int(first_bin[-1])
+    ids = np.concatenate([b + first for b, first in zip(bins, first_bin[:-1])]) if frames else np.array([], dtype=np.int64)
+
+    # Bins no sample falls into (gaps between sparse samples) are filled in
+    # linearly from the nearest occupied bins on either side. Each run's
+    # first and last bins hold samples, so these never lie in another run
+    occupied = np.bincount(ids, minlength=total) > 0
+    occupied_ids = np.flatnonzero(occupied)
+    gaps = np.flatnonzero(~occupied)
+    after = np.searchsorted(occupied_ids, gaps)
+    lo, hi = occupied_ids[after - 1], occupied_ids[np.minimum(after, len(occupied_ids) - 1)]
+    weight = (gaps - lo) / np.maximum(hi - lo, 1)
+
+    filled: Dict[str, np.ndarray] = {}
+    for column in columns:
+        values = np.concatenate([
+            float_values(df[column])[np.isfinite(x) & (x >= 0)] if column in df else np.full(len(b), np.nan)
+            for df, x, b in zip(frames, positions, bins)
+        ]) if frames else np.array([])
+        finite = np.isfinite(values)
+        sums = np.bincount(ids[finite], weights=values[finite], minlength=total)
+        n = np.bincount(ids[finite], minlength=total)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / n
+        means[gaps] = means[lo] + weight * (means[hi] - means[lo])
+        filled[column] = means
+
+    out = []
+    for i, count in enumerate(counts):
+        part = slice(first_bin[i], first_bin[i + 1])
+        grid = (np.arange(count) + 0.5) * step / divisor
+        out.append(pd.DataFrame({x_column: grid, **{column: filled[column][part] for column in columns}}))
+    return out
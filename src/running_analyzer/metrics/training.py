@@ -0,0 +1,344 @@
+"""
+Long-term training load: per-run training summaries and rollup tables.
+
+Comparing runs needs their samples; trends over years of history should
+not. :func:`training_summaries` condenses the samples of runs once, at
+ingest, into a few numbers (average heart rate, time in heart-rate, pace
+and power zones, TRIMP, decoupling) that are stored with the run summary
+in the run cache.
+:class:`TrainingRollups` folds those summaries into daily, weekly and
+monthly totals. Adding, replacing or removing a run only updates the
+three periods it falls into, so trend queries over thousands of runs read
+tables of a few thousand rows at most.
+"""
+
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from running_analyzer.metrics.physiology import HR_ZONE_BOUNDS, PHYSIOLOGY_SETTINGS, physiology_metrics
+
+ROLLUP_PERIODS = ("day", "week", "month")
+
+# Zone kind -> prefix of its rollup fields
+ZONE_KINDS = {"hr": "z", "pace": "pz", "power": "wz"}
+
+# Frames summarized per batch at ingest, bounding the concatenated buffers
+SUMMARY_BATCH_RUNS = 64
+
+# Totals kept per period; hr_sum is the average HR times hr_s of each run,
+# decoupling_sum / decoupling_runs the mean decoupling of the runs with one
+ROLLUP_FIELDS = (
+    "runs",
+    "distance_km",
+    "duration_s",
+    "hr_s",
+    "hr_sum",
+    "load",
+    "trimp",
+    "decoupling_sum",
+    "decoupling_runs",
+    *(f"{prefix}{i}_s" for prefix in ZONE_KINDS.values() for i in range(1, len(HR_ZONE_BOUNDS) + 1)),
+)
+
+
+def edwards_load(zone_seconds: Sequence[float]) -> float:
+    """
+    Edwards training load: minutes in each zone weighted by the zone number.
+
+    Args:
+        zone_seconds: Seconds in zones 1, 2, ...
+
+    Returns:
+        Load in zone-weighted minutes
+    """
+    return float(sum((i + 1) * s / 60 for i, s in enumerate(zone_seconds)))
+
+
+def training_summaries(frames: Sequence[pd.DataFrame]) -> List[Dict[str, object]]:
+    """
+    JSON-serializable training summaries of several runs' samples.
+
+    The physiological metrics (see :func:`physiology_metrics`) are computed
+    in batches of SUMMARY_BATCH_RUNS runs.
+
+    Args:
+        frames: Run DataFrames
+
+    Returns:
+        One dictionary per run with settings (PHYSIOLOGY_SETTINGS), avg_hr
+        (None without heart rate), hr_s (seconds with a heart rate),
+        hr_zone_s, pace_zone_s and power_zone_s (seconds in zones 1-5),
+        trimp, and decoupling_pct and hr_drift_pct (None for short runs or
+        without heart rate)
+    """
+    summaries: List[Dict[str, object]] = []
+    for start in range(0, len(frames), SUMMARY_BATCH_RUNS):
+        chunk = frames[start:start + SUMMARY_BATCH_RUNS]
+        metrics = physiology_metrics(chunk)
+        for i in range(len(chunk)):
+            summaries.append({
+                "settings": dict(PHYSIOLOGY_SETTINGS),
+                "avg_hr": _rounded(metrics["avg_hr"][i], 2),
+                "hr_s": round(float(metrics["hr_s"][i]), 1),
+                "hr_zone_s": [round(float(v), 1) for v in metrics["hr_zone_s"][i]],
+                "pace_zone_s": [round(float(v), 1) for v in metrics["pace_zone_s"][i]],
+                "power_zone_s": [round(float(v), 1) for v in metrics["power_zone_s"][i]],
+                "trimp": round(float(metrics["trimp"][i]), 2),
+                "decoupling_pct": _rounded(metrics["decoupling_pct"][i], 2),
+                "hr_drift_pct": _rounded(metrics["hr_drift_pct"][i], 2),
+            })
+    return summaries
+
+
+def training_summary(df: pd.DataFrame) -> Dict[str, object]:
+    """Training summary of a single run (see :func:`training_summaries`)."""
+    return training_summaries([df])[0]
+
+
+def _rounded(value: float, digits: int) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def _periods(start_time: str) -> Tuple[np.datetime64, ...]:
+    """Start of the day, week (Monday) and month of a run, in UTC."""
+    start = pd.Timestamp(start_time)
+    if start.tzinfo is not None:
+        start = start.tz_convert("UTC").tz_localize(None)
+    day = np.datetime64(start.date(), "D")
+    # 1970-01-01 was a Thursday
+    week = day - (day.astype(np.int64) + 3) % 7
+    month = day.astype("datetime64[M]").astype("datetime64[D]")
+    return day, week, month
+
+
+def _contribution(summary: Dict[str, object]) -> Optional[Tuple[Tuple[np.datetime64, ...], np.ndarray]]:
+    """Periods and totals vector of one run, or None without a start time."""
+    if not summary or not summary.get("start_time"):
+        return None
+    training = summary.get("training") or {}
+    zones = {kind: training.get(f"{kind}_zone_s") or [0.0] * len(HR_ZONE_BOUNDS) for kind in ZONE_KINDS}
+    avg_hr = training.get("avg_hr")
+    hr_s = float(training.get("hr_s") or 0.0) if avg_hr is not None else 0.0
+    decoupling = training.get("decoupling_pct")
+    values = np.array(
+        [
+            1.0,
+            float(summary.get("distance_km") or 0.0),
+            float(summary.get("duration_s") or 0.0),
+            hr_s,
+            (avg_hr or 0.0) * hr_s,
+            edwards_load(zones["hr"]),
+            float(training.get("trimp") or 0.0),
+            decoupling or 0.0,
+            float(decoupling is not None),
+            *(s for kind in ZONE_KINDS for s in zones[kind]),
+        ],
+        dtype=np.float64,
+    )
+    return _periods(summary["start_time"]), values
+
+
+def _trailing_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last ``window`` values (NaN before the first full window)."""
+    means = np.full(len(values), np.nan)
+    if len(values) >= window:
+        csum = np.concatenate(([0.0], np.cumsum(values)))
+        means[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return means
+
+
+class TrainingRollups:
+    """
+    Thread-safe daily, weekly and monthly training totals, updated incrementally.
+
+    Runs are folded in from their summary (see :func:`run_summary`), keyed
+    like in :class:`RunStore` by their source file. Weeks start on Monday
+    and periods follow the UTC start time of each run.
+    """
+
+    def __init__(self, runs: Optional[Iterable[Dict[str, object]]] = None):
+        """
+        Initialize the rollups.
+
+        Args:
+            runs: Initial run dictionaries with a 'summary'
+        """
+        self._lock = threading.Lock()
+        self._folded: Dict[Hashable, Tuple[Tuple[np.datetime64, ...], np.ndarray]] = {}
+        self._totals: Dict[str, Dict[np.datetime64, np.ndarray]] = {period: {} for period in ROLLUP_PERIODS}
+        self._tables: Dict[Hashable, pd.DataFrame] = {}
+        self.version = 0
+        if runs:
+            self.update(runs)
+
+    @staticmethod
+    def _key(run: Dict[str, object]) -> str:
+        return str(run.get("path") or run["name"])
+
+    def __len__(self) -> int:
+        return len(self._folded)
+
+    def _fold(self, key: Hashable, contribution, sign: float) -> None:
+        periods, values = contribution
+        for period, start in zip(ROLLUP_PERIODS, periods):
+            totals = self._totals[period]
+            total = totals.get(start)
+            total = values * sign if total is None else total + values * sign
+            if total[0] < 0.5:
+                totals.pop(start, None)
+            else:
+                totals[start] = total
+        if sign > 0:
+            self._folded[key] = contribution
+        else:
+            del self._folded[key]
+
+    def update(self, added: Iterable[Dict[str, object]] = (), removed: Iterable[str] = ()) -> int:
+        """
+        Fold new or changed runs in and take removed runs out.
+
+        Runs whose summary is unchanged since they were folded in are
+        skipped, so the whole store can be passed after each change. Runs
+        without a summary or a start time are left out.
+
+        Args:
+            added: Run dictionaries to add or replace
+            removed: Source paths (or names) of runs to take out
+
+        Returns:
+            Number of runs folded in or taken out
+        """
+        changed = 0
+        with self._lock:
+            for key in removed:
+                if str(key) in self._folded:
+                    self._fold(str(key), self._folded[str(key)], -1.0)
+                    changed += 1
+            for run in added:
+                key = self._key(run)
+                contribution = _contribution(run.get("summary"))
+                old = self._folded.get(key)
+                if old is not None:
+                    if contribution is not None and old[0] == contribution[0] and np.array_equal(old[1], contribution[1]):
+                        continue
+                    self._fold(key, old, -1.0)
+                    changed += 1
+                if contribution is not None:
+                    self._fold(key, contribution, 1.0)
+                    changed += 1
+            if changed:
+                self._tables = {}
+                self.version += 1
+        return changed
+
+    def table(self, period: str = "week") -> pd.DataFrame:
+        """
+        Totals per period, for the periods with at least one run.
+
+        The returned frame is shared between callers and must not be
+        modified.
+
+        Args:
+            period: 'day', 'week' or 'month'
+
+        Returns:
+            DataFrame with the period start, the ROLLUP_FIELDS totals, and
+            avg_hr, pace_min_per_km and decoupling_pct (the mean decoupling
+            of its runs; NaN without heart rate, distance or decoupling)
+        """
+        if period not in ROLLUP_PERIODS:
+            raise ValueError(f"Unknown rollup period: {period}")
+        with self._lock:
+            table = self._tables.get(period)
+            if table is not None:
+                return table
+            totals = self._totals[period]
+            starts = sorted(totals)
+            values = np.array([totals[s] for s in starts]).reshape(len(starts), len(ROLLUP_FIELDS))
+            tables = self._tables
+
+        table = pd.DataFrame(values, columns=list(ROLLUP_FIELDS))
+        table.insert(0, "start", np.array(starts, dtype="datetime64[D]").astype("datetime64[s]"))
+        table["runs"] = np.rint(table["runs"]).astype(np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table["avg_hr"] = np.where(values[:, 3] > 0, values[:, 4] / values[:, 3], np.nan)
+            table["pace_min_per_km"] = np.where(values[:, 1] > 0, values[:, 2] / 60 / values[:, 1], np.nan)
+            table["decoupling_pct"] = np.where(values[:, 8] > 0, values[:, 7] / values[:, 8], np.nan)
+        # A concurrent update replaced the tables; this one is only returned
+        tables.setdefault(period, table)
+        return table
+
+    def acwr(self, acute_days: int = 7, chronic_days: int = 28, column: str = "load") -> pd.DataFrame:
+        """
+        Daily acute:chronic workload ratio of the Edwards load or TRIMP.
+
+        The acute and chronic loads are the mean daily load over the last
+        ``acute_days`` and ``chronic_days`` days (rest days count as 0).
+
+        Args:
+            acute_days: Acute window in days
+            chronic_days: Chronic window in days
+            column: Daily load, 'load' (Edwards) or 'trimp'
+
+        Returns:
+            DataFrame with one row per day from the first to the last run:
+            date, load, acute, chronic and acwr (NaN until a full chronic
+            window, or without chronic load)
+        """
+        if column not in ("load", "trimp"):
+            raise ValueError(f"Unknown load column: {column}")
+        with self._lock:
+            tables = self._tables
+        cached = tables.get(("acwr", acute_days, chronic_days, column))
+        if cached is not None:
+            return cached
+
+        daily = self.table("day")
+        if daily.empty:
+            days = np.array([], dtype="datetime64[D]")
+            load = np.array([], dtype=np.float64)
+        else:
+            first = daily["start"].to_numpy().astype("datetime64[D]")
+            days = np.arange(first[0], first[-1] + 1, dtype="datetime64[D]")
+            load = np.zeros(len(days))
+            load[(first - first[0]).astype(np.int64)] = daily[column].to_numpy()
+
+        acute = _trailing_mean(load, acute_days)
+        chronic = _trailing_mean(load, chronic_days)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.where(chronic > 0, acute / chronic, np.nan)
+        result = pd.DataFrame({
+            "date": days.astype("datetime64[s]"),
+            "load": load,
+            "acute": acute,
+            "chronic": chronic,
+            "acwr": ratio,
+        })
+        tables.setdefault(("acwr", acute_days, chronic_days, column), result)
+        return result
+
+    def zone_shares(self, period: str = "week", kind: str = "hr") -> pd.DataFrame:
+        """
+        Share of the time in zones spent in each zone, per period.
+
+        Args:
+            period: 'day', 'week' or 'month'
+            kind: 'hr', 'pace' or 'power' zones
+
+        Returns:
+            DataFrame with the period start and the fractions of the time in
+            zones 1-5, named like the fields without '_s' (z1.., pz1..,
+            wz1..; NaN for periods without time in zones)
+        """
+        if kind not in ZONE_KINDS:
+            raise ValueError(f"Unknown zone kind: {kind}")
+        table = self.table(period)
+        zones: List[str] = [f"{ZONE_KINDS[kind]}{i}_s" for i in range(1, len(HR_ZONE_BOUNDS) + 1)]
+        seconds = table[zones].to_numpy()
+        total = seconds.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shares = np.where(total > 0, seconds / total, np.nan)
+        return pd.DataFrame({"start": table["start"], **{z[:-2]: shares[:, i] for i, z in enumerate(zones)}})
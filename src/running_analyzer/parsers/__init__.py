@@ -2,12 +2,33 @@
 Parsers module for FIT and TCX file parsing.
 """
 
+from running_analyzer.parsers.fit_decoder import FitDecodeError, decode_fit_records
 from running_analyzer.parsers.fit_parser import (
+    PARSER_VERSION,
+    is_fit_file,
     load_fit_to_df,
+    load_fit_to_df_reference,
+    parse_activity,
     parse_tcx,
+    parse_tcx_reference,
 )
+from running_analyzer.parsers.normalize import downcast, normalize_columns, source_fields
+from running_analyzer.parsers.tcx_parser import iter_tcx_chunks, read_tcx, read_tcx_columns
 
 __all__ = [
+    'FitDecodeError',
+    'decode_fit_records',
+    'PARSER_VERSION',
+    'is_fit_file',
     'load_fit_to_df',
+    'load_fit_to_df_reference',
+    'parse_activity',
     'parse_tcx',
+    'parse_tcx_reference',
+    'downcast',
+    'normalize_columns',
+    'source_fields',
+    'iter_tcx_chunks',
+    'read_tcx',
+    'read_tcx_columns',
 ]
@@ -0,0 +1,397 @@
+"""
+Vectorized decoder for FIT ``record`` messages.
+
+The file is scanned once to follow message headers, remembering where each
+record message starts. Records sharing a definition have a fixed layout, so
+they are then decoded together through a NumPy structured dtype built from
+the definition message, and scattered into preallocated column arrays.
+
+Field names, scales and offsets follow the FIT profile (and fitparse, which
+remains the reference implementation). Array, string and enum fields are
+skipped; fields missing from the profile table are named ``unknown_<num>``
+and developer fields take the name from their field description.
+"""
+
+from pathlib import Path
+from typing import Collection, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+RECORD_MESG_NUM = 20
+FIELD_DESCRIPTION_MESG_NUM = 206
+TIMESTAMP_FIELD_NUM = 253
+
+# Seconds between the Unix epoch and the FIT epoch (1989-12-31 00:00 UTC)
+FIT_EPOCH_OFFSET_S = 631065600
+
+# FIT base type number -> (NumPy type code, invalid value); None means NaN
+BASE_TYPES = {
+    0x00: ("u1", 0xFF),
+    0x01: ("i1", 0x7F),
+    0x02: ("u1", 0xFF),
+    0x03: ("i2", 0x7FFF),
+    0x04: ("u2", 0xFFFF),
+    0x05: ("i4", 0x7FFFFFFF),
+    0x06: ("u4", 0xFFFFFFFF),
+    0x08: ("f4", None),
+    0x09: ("f8", None),
+    0x0A: ("u1", 0),
+    0x0B: ("u2", 0),
+    0x0C: ("u4", 0),
+    0x0D: ("u1", 0xFF),
+    0x0E: ("i8", 0x7FFFFFFFFFFFFFFF),
+    0x0F: ("u8", 0xFFFFFFFFFFFFFFFF),
+    0x10: ("u8", 0),
+}
+
+# Record field number -> (name, scale, offset)
+RECORD_FIELDS = {
+    0: ("position_lat", 1, 0),
+    1: ("position_long", 1, 0),
+    2: ("altitude", 5, 500),
+    3: ("heart_rate", 1, 0),
+    4: ("cadence", 1, 0),
+    5: ("distance", 100, 0),
+    6: ("speed", 1000, 0),
+    7: ("power", 1, 0),
+    9: ("grade", 100, 0),
+    10: ("resistance", 1, 0),
+    11: ("time_from_course", 1000, 0),
+    12: ("cycle_length", 100, 0),
+    13: ("temperature", 1, 0),
+    17: ("speed_1s", 16, 0),
+    19: ("total_cycles", 1, 0),
+    29: ("accumulated_power", 1, 0),
+    31: ("gps_accuracy", 1, 0),
+    32: ("vertical_speed", 1000, 0),
+    33: ("calories", 1, 0),
+    39: ("vertical_oscillation", 10, 0),
+    40: ("stance_time_percent", 100, 0),
+    41: ("stance_time", 10, 0),
+    43: ("left_torque_effectiveness", 2, 0),
+    44: ("right_torque_effectiveness", 2, 0),
+    45: ("left_pedal_smoothness", 2, 0),
+    46: ("right_pedal_smoothness", 2, 0),
+    47: ("combined_pedal_smoothness", 2, 0),
+    48: ("time128", 128, 0),
+    50: ("zone", 1, 0),
+    51: ("ball_speed", 100, 0),
+    52: ("cadence256", 256, 0),
+    53: ("fractional_cadence", 128, 0),
+    54: ("total_hemoglobin_conc", 100, 0),
+    55: ("total_hemoglobin_conc_min", 100, 0),
+    56: ("total_hemoglobin_conc_max", 100, 0),
+    57: ("saturated_hemoglobin_percent", 10, 0),
+    58: ("saturated_hemoglobin_percent_min", 10, 0),
+    59: ("saturated_hemoglobin_percent_max", 10, 0),
+    67: ("left_pco", 1, 0),
+    68: ("right_pco", 1, 0),
+    69: ("left_power_phase", 0.7111111, 0),
+    70: ("left_power_phase_peak", 0.7111111, 0),
+    71: ("right_power_phase", 0.7111111, 0),
+    72: ("right_power_phase_peak", 0.7111111, 0),
+    73: ("enhanced_speed", 1000, 0),
+    78: ("enhanced_altitude", 5, 500),
+    81: ("battery_soc", 2, 0),
+    82: ("motor_power", 1, 0),
+    83: ("vertical_ratio", 100, 0),
+    84: ("stance_time_balance", 100, 0),
+    85: ("step_length", 10, 0),
+    91: ("absolute_pressure", 1, 0),
+    92: ("depth", 1000, 0),
+    93: ("next_stop_depth", 1000, 0),
+    94: ("next_stop_time", 1, 0),
+    95: ("time_to_surface", 1, 0),
+    96: ("ndl_time", 1, 0),
+    97: ("cns_load", 1, 0),
+    98: ("n2_load", 1, 0),
+    TIMESTAMP_FIELD_NUM: ("timestamp", 1, 0),
+}
+
+# Profile fields that need enum lookups or bit unpacking; not decoded here
+SKIPPED_RECORD_FIELDS = {8, 18, 28, 30, 42, 49, 62}
+
+# Fields whose value is also reported under their enhanced name
+RECORD_COMPONENTS = {"altitude": "enhanced_altitude", "speed": "enhanced_speed"}
+
+
+class FitDecodeError(ValueError):
+    """Raised when a file is not a readable FIT file."""
+
+
+class _Definition:
+    """Layout of one local message type, as announced by a definition message."""
+
+    def __init__(self, global_num, byteorder, fields, dev_fields):
+        self.global_num = global_num
+        self.byteorder = byteorder
+        self.fields = fields
+        self.dev_fields = dev_fields
+        self.size = sum(size for _, size, _ in fields) + sum(size for _, size, _ in dev_fields)
+
+        self.timestamp_offset = None
+        offset = 0
+        for num, size, _ in fields:
+            if num == TIMESTAMP_FIELD_NUM and size == 4:
+                self.timestamp_offset = offset
+            offset += size
+
+        self.starts: List[int] = []
+        self.rows: List[int] = []
+
+
+def _read_source(source: Union[str, Path, bytes, bytearray, memoryview]) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def _decode_field_description(data: bytes, pos: int, definition: _Definition) -> Optional[Tuple]:
+    """Decode a field_description message into (dev index, field num, base type, name)."""
+    values = {}
+    for num, size, base in definition.fields:
+        raw = data[pos:pos + size]
+        pos += size
+        if num in (0, 1, 2) and size >= 1:
+            values[num] = raw[0]
+        elif num == 3:
+            values[num] = raw.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+    if 0 not in values or 1 not in values or 2 not in values:
+        return None
+    return values[0], values[1], values[2] & 0x1F, values.get(3)
+
+
+def _truncated(start: int, size: int, left: int) -> FitDecodeError:
+    """Error for a message starting at byte ``start`` that needs more bytes than are left."""
+    return FitDecodeError(f"truncated record at byte {start}: needs {size} more bytes, {left} left")
+
+
+def _scan(data: bytes):
+    """
+    Walk every message header and index the record messages.
+
+    Raises:
+        FitDecodeError: If the data is not FIT, or a message runs past the
+            end of the data
+
+    Returns:
+        Tuple of (definitions holding record messages, number of records,
+        compressed-timestamp rows and values, developer field descriptions)
+    """
+    record_defs: List[_Definition] = []
+    n_rows = 0
+    compressed_rows: List[int] = []
+    compressed_values: List[int] = []
+    dev_descriptions: Dict[Tuple[int, int], Tuple[int, Optional[str]]] = {}
+
+    pos = 0
+    while pos + 12 <= len(data):
+        header_size = data[pos]
+        if data[pos + 8:pos + 12] != b".FIT" or header_size < 12:
+            if pos == 0:
+                raise FitDecodeError("Missing FIT header signature")
+            break
+        data_size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        end = min(pos + header_size + data_size, len(data))
+        pos += header_size
+
+        local_defs: Dict[int, _Definition] = {}
+        last_timestamp = None
+
+        while pos < end:
+            message_start = pos
+            header = data[pos]
+            pos += 1
+
+            if header & 0x80:
+                definition = local_defs.get((header >> 5) & 0x3)
+                if definition is None:
+                    raise FitDecodeError(f"Data message before its definition at byte {pos - 1}")
+                if pos + definition.size > end:
+                    raise _truncated(message_start, definition.size, end - pos)
+                if last_timestamp is not None:
+                    offset = header & 0x1F
+                    timestamp = (last_timestamp & ~0x1F) + offset
+                    if offset < (last_timestamp & 0x1F):
+                        timestamp += 0x20
+                    last_timestamp = timestamp
+                    if definition.global_num == RECORD_MESG_NUM:
+                        compressed_rows.append(n_rows)
+                        compressed_values.append(timestamp)
+
+            elif header & 0x40:
+                if pos + 5 > end:
+                    raise _truncated(message_start, 5, end - pos)
+                byteorder = "big" if data[pos + 1] else "little"
+                global_num = int.from_bytes(data[pos + 2:pos + 4], byteorder)
+                n_fields = data[pos + 4]
+                pos += 5
+                if pos + 3 * n_fields > end:
+                    raise _truncated(message_start, 3 * n_fields, end - pos)
+                fields = [tuple(data[pos + 3 * i:pos + 3 * i + 3]) for i in range(n_fields)]
+                pos += 3 * n_fields
+                dev_fields = []
+                if header & 0x20:
+                    if pos + 1 > end:
+                        raise _truncated(message_start, 1, end - pos)
+                    n_dev = data[pos]
+                    pos += 1
+                    if pos + 3 * n_dev > end:
+                        raise _truncated(message_start, 3 * n_dev, end - pos)
+                    dev_fields = [tuple(data[pos + 3 * i:pos + 3 * i + 3]) for i in range(n_dev)]
+                    pos += 3 * n_dev
+                definition = _Definition(global_num, byteorder, fields, dev_fields)
+                local_defs[header & 0x0F] = definition
+                if global_num == RECORD_MESG_NUM:
+                    record_defs.append(definition)
+                continue
+
+            else:
+                definition = local_defs.get(header & 0x0F)
+                if definition is None:
+                    raise FitDecodeError(f"Data message before its definition at byte {pos - 1}")
+                if pos + definition.size > end:
+                    raise _truncated(message_start, definition.size, end - pos)
+                if definition.timestamp_offset is not None:
+                    start = pos + definition.timestamp_offset
+                    value = int.from_bytes(data[start:start + 4], definition.byteorder)
+                    if value != 0xFFFFFFFF:
+                        last_timestamp = value
+                if definition.global_num == FIELD_DESCRIPTION_MESG_NUM:
+                    description = _decode_field_description(data, pos, definition)
+                    if description is not None:
+                        dev_index, field_num, base, name = description
+                        dev_descriptions[(dev_index, field_num)] = (base, name)
+
+            if definition.global_num == RECORD_MESG_NUM:
+                definition.starts.append(pos)
+                definition.rows.append(n_rows)
+                n_rows += 1
+            pos += definition.size
+
+        pos = end + 2  # skip the file CRC
+
+    return record_defs, n_rows, (compressed_rows, compressed_values), dev_descriptions
+
+
+def _layout(
+    definition: _Definition,
+    dev_descriptions,
+    fields: Optional[Collection[str]] = None,
+) -> Tuple[np.dtype, List[Tuple[str, str, float, float, object]]]:
+    """
+    Build a structured dtype for a definition plus per-field decoding info.
+
+    Fields whose column is not in ``fields`` (if given) are left out of the
+    dtype, so their bytes are never converted.
+
+    Returns:
+        Tuple of (structured dtype, list of (struct name, column name,
+        scale, offset, invalid value))
+    """
+    endian = ">" if definition.byteorder == "big" else "<"
+    names, formats, offsets, columns = [], [], [], []
+    offset = 0
+
+    def add(column, base, size, scale, value_offset):
+        if fields is not None and column not in fields:
+            return
+        base_type = BASE_TYPES.get(base & 0x1F)
+        if base_type is None or np.dtype(base_type[0]).itemsize != size:
+            return  # strings, byte arrays and array fields
+        key = f"f{len(names)}"
+        names.append(key)
+        formats.append(endian + base_type[0])
+        offsets.append(offset)
+        columns.append((key, column, scale, value_offset, base_type[1]))
+
+    for num, size, base in definition.fields:
+        if num not in SKIPPED_RECORD_FIELDS:
+            name, scale, value_offset = RECORD_FIELDS.get(num, (f"unknown_{num}", 1, 0))
+            add(name, base, size, scale, value_offset)
+        offset += size
+
+    for num, size, dev_index in definition.dev_fields:
+        description = dev_descriptions.get((dev_index, num))
+        if description is not None:
+            base, name = description
+            add(name or f"unknown_dev_{dev_index}_{num}", base, size, 1, 0)
+        offset += size
+
+    dtype = np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": definition.size})
+    return dtype, columns
+
+
+def decode_fit_records(source: Union[str, Path, bytes], fields: Optional[Collection[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Decode all ``record`` messages of a FIT file into column arrays.
+
+    Integer fields keep their FIT base type unless a value is invalid or
+    missing for some records, in which case the column becomes float64
+    with NaN. Scaled fields are float64 and timestamps datetime64[s] (UTC).
+
+    Args:
+        source: Path to FIT file, or its contents as bytes
+        fields: Field names to decode (profile or developer field names);
+            default: all fields
+
+    Returns:
+        Dictionary mapping field names to arrays of equal length
+    """
+    data = _read_source(source)
+    record_defs, n_rows, (compressed_rows, compressed_values), dev_descriptions = _scan(data)
+    buffer = np.frombuffer(data, dtype=np.uint8)
+
+    decoded: Dict[str, List[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]] = {}
+    for definition in record_defs:
+        if not definition.starts:
+            continue
+        dtype, columns = _layout(definition, dev_descriptions, fields)
+        starts = np.asarray(definition.starts, dtype=np.int64)
+        rows = np.asarray(definition.rows, dtype=np.int64)
+        messages = buffer[starts[:, None] + np.arange(definition.size)].view(dtype).ravel()
+
+        for key, column, scale, value_offset, invalid in columns:
+            raw = messages[key]
+            invalid_mask = np.isnan(raw) if invalid is None else raw == invalid
+            if scale != 1 or value_offset != 0:
+                values = raw / scale - value_offset
+            else:
+                values = raw
+            decoded.setdefault(column, []).append((rows, values, invalid_mask))
+
+    for base_name, enhanced_name in RECORD_COMPONENTS.items():
+        if base_name in decoded and enhanced_name not in decoded:
+            decoded[enhanced_name] = decoded[base_name]
+
+    out: Dict[str, np.ndarray] = {}
+    for column, parts in decoded.items():
+        covered = sum(len(rows) for rows, _, _ in parts)
+        has_gaps = covered < n_rows or any(mask.any() for _, _, mask in parts)
+        dtype = np.result_type(*(values.dtype for _, values, _ in parts))
+        if has_gaps:
+            dtype = np.result_type(dtype, np.float64)
+
+        array = np.full(n_rows, np.nan, dtype=dtype) if has_gaps else np.empty(n_rows, dtype=dtype)
+        for rows, values, mask in parts:
+            array[rows] = values
+            if has_gaps and mask.any():
+                array[rows[mask]] = np.nan
+        out[column] = array
+
+    timestamps = out.get("timestamp")
+    if compressed_rows:
+        if timestamps is None:
+            timestamps = np.full(n_rows, np.nan)
+        else:
+            timestamps = timestamps.astype(np.float64)
+        timestamps[np.asarray(compressed_rows)] = compressed_values
+    if timestamps is not None:
+        valid = ~np.isnan(timestamps) if timestamps.dtype.kind == "f" else np.ones(n_rows, dtype=bool)
+        seconds = np.where(valid, timestamps, 0).astype(np.int64) + FIT_EPOCH_OFFSET_S
+        stamps = seconds.astype("datetime64[s]")
+        stamps[~valid] = np.datetime64("NaT")
+        out["timestamp"] = stamps
+
+    return out
@@ -2,11 +2,41 @@
 FIT and TCX file parsers for running data.
 """
 
+import os
+
 import pandas as pd
 import numpy as np
 from fitparse import FitFile
 import xml.etree.ElementTree as ET
 
+from running_analyzer.parsers.fit_decoder import decode_fit_records
+from running_analyzer.parsers.normalize import normalize_columns, source_fields
+from running_analyzer.parsers.tcx_parser import read_tcx_columns
+
+# Bump whenever parser output changes so cached runs are re-decoded.
+PARSER_VERSION = 5
+
+
+def is_fit_file(path):
+    """
+    Check whether a file is a binary FIT file.
+
+    Garmin exports are often TCX documents saved with a ``.fit`` extension,
+    so the header signature is checked instead of trusting the suffix.
+
+    Args:
+        path: Path to activity file, or its contents as bytes
+
+    Returns:
+        True if the file starts with a FIT header
+    """
+    if isinstance(path, (bytes, bytearray, memoryview)):
+        header = bytes(path[:12])
+    else:
+        with open(path, "rb") as f:
+            header = f.read(12)
+    return len(header) == 12 and header[8:12] == b".FIT"
+
 
 def semicircles_to_degrees(x):
     """Convert Garmin semicircles to degrees."""
@@ -15,17 +45,9 @@ def semicircles_to_degrees(x):
     return x * (180 / 2**31)
 
 
-def load_fit_to_df(path):
-    """
-    Load FIT file and convert to DataFrame with full Garmin Running Dynamics.
-    
-    Args:
-        path: Path to FIT file
-        
-    Returns:
-        DataFrame with running data
-    """
-    fit = FitFile(path)
+def _read_records_fitparse(path):
+    """Read record messages with fitparse, one dict per message."""
+    fit = FitFile(os.fspath(path) if isinstance(path, os.PathLike) else path)
 
     records = []
     for record in fit.get_messages("record"):
@@ -34,46 +56,73 @@ def load_fit_to_df(path):
             data[field.name] = field.value
         records.append(data)
 
-    df = pd.DataFrame(records)
+    return pd.DataFrame(records)
 
-    # Convert GPS
-    if "position_lat" in df.columns:
-        df["latitude"] = df["position_lat"].apply(semicircles_to_degrees)
-    if "position_long" in df.columns:
-        df["longitude"] = df["position_long"].apply(semicircles_to_degrees)
 
-    # Normalize field names
-    df = df.rename(columns={
-        "timestamp": "timestamp",
-        "heart_rate": "hr_bpm",
-        "distance": "distance_m",
-        "speed": "speed_m_s",
-        "cadence": "cadence_spm",
-        "vertical_oscillation": "vertical_osc_mm",
-        "stance_time": "ground_contact_time_ms",
-        "stance_time_balance": "ground_contact_balance",
-        "temperature": "temperature_c",
-        "altitude": "elevation_m",
-        "power": "power_w"
-    })
+def load_fit_to_df(path, columns=None):
+    """
+    Load FIT file and convert to DataFrame with full Garmin Running Dynamics.
 
-    # Convert units
-    if "vertical_osc_mm" in df.columns:
-        df["vertical_osc_cm"] = df["vertical_osc_mm"] / 10
+    Record messages are decoded column-wise by
+    :func:`~running_analyzer.parsers.fit_decoder.decode_fit_records` and
+    normalized by :func:`~running_analyzer.parsers.normalize.normalize_columns`.
 
-    if "ground_contact_time_ms" in df.columns:
-        df["ground_contact_time_s"] = df["ground_contact_time_ms"] / 1000
+    Args:
+        path: Path to FIT file, or its contents as bytes
+        columns: Output columns to return (the timestamp is always
+            returned); fields feeding other columns are not decoded.
+            Default: all fields.
 
-    # Ensure timestamp is datetime
-    if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    Returns:
+        DataFrame with running data
+    """
+    if columns is None:
+        return normalize_columns(decode_fit_records(path))
+    return normalize_columns(decode_fit_records(path, fields=source_fields(columns)), keep=columns)
 
-    return df
 
+def load_fit_to_df_reference(path):
+    """
+    Load FIT file through fitparse.
 
-def parse_tcx(filepath):
+    Slow reference implementation of :func:`load_fit_to_df`, kept for
+    equivalence tests and benchmarks.
+
+    Args:
+        path: Path to FIT file
+
+    Returns:
+        DataFrame with running data
+    """
+    return normalize_columns(_read_records_fitparse(path))
+
+
+def parse_tcx(filepath, columns=None):
     """
     Parse TCX file and convert to DataFrame.
+
+    Trackpoints are streamed by
+    :func:`~running_analyzer.parsers.tcx_parser.read_tcx_columns`, so memory use
+    does not grow with the size of the XML tree.
+
+    Args:
+        filepath: Path to TCX file, or its contents as bytes
+        columns: Output columns to return (the timestamp is always
+            returned); default: all columns
+
+    Returns:
+        DataFrame with running data
+    """
+    # Running dynamics and power are not part of TCX; those columns are absent
+    return normalize_columns(read_tcx_columns(filepath, columns=columns), keep=columns)
+
+
+def parse_tcx_reference(filepath):
+    """
+    Parse TCX file with ElementTree, holding the whole document in memory.
+
+    Reference implementation of :func:`parse_tcx`, kept for equivalence
+    tests and benchmarks.
     
     Args:
         filepath: Path to TCX file
@@ -112,11 +161,21 @@ def parse_tcx(filepath):
                 "temperature_c": float(temp.text) if temp is not None else None,
             })
 
-    df = pd.DataFrame(data)
+    return normalize_columns(pd.DataFrame(data))
 
-    # Add empty columns for metrics TCX does NOT contain
-    df["ground_contact_time_ms"] = None
-    df["vertical_osc_mm"] = None
-    df["power_w"] = None
 
-    return df
+def parse_activity(path, columns=None):
+    """
+    Parse a FIT or TCX activity file, detecting the format from its contents.
+
+    Args:
+        path: Path to activity file, or its contents as bytes
+        columns: Output columns to return (the timestamp is always
+            returned); default: all columns
+
+    Returns:
+        DataFrame with running data
+    """
+    if is_fit_file(path):
+        return load_fit_to_df(path, columns=columns)
+    return parse_tcx(path, columns=columns)
@@ -0,0 +1,188 @@
+"""
+Vectorized normalization of parsed activity columns.
+
+FIT and TCX parsers both hand their raw columns to :func:`normalize_columns`,
+which converts units and names in whole-array operations and builds the
+DataFrame once, instead of converting sample by sample and renaming
+(and copying) the frame afterwards.
+"""
+
+from typing import Dict, Iterable, Mapping, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+SEMICIRCLES_TO_DEGREES = 180 / 2**31
+
+# Raw field name -> dashboard column name. Enhanced FIT fields take precedence
+# over their 16-bit counterparts, which only exist on older devices.
+COLUMN_NAMES = {
+    "heart_rate": "hr_bpm",
+    "distance": "distance_m",
+    "enhanced_speed": "speed_m_s",
+    "speed": "speed_m_s",
+    "cadence": "cadence_spm",
+    "vertical_oscillation": "vertical_osc_mm",
+    "stance_time": "ground_contact_time_ms",
+    "stance_time_balance": "ground_contact_balance",
+    "temperature": "temperature_c",
+    "enhanced_altitude": "elevation_m",
+    "altitude": "elevation_m",
+    "power": "power_w",
+}
+
+# Raw columns replaced by a converted column
+POSITION_COLUMNS = {"position_lat": "latitude", "position_long": "longitude"}
+
+# Derived unit conversions: source column -> (new column, divisor)
+UNIT_CONVERSIONS = {
+    "vertical_osc_mm": ("vertical_osc_cm", 10),
+    "ground_contact_time_ms": ("ground_contact_time_s", 1000),
+}
+
+_INT16 = np.iinfo(np.int16)
+
+Columns = Union[Mapping[str, np.ndarray], pd.DataFrame]
+
+
+def downcast(values: np.ndarray) -> np.ndarray:
+    """
+    Shrink a numeric array to float32 or int16 when no value changes.
+
+    Args:
+        values: Numeric array
+
+    Returns:
+        The downcast array, or ``values`` itself if it cannot shrink losslessly
+    """
+    kind = values.dtype.kind
+    if kind in "iu" and values.dtype.itemsize > 2:
+        if len(values) == 0 or (values.min() >= _INT16.min and values.max() <= _INT16.max):
+            return values.astype(np.int16)
+    elif kind == "f" and values.dtype.itemsize > 4:
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow, values, equal_nan=True):
+            return narrow
+    return values
+
+
+def source_fields(columns: Iterable[str]) -> Set[str]:
+    """
+    Raw parser fields needed to produce the given output columns.
+
+    Output names without a known source (e.g. developer fields) are assumed
+    to be passed through unchanged. The timestamp is always included.
+
+    Args:
+        columns: Output column names, as produced by :func:`normalize_columns`
+
+    Returns:
+        Set of raw field names
+    """
+    wanted = set(columns) | {"timestamp"}
+    fields = set(wanted)
+    for source, (target, _) in UNIT_CONVERSIONS.items():
+        if target in wanted:
+            fields |= source_fields([source])
+    fields.update(raw for raw, target in COLUMN_NAMES.items() if target in wanted)
+    fields.update(raw for raw, target in POSITION_COLUMNS.items() if target in wanted)
+    return fields
+
+
+def _parse_utc_iso(values: np.ndarray):
+    """
+    Parse equal-length ISO-8601 strings ending in 'Z' with NumPy's C parser.
+
+    Returns:
+        datetime64[us] array, or None if the strings are not in that form
+    """
+    try:
+        raw = values.astype("S")
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return None
+
+    width = raw.dtype.itemsize
+    if len(raw) == 0 or width < 2:
+        return None
+    # Shorter strings are NUL-padded, so this also checks the lengths match
+    chars = raw.view(np.uint8).reshape(len(raw), width)
+    if not (chars[:, -1] == ord("Z")).all():
+        return None
+
+    try:
+        return np.ascontiguousarray(chars[:, :-1]).view(f"S{width - 1}").ravel().astype("datetime64[us]")
+    except ValueError:
+        return None
+
+
+def _timestamps(values: np.ndarray) -> pd.DatetimeIndex:
+    """Parse timestamps (datetime64 in UTC, or ISO-8601 strings) as UTC-aware."""
+    if values.dtype.kind != "M":
+        parsed = _parse_utc_iso(values)
+        if parsed is None:
+            return pd.to_datetime(values, utc=True, format="ISO8601", errors="coerce")
+        values = parsed
+    return pd.DatetimeIndex(values).tz_localize("UTC")
+
+
+def _numeric(values) -> np.ndarray:
+    """Convert object arrays of numbers/None to float; other arrays are left as they are."""
+    values = np.asarray(values)
+    if values.dtype == object:
+        try:
+            return pd.to_numeric(pd.Series(values), errors="raise").to_numpy()
+        except (TypeError, ValueError):
+            return values
+    return values
+
+
+def normalize_columns(columns: Columns, keep: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Convert raw parser columns into the dashboard's run DataFrame.
+
+    Renames FIT fields, converts semicircles to degrees, derives cm/s unit
+    columns, parses timestamps to UTC and downcasts numeric columns to
+    float32/int16 where that is lossless.
+
+    Args:
+        columns: Mapping or DataFrame of raw column arrays of equal length
+        keep: Output columns to return (the timestamp is always kept);
+            other raw columns are not converted. Default: all columns.
+
+    Returns:
+        Normalized DataFrame
+    """
+    if keep is not None:
+        keep = set(keep) | {"timestamp"}
+        needed = source_fields(keep)
+        columns = {name: columns[name] for name in columns if name in needed}
+
+    out: Dict[str, object] = {}
+
+    for name in columns:
+        if name in POSITION_COLUMNS:
+            out[POSITION_COLUMNS[name]] = _numeric(columns[name]) * SEMICIRCLES_TO_DEGREES
+        elif name == "timestamp":
+            out["timestamp"] = _timestamps(np.asarray(columns[name]))
+
+    numeric: Dict[str, np.ndarray] = {}
+    for name in columns:
+        if name in POSITION_COLUMNS or name == "timestamp":
+            continue
+        target = COLUMN_NAMES.get(name, name)
+        if target in out or target in numeric:
+            continue
+        if name in ("speed", "altitude") and f"enhanced_{name}" in columns:
+            continue
+        numeric[target] = _numeric(columns[name])
+
+    # Derive unit columns before downcasting so they keep full precision
+    for source, (target, divisor) in UNIT_CONVERSIONS.items():
+        if source in numeric and target not in numeric:
+            numeric[target] = numeric[source] / divisor
+
+    for name, values in numeric.items():
+        if keep is None or name in keep:
+            out[name] = downcast(values) if values.dtype.kind in "iuf" else values
+
+    return pd.DataFrame(out)
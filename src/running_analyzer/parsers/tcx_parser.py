@@ -0,0 +1,228 @@
+"""
+Streaming TCX parser with bounded memory.
+
+Trackpoints are read with ``lxml.etree.iterparse`` and written straight into
+preallocated column arrays; each Trackpoint element is discarded as soon as
+it has been read, so memory stays proportional to the number of samples
+kept rather than to the size of the XML tree.
+"""
+
+import io
+import os
+from typing import Collection, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+TCX_NS = "{http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2}"
+
+_TRACKPOINT = TCX_NS + "Trackpoint"
+_TIME = TCX_NS + "Time"
+_POSITION = TCX_NS + "Position"
+_LATITUDE = TCX_NS + "LatitudeDegrees"
+_LONGITUDE = TCX_NS + "LongitudeDegrees"
+_DISTANCE = TCX_NS + "DistanceMeters"
+_HEART_RATE = TCX_NS + "HeartRateBpm"
+_VALUE = TCX_NS + "Value"
+_CADENCE = TCX_NS + "Cadence"
+_ALTITUDE = TCX_NS + "AltitudeMeters"
+_TEMPERATURE = TCX_NS + "Temperature"
+
+# Numeric output columns; integer columns fall back to float64 if a value is missing
+NUMERIC_COLUMNS = (
+    "hr_bpm",
+    "distance_m",
+    "latitude",
+    "longitude",
+    "cadence_spm",
+    "elevation_m",
+    "temperature_c",
+)
+INTEGER_COLUMNS = ("hr_bpm", "cadence_spm")
+
+DEFAULT_CHUNK_SIZE = 8192
+
+
+class _ColumnBuffer:
+    """Fixed-capacity column arrays filled one trackpoint at a time."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.empty(capacity, dtype=object)
+        self.values = np.empty((len(NUMERIC_COLUMNS), capacity), dtype=np.float64)
+        self.size = 0
+
+    @property
+    def full(self) -> bool:
+        return self.size == self.capacity
+
+    def take(self) -> Dict[str, np.ndarray]:
+        """Return the filled part of the buffer as columns and reset it."""
+        n = self.size
+        columns = {"timestamp": self.timestamps[:n].copy()}
+        for i, name in enumerate(NUMERIC_COLUMNS):
+            columns[name] = self.values[i, :n].copy()
+        self.size = 0
+        return columns
+
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(bytes(source))
+    if isinstance(source, os.PathLike):
+        return os.fspath(source)
+    return source
+
+
+def _float(element) -> float:
+    return float(element.text) if element is not None else np.nan
+
+
+def _iter_column_chunks(source, chunk_size: int, columns: Optional[Collection[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield dicts of column arrays with at most ``chunk_size`` rows each.
+
+    Optional values whose column is not in ``columns`` are not converted.
+    Time, heart rate and position are always read, since they decide which
+    trackpoints are kept.
+    """
+    buffer = _ColumnBuffer(chunk_size)
+    timestamps = buffer.timestamps
+    values = buffer.values
+    want = set(NUMERIC_COLUMNS) if columns is None else set(columns)
+    want_dist, want_cad = "distance_m" in want, "cadence_spm" in want
+    want_ele, want_temp = "elevation_m" in want, "temperature_c" in want
+
+    for _, tp in etree.iterparse(_open(source), events=("end",), tag=_TRACKPOINT, huge_tree=True):
+        time = hr = lat = lon = None
+        dist = cad = ele = temp = np.nan
+
+        for child in tp:
+            tag = child.tag
+            if tag == _TIME:
+                time = child.text
+            elif tag == _POSITION:
+                for coord in child:
+                    if coord.tag == _LATITUDE:
+                        lat = coord.text
+                    elif coord.tag == _LONGITUDE:
+                        lon = coord.text
+            elif tag == _HEART_RATE:
+                for value in child:
+                    if value.tag == _VALUE:
+                        hr = value.text
+            elif tag == _DISTANCE:
+                if want_dist:
+                    dist = _float(child)
+            elif tag == _CADENCE:
+                if want_cad:
+                    cad = _float(child)
+            elif tag == _ALTITUDE:
+                if want_ele:
+                    ele = _float(child)
+            elif tag == _TEMPERATURE:
+                if want_temp:
+                    temp = _float(child)
+
+        # Drop the element and anything before it that has been parsed already
+        tp.clear(keep_tail=False)
+        parent = tp.getparent()
+        while tp.getprevious() is not None:
+            del parent[0]
+
+        if time is None or hr is None or lat is None or lon is None:
+            continue
+
+        i = buffer.size
+        timestamps[i] = time
+        values[0, i] = int(hr)
+        values[1, i] = dist
+        values[2, i] = float(lat)
+        values[3, i] = float(lon)
+        values[4, i] = cad
+        values[5, i] = ele
+        values[6, i] = temp
+        buffer.size += 1
+
+        if buffer.full:
+            yield buffer.take()
+
+    if buffer.size:
+        yield buffer.take()
+
+
+def _finish(columns: Dict[str, np.ndarray], keep: Optional[Collection[str]] = None) -> Dict[str, np.ndarray]:
+    """Drop columns not in ``keep`` and turn integer columns without missing values back into int64."""
+    if keep is not None:
+        columns = {name: values for name, values in columns.items() if name == "timestamp" or name in keep}
+    for name in INTEGER_COLUMNS:
+        if name not in columns:
+            continue
+        values = columns[name]
+        if len(values) and not np.isnan(values).any():
+            columns[name] = values.astype(np.int64)
+    return columns
+
+
+def _empty_columns() -> Dict[str, np.ndarray]:
+    columns = {"timestamp": np.empty(0, dtype=object)}
+    columns.update({name: np.empty(0, dtype=np.float64) for name in NUMERIC_COLUMNS})
+    return columns
+
+
+def iter_tcx_chunks(source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream a TCX file as DataFrames of at most ``chunk_size`` trackpoints.
+
+    Args:
+        source: Path to TCX file, file object, or its contents as bytes
+        chunk_size: Maximum rows per chunk
+
+    Yields:
+        DataFrames with the same columns as :func:`read_tcx`
+    """
+    for columns in _iter_column_chunks(source, chunk_size):
+        yield pd.DataFrame(_finish(columns))
+
+
+def read_tcx_columns(
+    source,
+    chunk_size: Optional[int] = None,
+    columns: Optional[Collection[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Read all trackpoints of a TCX file into column arrays.
+
+    Only trackpoints with a time, heart rate and position are kept.
+    Missing optional values are NaN.
+
+    Args:
+        source: Path to TCX file, file object, or its contents as bytes
+        chunk_size: Rows per internal buffer (default: DEFAULT_CHUNK_SIZE)
+        columns: Numeric columns to return (the timestamp is always
+            returned); default: all of NUMERIC_COLUMNS
+
+    Returns:
+        Dictionary with timestamp (ISO strings) and numeric column arrays
+    """
+    chunks = list(_iter_column_chunks(source, chunk_size or DEFAULT_CHUNK_SIZE, columns))
+    if not chunks:
+        return _finish(_empty_columns(), columns)
+    if len(chunks) == 1:
+        return _finish(chunks[0], columns)
+    return _finish({name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}, columns)
+
+
+def read_tcx(source, chunk_size: Optional[int] = None) -> pd.DataFrame:
+    """
+    Read all trackpoints of a TCX file into a DataFrame.
+
+    Args:
+        source: Path to TCX file, file object, or its contents as bytes
+        chunk_size: Rows per internal buffer (default: DEFAULT_CHUNK_SIZE)
+
+    Returns:
+        DataFrame of the columns returned by :func:`read_tcx_columns`
+    """
+    return pd.DataFrame(read_tcx_columns(source, chunk_size))
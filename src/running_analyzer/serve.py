@@ -0,0 +1,125 @@
+"""
+Production entry point: the dashboard under a multi-worker WSGI server.
+
+``app.main`` runs Dash's single-process development server, where
+concurrent callbacks queue up behind each other. Here the runs are loaded
+once in the server's master process before it forks its workers:
+
+- run summaries and labels are inherited copy-on-write by every worker
+- samples are read on demand from the run cache, memory-mapped read-only,
+  so workers showing the same runs share those pages instead of each
+  holding its own copy
+
+Run with gunicorn (``pip install gunicorn``)::
+
+    python -m running_analyzer.serve
+    gunicorn --preload -w 4 -b 0.0.0.0:8050 "running_analyzer.serve:create_server()"
+
+The folder is not watched while serving; restart the server to pick up
+new downloads.
+"""
+
+import os
+import sys
+import logging
+from pathlib import Path
+from typing import Optional
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import dash
+
+from running_analyzer.app import (
+    CACHE_FOLDER,
+    DASHBOARD_COLUMNS,
+    FIT_FOLDER,
+    REGIONS_GEOJSON,
+    create_app,
+    frame_loader,
+    load_all_runs,
+)
+from running_analyzer.geo import load_regions
+from running_analyzer.metrics import MetricsCache
+from running_analyzer.storage import RunCache, RunStore
+
+logger = logging.getLogger(__name__)
+
+# Address and worker settings of the production server
+SERVE_BIND = os.environ.get("RUN_SERVE_BIND", "127.0.0.1:8050")
+SERVE_WORKERS = int(os.environ.get("RUN_SERVE_WORKERS", str(os.cpu_count() or 1)))
+SERVE_THREADS = int(os.environ.get("RUN_SERVE_THREADS", "4"))
+
+
+def create_dash_app(fit_folder: Path = FIT_FOLDER, cache_folder: Optional[str] = CACHE_FOLDER) -> dash.Dash:
+    """
+    Load all runs and build the dashboard for serving.
+
+    Args:
+        fit_folder: Folder with the activity files
+        cache_folder: Run cache folder; empty or None to load every run
+            into memory (then shared copy-on-write only)
+
+    Returns:
+        Dash app whose ``server`` is the WSGI application
+    """
+    cache = RunCache(Path(cache_folder), mmap=True) if cache_folder else None
+    loader = frame_loader(cache, columns=DASHBOARD_COLUMNS) if cache is not None else None
+    if cache is None:
+        logger.warning("No run cache: every worker keeps the samples of all runs reachable")
+
+    regions = load_regions(REGIONS_GEOJSON)
+    store = RunStore(load_all_runs(fit_folder, cache=cache, regions=regions, loader=loader, columns=DASHBOARD_COLUMNS))
+    return create_app(store, metrics_cache=MetricsCache(), regions=regions)
+
+
+def create_server():
+    """
+    WSGI application factory, e.g. for ``gunicorn --preload``.
+
+    Returns:
+        Flask server of the dashboard
+    """
+    return create_dash_app().server
+
+
+def serve(app: dash.Dash, bind: str = SERVE_BIND, workers: int = SERVE_WORKERS, threads: int = SERVE_THREADS):
+    """
+    Serve a loaded app with gunicorn, forking workers from this process.
+
+    Falls back to the threaded development server when gunicorn is not
+    installed (e.g. on Windows).
+
+    Args:
+        app: Dash app from :func:`create_dash_app`
+        bind: host:port to listen on
+        workers: Worker processes
+        threads: Threads per worker
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logger.warning("gunicorn not installed, serving with the threaded development server. Run: pip install gunicorn")
+        host, _, port = bind.rpartition(":")
+        app.run(host=host or "127.0.0.1", port=int(port), debug=False, threaded=True)
+        return
+
+    class DashApplication(BaseApplication):
+        def load_config(self):
+            for key, value in {"bind": bind, "workers": workers, "threads": threads, "preload_app": True}.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app.server
+
+    logger.info("Serving on %s with %d workers x %d threads", bind, workers, threads)
+    DashApplication().run()
+
+
+def main():
+    """Load the runs once, then serve them from forked workers."""
+    serve(create_dash_app())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Storage module for ingesting and caching parsed runs.
+"""
+
+from running_analyzer.storage.cache import RunCache
+from running_analyzer.storage.compact import compact_run_frame, frame_memory, memory_report
+from running_analyzer.storage.ingest import ParseResult, parse_bytes, parse_file, parse_files
+from running_analyzer.storage.lazy import DEFAULT_MAX_FRAMES, FrameLoader, LazyRun, run_summary, summary_is_current
+from running_analyzer.storage.pipeline import IngestPipeline, PipelineStats
+from running_analyzer.storage.store import RunStore
+from running_analyzer.storage.watcher import FolderWatcher
+
+__all__ = [
+    'RunCache',
+    'compact_run_frame',
+    'frame_memory',
+    'memory_report',
+    'ParseResult',
+    'parse_bytes',
+    'parse_file',
+    'parse_files',
+    'DEFAULT_MAX_FRAMES',
+    'FrameLoader',
+    'LazyRun',
+    'run_summary',
+    'summary_is_current',
+    'IngestPipeline',
+    'PipelineStats',
+    'RunStore',
+    'FolderWatcher',
+]
@@ -0,0 +1,436 @@
+"""
+Persistent columnar cache of parsed runs.
+
+Each activity is stored as a directory holding one ``.npy`` file per column
+and an ``entry.json`` describing them: source file, columns, size, mtime,
+parser version and a small metadata record (run summary, labels) that is
+read without loading the columns. An entry is only reused while the source
+file's size, mtime and the parser version all match what was recorded when
+it was written.
+
+Entries are self-describing and written atomically, and their directory
+name is derived from the source path and the column set, so several
+processes (the dashboard and the download pipeline) can share one cache
+folder. The JSON manifest is only an index of the entries a process knows;
+when it has no fresh entry for a file, the entry directories another
+process may have written since are checked before reporting a miss.
+
+With ``mmap=True`` the column files are memory-mapped read-only instead of
+read, so processes loading the same runs share their pages through the OS
+page cache (numeric columns only; UTC timestamps are localized into a
+private copy).
+
+Frames parsed with a column projection record it; such an entry only
+serves requests for a subset of those columns, and a request for a subset
+of any entry only loads the requested ``.npy`` files.
+"""
+
+import glob
+import json
+import hashlib
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from pathlib import Path
+from typing import Collection, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from running_analyzer.parsers import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+ENTRY_NAME = "entry.json"
+
+# Layout of the cache folder; manifests of other layouts are discarded
+CACHE_FORMAT = 2
+
+
+def _write_json(path: Path, data: Dict[str, object]):
+    """Write JSON through a temporary file, so readers never see a partial file."""
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+def _column_set(projection: Optional[Collection[str]]) -> str:
+    """Directory name suffix of a column projection ('all' without one)."""
+    if projection is None:
+        return "all"
+    return hashlib.sha1(",".join(sorted(projection)).encode("utf-8")).hexdigest()[:8]
+
+
+def _encode_column(series: pd.Series):
+    """
+    Convert a column to a plain NumPy array that can be saved without pickle.
+
+    Returns:
+        Tuple of (array, column spec) where the spec records how to restore it
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        values = series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+        return values, {"kind": "datetime", "tz": "UTC"}
+
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return series.to_numpy(), {"kind": "datetime", "tz": None}
+
+    if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return series.to_numpy(), {"kind": "numeric"}
+
+    if dtype == object:
+        try:
+            values = pd.to_numeric(series, errors="raise").to_numpy(dtype=np.float64)
+            return values, {"kind": "object_numeric"}
+        except (TypeError, ValueError):
+            pass
+
+    return series.astype(str).to_numpy(dtype=str), {"kind": "string", "dtype": str(dtype)}
+
+
+def _decode_column(values: np.ndarray, spec: Dict[str, object]) -> pd.Series:
+    """Inverse of :func:`_encode_column`."""
+    kind = spec["kind"]
+    series = pd.Series(values, copy=False)
+
+    if kind == "datetime":
+        return series.dt.tz_localize(spec["tz"]) if spec.get("tz") else series
+    if kind == "object_numeric":
+        series = series.astype(object)
+        return series.where(series.notna(), None)
+    if kind == "string":
+        return series.astype(spec.get("dtype", "object"))
+    return series
+
+
+class RunCache:
+    """
+    On-disk cache of parsed run DataFrames keyed by source file.
+    """
+
+    def __init__(self, cache_dir: Path, parser_version: int = PARSER_VERSION, mmap: bool = False):
+        """
+        Initialize the cache, discarding entries written by another parser version.
+
+        Args:
+            cache_dir: Directory holding the manifest and per-run column files
+            parser_version: Version of the parser whose output is cached
+            mmap: Memory-map column files read-only instead of reading
+                them; frames returned by :meth:`get` are then read-only
+        """
+        self.cache_dir = Path(cache_dir)
+        self.parser_version = parser_version
+        self.mmap = mmap
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._dirty = False
+        self._entries: Dict[str, Dict[str, object]] = {}
+        # Runs may be loaded on demand from request threads while a watcher
+        # thread stores new ones
+        self._lock = threading.RLock()
+        self._load_manifest()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.cache_dir / MANIFEST_NAME
+
+    def _load_manifest(self):
+        if not self.manifest_path.exists():
+            return
+
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable cache manifest %s: %s", self.manifest_path, exc)
+            return
+
+        if manifest.get("parser_version") != self.parser_version or manifest.get("format") != CACHE_FORMAT:
+            logger.info(
+                "Parser version or cache format changed (%s -> %s), invalidating run cache",
+                manifest.get("parser_version"), self.parser_version,
+            )
+            for entry in manifest.get("entries", {}).values():
+                shutil.rmtree(self.cache_dir / entry["entry"], ignore_errors=True)
+            self._dirty = True
+            return
+
+        self._entries = manifest.get("entries", {})
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return str(Path(path).resolve())
+
+    @staticmethod
+    def _signature(path: Path) -> Dict[str, int]:
+        stat = Path(path).stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    @staticmethod
+    def _entry_name(path: Path, key: str, projection: Optional[Collection[str]]) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        return f"{Path(path).stem}-{digest}-{_column_set(projection)}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path) -> bool:
+        return self._lookup(Path(path)) is not None
+
+    @staticmethod
+    def _serves(entry: Dict[str, object], columns: Optional[Collection[str]], signature: Dict[str, int]) -> bool:
+        """Whether an entry is fresh and holds the requested columns."""
+        projection = entry.get("projection")
+        if projection is not None and (columns is None or not set(columns) <= set(projection)):
+            return False
+        return entry["size"] == signature["size"] and entry["mtime_ns"] == signature["mtime_ns"]
+
+    def _read_entry(self, entry_name: str) -> Optional[Dict[str, object]]:
+        """Entry description stored in an entry directory, if readable and of this parser version."""
+        try:
+            entry = json.loads((self.cache_dir / entry_name / ENTRY_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if entry.get("parser_version") != self.parser_version or entry.get("entry") != entry_name:
+            return None
+        return entry
+
+    def _lookup(self, path: Path, columns: Optional[Collection[str]] = None) -> Optional[Dict[str, object]]:
+        key = self._key(path)
+        try:
+            signature = self._signature(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and self._serves(entry, columns, signature):
+            return entry
+
+        # Another process may have stored the file since the manifest was read:
+        # check the entries of the requested column set and of all columns
+        candidates = [self._entry_name(path, key, None)]
+        if columns is not None:
+            candidates.insert(0, self._entry_name(path, key, columns))
+        for entry_name in candidates:
+            entry = self._read_entry(entry_name)
+            if entry is not None and entry.get("key") == key and self._serves(entry, columns, signature):
+                with self._lock:
+                    self._entries[key] = entry
+                    self._dirty = True
+                return entry
+        return None
+
+    def get(self, path: Path, columns: Optional[Collection[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Return the cached DataFrame for a source file.
+
+        Args:
+            path: Path to the FIT/TCX source file
+            columns: Columns to load (the timestamp is always loaded);
+                default: all. Entries stored with a projection only serve
+                requests within it.
+
+        Returns:
+            Cached DataFrame, or None if missing or stale
+        """
+        wanted = None if columns is None else set(columns) | {"timestamp"}
+        entry = self._lookup(Path(path), wanted)
+        if entry is None:
+            return None
+
+        entry_dir = self.cache_dir / entry["entry"]
+        mmap_mode = "r" if self.mmap else None
+        try:
+            # np.asarray gives plain ndarray views of maps, so the memmap
+            # subclass does not leak into results
+            columns = {
+                name: _decode_column(np.asarray(np.load(entry_dir / f"{i}.npy", mmap_mode=mmap_mode, allow_pickle=False)), spec)
+                for i, (name, spec) in enumerate(entry["columns"].items())
+                if wanted is None or name in wanted
+            }
+        except (OSError, ValueError) as exc:
+            logger.warning("Dropping unreadable cache entry for %s: %s", path, exc)
+            self._discard(path, entry)
+            return None
+
+        return pd.DataFrame(columns, index=pd.RangeIndex(entry["rows"]), copy=False)
+
+    def get_meta(self, path: Path, columns: Optional[Collection[str]] = None) -> Optional[Dict[str, object]]:
+        """
+        Return the metadata stored for a source file, without loading columns.
+
+        Args:
+            path: Path to the FIT/TCX source file
+            columns: Columns the caller will load (see :meth:`get`)
+
+        Returns:
+            Metadata dictionary, or None if missing or stale
+        """
+        entry = self._lookup(Path(path), None if columns is None else set(columns) | {"timestamp"})
+        if entry is None:
+            return None
+        return entry.get("meta")
+
+    def set_meta(self, path: Path, meta: Dict[str, object], columns: Optional[Collection[str]] = None):
+        """
+        Replace the metadata of a fresh cache entry; ignored if there is none.
+
+        Args:
+            path: Path to the FIT/TCX source file
+            meta: JSON-serializable metadata
+            columns: Columns the caller loads (see :meth:`get`)
+        """
+        entry = self._lookup(Path(path), None if columns is None else set(columns) | {"timestamp"})
+        if entry is None:
+            return
+        with self._lock:
+            entry["meta"] = meta
+            self._dirty = True
+            try:
+                _write_json(self.cache_dir / entry["entry"] / ENTRY_NAME, entry)
+            except OSError as exc:
+                logger.warning("Could not update cache entry for %s: %s", path, exc)
+
+    def put(
+        self,
+        path: Path,
+        df: pd.DataFrame,
+        meta: Optional[Dict[str, object]] = None,
+        columns: Optional[Collection[str]] = None,
+    ):
+        """
+        Store a parsed DataFrame for a source file.
+
+        Args:
+            path: Path to the FIT/TCX source file
+            df: Parser output for that file
+            meta: Optional JSON-serializable metadata stored with the entry
+            columns: Column projection ``df`` was parsed with, if any
+        """
+        path = Path(path)
+        key = self._key(path)
+        projection = None if columns is None else sorted(set(columns) | {"timestamp"})
+        entry_name = self._entry_name(path, key, projection)
+        entry_dir = self.cache_dir / entry_name
+        entry = {
+            "entry": entry_name,
+            "key": key,
+            "parser_version": self.parser_version,
+            # Tells this write apart from a later one of the same entry
+            "write_id": uuid.uuid4().hex,
+            "rows": len(df),
+            "columns": {},
+            **self._signature(path),
+        }
+        if meta is not None:
+            entry["meta"] = meta
+        if projection is not None:
+            entry["projection"] = projection
+
+        tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir))
+        try:
+            for i, name in enumerate(df.columns):
+                values, spec = _encode_column(df[name])
+                np.save(tmp_dir / f"{i}.npy", values, allow_pickle=False)
+                entry["columns"][str(name)] = spec
+            _write_json(tmp_dir / ENTRY_NAME, entry)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # Another process stored the same entry in between
+                if not (entry_dir / ENTRY_NAME).exists():
+                    raise
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+
+    def _discard(self, path: Path, entry: Dict[str, object]):
+        """
+        Drop an entry that failed to read.
+
+        Only this process's index record is dropped, and the directory only
+        while it still holds that entry: another process may be replacing it
+        (see :meth:`put`) or own the entries of other column sets.
+        """
+        key = self._key(path)
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+                self._dirty = True
+        current = self._read_entry(entry["entry"])
+        if current is not None and current.get("write_id") == entry.get("write_id"):
+            shutil.rmtree(self.cache_dir / entry["entry"], ignore_errors=True)
+
+    def invalidate(self, path: Path):
+        """Remove the cache entries of a source file (of every column set), if any."""
+        key = self._key(path)
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+        prefix = self._entry_name(path, key, None)[:-len(_column_set(None))]
+        for entry_dir in self.cache_dir.glob(glob.escape(prefix) + "*"):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def prune(self, keep: Iterable[Path]) -> int:
+        """
+        Drop entries whose source files are not in ``keep``.
+
+        Entry directories missing from the manifest (written by another
+        process, or for another column set) are dropped too when their
+        source is not kept or has changed.
+
+        Args:
+            keep: Source paths that are still present
+
+        Returns:
+            Number of entries removed
+        """
+        keep_keys = {self._key(p): Path(p) for p in keep}
+        with self._lock:
+            stale = [self._entries.pop(key)["entry"] for key in list(self._entries) if key not in keep_keys]
+            if stale:
+                self._dirty = True
+            known = {entry["entry"] for entry in self._entries.values()}
+
+        for entry_dir in self.cache_dir.iterdir():
+            if not entry_dir.is_dir() or entry_dir.name.startswith(".tmp-") or entry_dir.name in known:
+                continue
+            entry = self._read_entry(entry_dir.name)
+            source = keep_keys.get(entry["key"]) if entry is not None else None
+            try:
+                fresh = source is not None and self._serves(entry, entry.get("projection"), self._signature(source))
+            except OSError:
+                fresh = False
+            if not fresh and entry_dir.name not in stale:
+                stale.append(entry_dir.name)
+
+        for entry_name in stale:
+            shutil.rmtree(self.cache_dir / entry_name, ignore_errors=True)
+        return len(stale)
+
+    def flush(self):
+        """Write the manifest to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            manifest = {"parser_version": self.parser_version, "format": CACHE_FORMAT, "entries": self._entries}
+            _write_json(self.manifest_path, manifest)
+            self._dirty = False
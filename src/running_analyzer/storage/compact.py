@@ -0,0 +1,92 @@
+"""
+Compact in-memory layout for loaded runs and memory reporting.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from running_analyzer.parsers import downcast
+
+
+def compact_run_frame(df: pd.DataFrame, run_name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Rebuild a run DataFrame with the smallest lossless column types.
+
+    Columns without any value are dropped, object columns holding numbers
+    become numeric, numeric columns are downcast to float32/int16 where
+    lossless, and the run name is stored as a single-category column.
+
+    Args:
+        df: Parsed run DataFrame
+        run_name: Name stored in the run_name column, if given
+
+    Returns:
+        Compacted DataFrame (a new frame; ``df`` is not modified). Columns
+        that need no conversion share their data with ``df``.
+    """
+    columns: Dict[str, object] = {}
+
+    for name in df.columns:
+        series = df[name]
+        if name != "timestamp" and series.isna().all():
+            continue
+
+        if series.dtype == object:
+            try:
+                series = pd.to_numeric(series, errors="raise")
+            except (TypeError, ValueError):
+                columns[name] = series.to_numpy()
+                continue
+
+        values = series.to_numpy() if not isinstance(series.dtype, pd.DatetimeTZDtype) else series.array
+        if getattr(values, "dtype", None) is not None and values.dtype.kind in "iuf":
+            values = downcast(values)
+        columns[name] = values
+
+    if "timestamp" not in columns:
+        columns["timestamp"] = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[us]")
+
+    if run_name is not None:
+        columns["run_name"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[run_name])
+
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def frame_memory(df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Bytes used by each column of a DataFrame, including object contents.
+
+    Args:
+        df: DataFrame to measure
+
+    Returns:
+        Dictionary of column name to bytes, plus 'Index'
+    """
+    return {str(name): int(size) for name, size in df.memory_usage(deep=True).items()}
+
+
+def memory_report(runs: List[Dict[str, object]]) -> pd.DataFrame:
+    """
+    Summarize memory used by loaded runs.
+
+    Args:
+        runs: List of run dictionaries with 'name' and 'df' keys
+
+    Returns:
+        DataFrame with one row per run: name, rows, columns, bytes and
+        bytes_per_row
+    """
+    rows = []
+    for run in runs:
+        df = run["df"]
+        total = sum(frame_memory(df).values())
+        rows.append({
+            "name": run["name"],
+            "rows": len(df),
+            "columns": len(df.columns),
+            "bytes": total,
+            "bytes_per_row": total / len(df) if len(df) else float("nan"),
+        })
+    return pd.DataFrame(rows, columns=["name", "rows", "columns", "bytes", "bytes_per_row"])
@@ -0,0 +1,115 @@
+"""
+Parallel parsing of activity files.
+"""
+
+import os
+import time
+import logging
+import traceback
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Collection, Iterable, List, NamedTuple, Optional
+
+import pandas as pd
+
+from running_analyzer.parsers import parse_activity
+
+logger = logging.getLogger(__name__)
+
+
+class ParseResult(NamedTuple):
+    """Outcome of parsing a single activity file."""
+
+    path: Path
+    df: Optional[pd.DataFrame]
+    error: Optional[str]
+    seconds: float
+
+
+def default_workers() -> int:
+    """
+    Worker count for parallel ingest.
+
+    Read from the RUN_INGEST_WORKERS environment variable, defaulting to
+    the number of CPUs.
+    """
+    value = os.environ.get("RUN_INGEST_WORKERS", "")
+    if value.strip().isdigit():
+        return max(1, int(value))
+    return os.cpu_count() or 1
+
+
+def parse_file(path: Path, columns: Optional[Collection[str]] = None) -> ParseResult:
+    """
+    Parse one activity file, capturing failures instead of raising.
+
+    Args:
+        path: Path to FIT/TCX file
+        columns: Output columns to parse (default: all)
+
+    Returns:
+        ParseResult with either the DataFrame or the formatted error
+    """
+    start = time.perf_counter()
+    try:
+        df = parse_activity(path, columns=columns)
+    except Exception:
+        return ParseResult(path, None, traceback.format_exc(), time.perf_counter() - start)
+    return ParseResult(path, df, None, time.perf_counter() - start)
+
+
+def parse_bytes(path: Path, data: bytes, columns: Optional[Collection[str]] = None) -> ParseResult:
+    """
+    Parse the contents of an activity file that is already in memory.
+
+    Args:
+        path: Path the contents belong to (used to label the result)
+        data: FIT/TCX file contents
+        columns: Output columns to parse (default: all)
+
+    Returns:
+        ParseResult with either the DataFrame or the formatted error
+    """
+    start = time.perf_counter()
+    try:
+        df = parse_activity(data, columns=columns)
+    except Exception:
+        return ParseResult(path, None, traceback.format_exc(), time.perf_counter() - start)
+    return ParseResult(path, df, None, time.perf_counter() - start)
+
+
+def parse_files(
+    paths: Iterable[Path],
+    workers: Optional[int] = None,
+    columns: Optional[Collection[str]] = None,
+) -> List[ParseResult]:
+    """
+    Parse activity files, fanning out to a process pool when worthwhile.
+
+    Results are returned in the same order as ``paths``. With one worker,
+    a single file, or when a process pool cannot be started, files are
+    parsed serially in the current process.
+
+    Args:
+        paths: Files to parse
+        workers: Number of worker processes (default: default_workers())
+        columns: Output columns to parse (default: all)
+
+    Returns:
+        List of ParseResult, one per path
+    """
+    paths = list(paths)
+    workers = default_workers() if workers is None else workers
+    workers = min(workers, len(paths))
+    parse = partial(parse_file, columns=columns)
+
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(parse, paths))
+        except (OSError, NotImplementedError, BrokenProcessPool) as exc:
+            logger.warning("Process pool unavailable (%s), parsing serially", exc)
+
+    return [parse(path) for path in paths]
@@ -0,0 +1,176 @@
+"""
+On-demand loading of run samples.
+
+At startup only a small summary of each run is needed (start time,
+duration, distance, start point and extent) to list, tag and index it,
+plus its training summary for the long-term rollups. The
+samples are loaded when a run is first used and kept in a bounded LRU of
+decoded frames, so memory follows the runs being looked at rather than the
+size of the archive.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+from running_analyzer.geo import run_extent
+from running_analyzer.metrics.physiology import PHYSIOLOGY_SETTINGS
+from running_analyzer.metrics.training import training_summary
+
+logger = logging.getLogger(__name__)
+
+# Decoded runs kept in memory
+DEFAULT_MAX_FRAMES = int(os.environ.get("RUN_LOADED_RUNS", "64"))
+
+
+def _optional_float(value) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else float(value)
+
+
+def run_summary(df: pd.DataFrame, training: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """
+    JSON-serializable summary of a run's samples.
+
+    Args:
+        df: Run DataFrame
+        training: Its training summary, if already computed in a batch
+            (see :func:`training_summaries`)
+
+    Returns:
+        Dictionary with start_time (ISO 8601 or None), duration_s,
+        distance_km, samples, start_lat, start_lon, extent (see
+        :func:`run_extent`) and training (see :func:`training_summary`)
+    """
+    summary: Dict[str, object] = {
+        "start_time": None,
+        "duration_s": None,
+        "distance_km": None,
+        "samples": len(df),
+        "start_lat": None,
+        "start_lon": None,
+        "extent": run_extent(df),
+        "training": training if training is not None else training_summary(df),
+    }
+
+    if "timestamp" in df:
+        timestamps = pd.to_datetime(df["timestamp"], errors="coerce").dropna()
+        if len(timestamps):
+            summary["start_time"] = timestamps.iloc[0].isoformat()
+            summary["duration_s"] = (timestamps.iloc[-1] - timestamps.iloc[0]).total_seconds()
+
+    if "distance_m" in df:
+        distance = np.asarray(df["distance_m"], dtype=np.float64)
+        if np.isfinite(distance).any():
+            summary["distance_km"] = _optional_float(np.nanmax(distance) / 1000)
+
+    if summary["extent"] is not None:
+        lat = np.asarray(df["latitude"], dtype=np.float64)
+        lon = np.asarray(df["longitude"], dtype=np.float64)
+        first = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))[0]
+        summary["start_lat"], summary["start_lon"] = float(lat[first]), float(lon[first])
+
+    return summary
+
+
+def summary_is_current(summary: Dict[str, object]) -> bool:
+    """
+    Whether a stored summary has every field of :func:`run_summary`.
+
+    Summaries written by older versions, or with zones and TRIMP for other
+    physiology settings (RUN_MAX_HR, RUN_REST_HR, ...), must be computed
+    again from the samples.
+    """
+    training = summary.get("training")
+    return bool(training) and training.get("settings") == PHYSIOLOGY_SETTINGS
+
+
+class FrameLoader:
+    """
+    Thread-safe LRU of decoded run frames.
+    """
+
+    def __init__(self, load: Callable[[Hashable], pd.DataFrame], max_frames: int = DEFAULT_MAX_FRAMES):
+        """
+        Initialize the loader.
+
+        Args:
+            load: Function returning the frame of a run key
+            max_frames: Number of frames kept in memory
+        """
+        self.load = load
+        self.max_frames = max(1, max_frames)
+        self._frames: "OrderedDict[Hashable, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._frames
+
+    def get(self, key: Hashable) -> pd.DataFrame:
+        """Frame of a run, loading it if it is not in memory."""
+        with self._lock:
+            df = self._frames.get(key)
+            if df is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return df
+            self.misses += 1
+
+        # Load outside the lock so other runs stay available meanwhile
+        df = self.load(key)
+        self.put(key, df)
+        return df
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        """Keep a frame, evicting the least recently used ones."""
+        with self._lock:
+            self._frames[key] = df
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_frames:
+                evicted, _ = self._frames.popitem(last=False)
+                logger.debug("Evicted run %s from memory", evicted)
+
+    def discard(self, key: Hashable) -> None:
+        """Forget the frame of a run, e.g. after its source changed."""
+        with self._lock:
+            self._frames.pop(key, None)
+
+
+class LazyRun(dict):
+    """
+    Run dictionary whose 'df' is loaded through a :class:`FrameLoader`.
+
+    Every other key (name, path, summary, labels) is stored as usual. The
+    frame is not stored in the dictionary, so it is only held in memory
+    while the loader keeps it.
+    """
+
+    def __init__(self, loader: FrameLoader, key: Hashable, **fields):
+        super().__init__(fields)
+        self.loader = loader
+        self.key = key
+
+    def __getitem__(self, name):
+        if name == "df":
+            return self.loader.get(self.key)
+        return super().__getitem__(name)
+
+    def __contains__(self, name) -> bool:
+        return name == "df" or super().__contains__(name)
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the samples are currently in memory."""
+        return self.key in self.loader
@@ -0,0 +1,169 @@
+"""
+Download-to-cache pipeline.
+
+Instead of downloading a batch and parsing the files in a later pass, each
+activity is handed to the parser as soon as its bytes arrive, and the
+parsed frame is written to the run cache right away. Decoding one activity
+thus overlaps with waiting on the network for the next ones, and the file
+is never read back from disk.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional
+
+from running_analyzer.storage.cache import RunCache
+from running_analyzer.storage.ingest import ParseResult, default_workers, parse_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStats:
+    """
+    Thread-safe counters of a pipeline run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.downloaded = 0
+        self.parsed = 0
+        self.failed = 0
+        self.download_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.cache_seconds = 0.0
+        self.started = time.perf_counter()
+        self.wall_seconds = 0.0
+
+    def add(self, **amounts) -> None:
+        """Add to one or more counters."""
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Counters as a dictionary."""
+        with self._lock:
+            return {
+                "downloaded": self.downloaded,
+                "parsed": self.parsed,
+                "failed": self.failed,
+                "download_seconds": round(self.download_seconds, 3),
+                "parse_seconds": round(self.parse_seconds, 3),
+                "cache_seconds": round(self.cache_seconds, 3),
+                "wall_seconds": round(self.wall_seconds, 3),
+            }
+
+
+class IngestPipeline:
+    """
+    Parses downloaded activities in a worker pool and caches them as they arrive.
+
+    Pass an instance as the ``on_downloaded`` callback of
+    :meth:`~running_analyzer.downloader.GarminDownloader.download_activities_batch`
+    or :meth:`~running_analyzer.downloader.GarminDownloader.sync_activities`,
+    then call :meth:`close` (or use it as a context manager) to wait for the
+    remaining parses and write the cache manifest.
+    """
+
+    def __init__(self, cache: Optional[RunCache], workers: Optional[int] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            cache: Run cache receiving the parsed frames; None to only parse
+                (e.g. to time the pipeline)
+            workers: Parser processes (default: RUN_INGEST_WORKERS or the CPU
+                count). With one worker, files are parsed in the download
+                thread that received them.
+        """
+        self.cache = cache
+        self.workers = default_workers() if workers is None else workers
+        self.stats = PipelineStats()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        if self.workers > 1:
+            try:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            except (OSError, NotImplementedError) as exc:
+                logger.warning("Process pool unavailable (%s), parsing in download threads", exc)
+
+    def __enter__(self) -> "IngestPipeline":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __call__(self, path: Path, data: bytes, download_seconds: float = 0.0) -> None:
+        """
+        Queue a downloaded activity for parsing.
+
+        Args:
+            path: Path the activity was written to
+            data: File contents
+            download_seconds: Time spent downloading it
+        """
+        self.stats.add(downloaded=1, download_seconds=download_seconds)
+        if self._pool is not None:
+            try:
+                future = self._pool.submit(parse_bytes, Path(path), data)
+            except BrokenProcessPool as exc:
+                logger.warning("Process pool failed (%s), parsing in download threads", exc)
+                self._pool = None
+            else:
+                future.add_done_callback(self._on_parsed)
+                return
+        self._store(parse_bytes(Path(path), data))
+
+    def _on_parsed(self, future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception as exc:
+            logger.error("Parser worker failed: %s", exc)
+            self.stats.add(failed=1)
+            return
+        self._store(result)
+
+    def _store(self, result: ParseResult) -> None:
+        """Write a parse result to the cache."""
+        self.stats.add(parse_seconds=result.seconds)
+        if result.error is not None:
+            logger.error("Failed to parse %s:\n%s", result.path, result.error)
+            self.stats.add(failed=1)
+            return
+
+        start = time.perf_counter()
+        if self.cache is not None and result.df is not None:
+            try:
+                self.cache.put(result.path, result.df)
+            except OSError as exc:
+                logger.error("Failed to cache %s: %s", result.path, exc)
+                self.stats.add(failed=1)
+                return
+        self.stats.add(parsed=1, cache_seconds=time.perf_counter() - start)
+
+    def close(self) -> Dict[str, float]:
+        """
+        Wait for pending parses, flush the cache and log the counters.
+
+        Returns:
+            Counters (see :meth:`PipelineStats.as_dict`)
+        """
+        if self._pool is not None:
+            # Also waits for the done callbacks that write the cache
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self.cache is not None:
+            self.cache.flush()
+
+        self.stats.wall_seconds = time.perf_counter() - self.stats.started
+        stats = self.stats.as_dict()
+        logger.info(
+            "Pipeline: %d downloaded (%.1fs), %d parsed (%.1fs), %d failed, cache writes %.1fs, %.1fs wall time",
+            stats["downloaded"], stats["download_seconds"], stats["parsed"], stats["parse_seconds"],
+            stats["failed"], stats["cache_seconds"], stats["wall_seconds"],
+        )
+        return stats
@@ -0,0 +1,92 @@
+"""
+Thread-safe in-memory store of loaded runs.
+
+The dashboard reads runs from the store while a folder watcher adds runs
+parsed from new downloads. Every update swaps in fresh lists, so readers can
+keep using a snapshot while it changes, and bumps a version number that
+clients poll to know when to refresh. The training rollups of the store
+are updated with the same runs.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from running_analyzer.geo import runs_by_label
+from running_analyzer.metrics.training import TrainingRollups
+
+
+class RunStore:
+    """
+    Ordered collection of runs keyed by their source file.
+    """
+
+    def __init__(self, runs: Optional[Iterable[Dict[str, object]]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            runs: Initial run dictionaries with 'name' and 'df' keys, and
+                'path' to identify their source file (the name is used
+                otherwise)
+        """
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+        self._runs: List[Dict[str, object]] = []
+        self._by_label: Dict[Tuple[str, str], List[Dict[str, object]]] = {}
+        self.rollups = TrainingRollups()
+        self.version = 0
+        if runs:
+            self.update(runs)
+
+    @staticmethod
+    def _key(run: Dict[str, object]) -> str:
+        return str(run.get("path") or run["name"])
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def runs(self) -> List[Dict[str, object]]:
+        """Snapshot of all runs, in load order."""
+        with self._lock:
+            return self._runs
+
+    def by_label(self) -> Dict[Tuple[str, str], List[Dict[str, object]]]:
+        """Snapshot of the runs grouped by (country, city) label."""
+        with self._lock:
+            return self._by_label
+
+    def update(self, added: Iterable[Dict[str, object]] = (), removed: Iterable[str] = ()) -> List[str]:
+        """
+        Add or replace runs and drop runs whose source file is gone.
+
+        A run whose source is already in the store replaces the old run in
+        place; new runs are appended.
+
+        Args:
+            added: Run dictionaries to add
+            removed: Source paths (or names) of runs to drop
+
+        Returns:
+            Names of the replaced and removed runs, whose derived data is stale
+        """
+        added, removed = list(added), list(removed)
+        stale = []
+        with self._lock:
+            entries = self._entries.copy()
+            for key in removed:
+                run = entries.pop(str(key), None)
+                if run is not None:
+                    stale.append(run["name"])
+            for run in added:
+                old = entries.get(self._key(run))
+                if old is not None:
+                    stale.append(old["name"])
+                entries[self._key(run)] = run
+
+            self._entries = entries
+            self._runs = list(entries.values())
+            self._by_label = runs_by_label(self._runs)
+            self.rollups.update(added, removed)
+            self.version += 1
+        return stale
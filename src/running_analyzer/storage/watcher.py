@@ -0,0 +1,132 @@
+"""
+Polling watcher for new activity files.
+
+The watcher lists the folder every few seconds and compares each file's size
+and mtime with the last delivered state. A new or changed file is only
+delivered once it has looked the same on two consecutive polls, so files
+that are still being downloaded are not parsed half-written. Files the
+callback could not ingest are delivered again by later polls.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between folder scans
+DEFAULT_INTERVAL = 10.0
+
+Signature = Tuple[int, int]
+
+
+class FolderWatcher:
+    """
+    Reports activity files that appear, change or disappear in a folder.
+    """
+
+    def __init__(
+        self,
+        folder: Path,
+        on_change: Callable[[List[Path], List[Path]], Optional[Iterable[Path]]],
+        patterns: Sequence[str] = ("*.fit", "*.tcx"),
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            folder: Folder to watch
+            on_change: Called from the watcher thread with the lists of
+                changed (new or modified) and removed files; may return
+                the changed files that failed, to have them retried
+            patterns: Glob patterns of the files to watch
+            interval: Seconds between scans
+        """
+        self.folder = Path(folder)
+        self.on_change = on_change
+        self.patterns = patterns
+        self.interval = interval
+        self._seen: Dict[Path, Signature] = {}
+        self._pending: Dict[Path, Signature] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self) -> Dict[Path, Signature]:
+        """Current (size, mtime_ns) of the watched files."""
+        signatures = {}
+        for pattern in self.patterns:
+            for path in self.folder.glob(pattern):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                signatures[path] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def prime(self) -> None:
+        """
+        Record the current files as already delivered.
+
+        Call this before loading the folder, so that files written while it
+        is being loaded are still reported by the next polls.
+        """
+        self._seen = self.scan()
+        self._pending.clear()
+
+    def poll(self) -> Tuple[List[Path], List[Path]]:
+        """
+        Scan the folder once and deliver settled changes to ``on_change``.
+
+        Returns:
+            Tuple of (changed, removed) file lists that were delivered
+        """
+        current = self.scan()
+        changed = []
+        pending = {}
+        for path, signature in sorted(current.items()):
+            if self._seen.get(path) == signature:
+                continue
+            if self._pending.get(path) == signature:
+                changed.append(path)
+            else:
+                pending[path] = signature
+        removed = sorted(path for path in self._seen if path not in current)
+
+        self._pending = pending
+        for path in changed:
+            self._seen[path] = current[path]
+        for path in removed:
+            del self._seen[path]
+
+        if changed or removed:
+            logger.info("Detected %d new or changed and %d removed files in %s", len(changed), len(removed), self.folder)
+            try:
+                failed = self.on_change(changed, removed) or ()
+            except Exception:
+                logger.exception("Failed to ingest changes in %s", self.folder)
+                failed = changed
+            # Forgotten files look new to the next scans and are delivered again
+            for path in failed:
+                self._seen.pop(Path(path), None)
+        return changed, removed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> None:
+        """Start polling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="folder-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop polling and wait for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -9,6 +9,13 @@ from running_analyzer.utils.helpers import (
     format_duration,
     safe_mean,
 )
+from running_analyzer.utils.instrumentation import (
+    Instrumentation,
+    instrument_server,
+    instrumentation,
+    profiled,
+    span,
+)
 
 __all__ = [
     'format_run_name',
@@ -16,4 +23,9 @@ __all__ = [
     'format_distance',
     'format_duration',
     'safe_mean',
+    'Instrumentation',
+    'instrument_server',
+    'instrumentation',
+    'profiled',
+    'span',
 ]
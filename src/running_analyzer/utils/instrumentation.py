@@ -0,0 +1,216 @@
+"""
+Opt-in timing instrumentation for ingest and dashboard callbacks.
+
+Set RUN_INSTRUMENT=1 to record timing spans (with row and byte counts)
+around the ingest and callback stages; the dashboard then serves the
+aggregates as JSON at ``/metrics``. Set RUN_PROFILE_DIR to a folder to
+also dump a cProfile profile of every profiled callback call, to be read
+with ``python -m pstats`` or snakeviz. Both are off by default, and spans
+cost one attribute check when disabled.
+"""
+
+import os
+import time
+import logging
+import cProfile
+import functools
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENT = os.environ.get("RUN_INSTRUMENT", "").lower() in ("true", "1", "yes")
+PROFILE_DIR = os.environ.get("RUN_PROFILE_DIR", "")
+
+
+class Span:
+    """Counts attached to one timed stage; set ``rows`` and ``bytes`` inside the span."""
+
+    __slots__ = ("rows", "bytes")
+
+    def __init__(self):
+        self.rows: Optional[int] = None
+        self.bytes: Optional[int] = None
+
+
+class Instrumentation:
+    """
+    Thread-safe aggregate of timed stages.
+
+    Every stage keeps its call count, total/max/last seconds, and the total
+    rows and bytes reported by its spans.
+    """
+
+    def __init__(self, enabled: bool = INSTRUMENT):
+        """
+        Initialize an empty recorder.
+
+        Args:
+            enabled: Record spans; when False, :meth:`span` does nothing
+        """
+        self.enabled = enabled
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, seconds: float, rows: Optional[int] = None, nbytes: Optional[int] = None) -> None:
+        """
+        Add one timed call of a stage.
+
+        Args:
+            name: Stage name, dotted by component (e.g. 'update_map.figure')
+            seconds: Wall time of the call
+            rows: Rows processed, if known
+            nbytes: Bytes produced, if known
+        """
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0}
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["max_seconds"] = max(stage["max_seconds"], seconds)
+            stage["last_seconds"] = seconds
+            if rows is not None:
+                stage["rows"] = stage.get("rows", 0) + rows
+            if nbytes is not None:
+                stage["bytes"] = stage.get("bytes", 0) + nbytes
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """
+        Time a block as one call of a stage.
+
+        Args:
+            name: Stage name
+
+        Yields:
+            Span whose ``rows`` and ``bytes`` are recorded with the time
+        """
+        span = Span()
+        if not self.enabled:
+            yield span
+            return
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            self.record(name, time.perf_counter() - start, span.rows, span.bytes)
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Current aggregates.
+
+        Returns:
+            Dictionary with 'enabled', 'uptime_seconds', 'pid' and 'stages'
+            (stage name -> counters, with mean_seconds added)
+        """
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in sorted(self._stages.items())}
+        for stage in stages.values():
+            stage["mean_seconds"] = stage["seconds"] / stage["calls"]
+            for key in ("seconds", "max_seconds", "last_seconds", "mean_seconds"):
+                stage[key] = round(stage[key], 6)
+        return {
+            "enabled": self.enabled,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "pid": os.getpid(),
+            "stages": stages,
+        }
+
+    def reset(self) -> None:
+        """Drop all aggregates."""
+        with self._lock:
+            self._stages.clear()
+        self.started = time.time()
+
+
+# Process-wide recorder used by the ingest and dashboard code
+instrumentation = Instrumentation()
+
+
+def span(name: str):
+    """Time a block with the process-wide recorder (see :meth:`Instrumentation.span`)."""
+    return instrumentation.span(name)
+
+
+def instrument_server(server, recorder: Instrumentation = instrumentation, endpoint: str = "/metrics") -> None:
+    """
+    Time the requests of a Flask server and serve the aggregates as JSON.
+
+    Dash callback requests are recorded as ``callback.<first output id>``
+    with their response size as bytes, which covers serializing the figures;
+    other requests as ``http.<path>``. Does nothing when the recorder is
+    disabled, so the endpoint only exists on instrumented servers.
+
+    Args:
+        server: Flask application (``app.server`` of a Dash app)
+        recorder: Instrumentation receiving the request spans
+        endpoint: Path of the JSON endpoint
+    """
+    if not recorder.enabled:
+        return
+    from flask import g, jsonify, request
+
+    @server.before_request
+    def start_timer():
+        g.instrument_start = time.perf_counter()
+
+    @server.after_request
+    def record_request(response):
+        start = getattr(g, "instrument_start", None)
+        if start is None or request.path == endpoint:
+            return response
+        if request.path.endswith("/_dash-update-component"):
+            payload = request.get_json(silent=True) or {}
+            name = "callback." + str(payload.get("output", "")).strip(".").split(".")[0]
+        else:
+            name = "http." + request.path
+        recorder.record(name, time.perf_counter() - start, nbytes=response.calculate_content_length())
+        return response
+
+    @server.route(endpoint)
+    def metrics():
+        return jsonify(recorder.snapshot())
+
+
+def profiled(name: str, profile_dir: Optional[str] = PROFILE_DIR) -> Callable[[Callable], Callable]:
+    """
+    Decorator dumping a cProfile profile of every call to ``profile_dir``.
+
+    Profiles are written as ``<name>-<unix ms>-<pid>.prof``. Without a
+    profile folder the function is returned unchanged.
+
+    Args:
+        name: Name used in the profile file names
+        profile_dir: Output folder (default: RUN_PROFILE_DIR)
+    """
+    def decorate(func: Callable) -> Callable:
+        if not profile_dir:
+            return func
+        folder = Path(profile_dir)
+        folder.mkdir(parents=True, exist_ok=True)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler; concurrent calls run unprofiled
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                path = folder / f"{name}-{int(time.time() * 1000)}-{os.getpid()}.prof"
+                try:
+                    profile.dump_stats(path)
+                except OSError as exc:
+                    logger.warning("Could not write profile %s: %s", path, exc)
+
+        return wrapper
+
+    return decorate
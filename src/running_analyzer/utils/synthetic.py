@@ -0,0 +1,444 @@
+"""
+Synthetic activity data for tests and benchmarks.
+
+Provides small FIT and TCX encoders, a generator of plausible 1 Hz running
+tracks, and :func:`generate_archive` to write whole folders of them, so
+parsers and the dashboard can be exercised without real Garmin exports.
+"""
+
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from running_analyzer.geo.coordinates import bounding_boxes
+
+FIT_EPOCH = datetime(1989, 12, 31, tzinfo=timezone.utc)
+
+_CRC_TABLE = (
+    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+)
+
+# FIT base type id -> struct format character
+_BASE_FORMATS = {
+    0x00: "B", 0x01: "b", 0x02: "B", 0x83: "h", 0x84: "H", 0x85: "i", 0x86: "I",
+    0x88: "f", 0x89: "d", 0x0A: "B", 0x8B: "H", 0x8C: "I", 0x0D: "B",
+    0x8E: "q", 0x8F: "Q", 0x90: "Q",
+}
+
+# Record fields written by encode_fit_activity: (field number, base type, track key, scale, offset)
+RECORD_LAYOUT = (
+    (253, 0x86, "timestamp", 1, 0),
+    (0, 0x85, "position_lat", 1, 0),
+    (1, 0x85, "position_long", 1, 0),
+    (5, 0x86, "distance", 100, 0),
+    (73, 0x86, "enhanced_speed", 1000, 0),
+    (78, 0x86, "enhanced_altitude", 5, 500),
+    (3, 0x02, "heart_rate", 1, 0),
+    (4, 0x02, "cadence", 1, 0),
+    (13, 0x01, "temperature", 1, 0),
+    (7, 0x84, "power", 1, 0),
+    (39, 0x84, "vertical_oscillation", 10, 0),
+    (41, 0x84, "stance_time", 10, 0),
+)
+
+
+def _nibble_crc(data: bytes, crc: int = 0) -> int:
+    """FIT CRC-16 as given in the FIT SDK, one nibble at a time."""
+    for byte in data:
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ _CRC_TABLE[byte & 0xF]
+        tmp = _CRC_TABLE[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ _CRC_TABLE[(byte >> 4) & 0xF]
+    return crc
+
+
+# CRC of every single byte, for the byte-at-a-time update in fit_crc
+_CRC_TABLE_256 = tuple(_nibble_crc(bytes([i])) for i in range(256))
+
+
+def fit_crc(data: bytes, crc: int = 0) -> int:
+    """Compute the FIT CRC-16 of ``data``."""
+    table = _CRC_TABLE_256
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class FitWriter:
+    """
+    Minimal FIT encoder building definition and data messages by hand.
+    """
+
+    def __init__(self):
+        self._body = bytearray()
+        self._defs: Dict[int, Tuple[str, List[Tuple[int, int, int]], List[Tuple[int, int, int, int]]]] = {}
+
+    def define(
+        self,
+        local: int,
+        global_num: int,
+        fields: Sequence[Tuple[int, int, int]],
+        big_endian: bool = False,
+        dev_fields: Sequence[Tuple[int, int, int, int]] = (),
+    ):
+        """
+        Write a definition message.
+
+        Args:
+            local: Local message type (0-15)
+            global_num: Global message number (e.g. 20 for record)
+            fields: (field number, size, base type) tuples
+            big_endian: Encode this message type big-endian
+            dev_fields: (field number, size, developer data index, base type)
+                tuples; the base type is only used to encode values
+        """
+        header = 0x40 | (0x20 if dev_fields else 0) | local
+        endian = ">" if big_endian else "<"
+        self._body += struct.pack(endian + "BBBHB", header, 0, int(big_endian), global_num, len(fields))
+        for num, size, base in fields:
+            self._body += struct.pack("BBB", num, size, base)
+        if dev_fields:
+            self._body += struct.pack("B", len(dev_fields))
+            for num, size, index, _ in dev_fields:
+                self._body += struct.pack("BBB", num, size, index)
+        self._defs[local] = (endian, list(fields), list(dev_fields))
+
+    def _pack(self, local: int, values: Sequence, dev_values: Sequence) -> bytes:
+        endian, fields, dev_fields = self._defs[local]
+        out = bytearray()
+        for (num, size, base), value in zip(fields, values):
+            if base == 0x07:
+                out += str(value).encode("utf-8")[:size - 1].ljust(size, b"\0")
+            else:
+                out += struct.pack(endian + _BASE_FORMATS[base], value)
+        for (num, size, index, base), value in zip(dev_fields, dev_values):
+            out += struct.pack(endian + _BASE_FORMATS[base], value)
+        return bytes(out)
+
+    def write(self, local: int, values: Sequence, dev_values: Sequence = ()):
+        """Write a data message with a normal header."""
+        self._body += bytes([local]) + self._pack(local, values, dev_values)
+
+    def write_rows(self, local: int, columns: Sequence[np.ndarray]):
+        """
+        Write one data message per row, packing all rows at once.
+
+        Args:
+            local: Local message type of a definition without developer
+                or string fields
+            columns: One integer array per field, in definition order
+        """
+        endian, fields, _ = self._defs[local]
+        dtype = np.dtype(
+            [("header", "u1")]
+            + [(f"f{i}", endian + _BASE_FORMATS[base]) for i, (_, _, base) in enumerate(fields)]
+        )
+        rows = np.empty(len(columns[0]) if columns else 0, dtype=dtype)
+        rows["header"] = local
+        for i, values in enumerate(columns):
+            rows[f"f{i}"] = values
+        self._body += rows.tobytes()
+
+    def write_compressed(self, local: int, time_offset: int, values: Sequence, dev_values: Sequence = ()):
+        """Write a data message with a compressed timestamp header (local 0-3)."""
+        header = 0x80 | ((local & 0x3) << 5) | (time_offset & 0x1F)
+        self._body += bytes([header]) + self._pack(local, values, dev_values)
+
+    def to_bytes(self) -> bytes:
+        """Return the complete file, including header and CRCs."""
+        header = struct.pack("<BBHI4s", 14, 0x20, 2132, len(self._body), b".FIT")
+        header += struct.pack("<H", fit_crc(header))
+        data = header + bytes(self._body)
+        return data + struct.pack("<H", fit_crc(data))
+
+
+def fit_timestamp(value: datetime) -> int:
+    """Seconds since the FIT epoch (1989-12-31 00:00 UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int((value - FIT_EPOCH).total_seconds())
+
+
+def synthetic_track(
+    n_points: int,
+    start: Optional[datetime] = None,
+    lat: float = -20.29,
+    lon: float = -40.30,
+    seed: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Generate a plausible 1 Hz running track.
+
+    Args:
+        n_points: Number of samples
+        start: Start time (default 2025-09-18 08:00 UTC)
+        lat: Start latitude in degrees
+        lon: Start longitude in degrees
+        seed: Random seed
+
+    Returns:
+        Dictionary of column arrays named like FIT record fields, with
+        positions in degrees and timestamps as datetime64[s]
+    """
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2025, 9, 18, 8, 0, tzinfo=timezone.utc)
+
+    speed = np.clip(3.0 + np.cumsum(rng.normal(0, 0.02, n_points)), 1.5, 5.5)
+    distance = np.concatenate([[0.0], np.cumsum(speed[1:])])
+    heading = np.cumsum(rng.normal(0, 0.05, n_points))
+    metres_per_deg = 111_320.0
+    lat_track = lat + np.cumsum(speed * np.cos(heading)) / metres_per_deg
+    lon_track = lon + np.cumsum(speed * np.sin(heading)) / (metres_per_deg * np.cos(np.radians(lat)))
+    heart_rate = np.clip(120 + np.arange(n_points) * 0.01 + rng.normal(0, 2, n_points), 60, 200)
+
+    start_s = np.datetime64(start.replace(tzinfo=None), "s")
+    return {
+        "timestamp": start_s + np.arange(n_points).astype("timedelta64[s]"),
+        "position_lat": lat_track,
+        "position_long": lon_track,
+        "distance": distance,
+        "enhanced_speed": speed,
+        "enhanced_altitude": 20 + np.cumsum(rng.normal(0, 0.1, n_points)),
+        "heart_rate": np.round(heart_rate).astype(np.int64),
+        "cadence": rng.integers(80, 90, n_points),
+        "temperature": rng.integers(20, 30, n_points),
+        "power": rng.integers(200, 320, n_points),
+        "vertical_oscillation": np.round(rng.normal(85, 3, n_points), 1),
+        "stance_time": np.round(rng.normal(250, 10, n_points), 1),
+    }
+
+
+def encode_fit_activity(track: Dict[str, np.ndarray]) -> bytes:
+    """
+    Encode a track from :func:`synthetic_track` as a FIT activity file.
+
+    Args:
+        track: Column arrays keyed like RECORD_LAYOUT
+
+    Returns:
+        FIT file contents
+    """
+    writer = FitWriter()
+    start = fit_timestamp(track["timestamp"][0].astype(datetime))
+    writer.define(0, 0, [(0, 1, 0x00), (4, 4, 0x86)])
+    writer.write(0, [4, start])
+
+    layout = [entry for entry in RECORD_LAYOUT if entry[2] in track]
+    writer.define(1, 20, [(num, struct.calcsize(_BASE_FORMATS[base]), base) for num, base, _, _, _ in layout])
+
+    semicircles = 2**31 / 180
+    columns = []
+    for num, base, key, scale, offset in layout:
+        values = track[key]
+        if key == "timestamp":
+            values = (values - np.datetime64(FIT_EPOCH.replace(tzinfo=None), "s")).astype(np.int64)
+        elif key in ("position_lat", "position_long"):
+            values = np.round(values * semicircles)
+        else:
+            values = np.round((values + offset) * scale)
+        columns.append(values.astype(np.int64))
+
+    writer.write_rows(1, columns)
+    return writer.to_bytes()
+
+
+def write_fit_file(path, track: Dict[str, np.ndarray]):
+    """Write a track from :func:`synthetic_track` to ``path`` as a FIT file."""
+    with open(path, "wb") as f:
+        f.write(encode_fit_activity(track))
+
+
+_TCX_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2" \
+xmlns:ns3="http://www.garmin.com/xmlschemas/ActivityExtension/v2">
+  <Activities>
+    <Activity Sport="Running">
+      <Id>{start}</Id>
+"""
+
+_TCX_TRACKPOINT = """          <Trackpoint>
+            <Time>{time}</Time>
+            <Position>
+              <LatitudeDegrees>{lat:.9f}</LatitudeDegrees>
+              <LongitudeDegrees>{lon:.9f}</LongitudeDegrees>
+            </Position>
+            <AltitudeMeters>{alt:.1f}</AltitudeMeters>
+            <DistanceMeters>{dist:.2f}</DistanceMeters>
+            <HeartRateBpm>
+              <Value>{hr}</Value>
+            </HeartRateBpm>
+            <Extensions>
+              <ns3:TPX>
+                <ns3:Speed>{speed:.3f}</ns3:Speed>
+                <ns3:RunCadence>{cad}</ns3:RunCadence>
+              </ns3:TPX>
+            </Extensions>
+          </Trackpoint>
+"""
+
+
+def encode_tcx_activity(track: Dict[str, np.ndarray], lap_m: float = 1000.0) -> str:
+    """
+    Encode a track from :func:`synthetic_track` as a Garmin-style TCX document.
+
+    Args:
+        track: Column arrays as returned by synthetic_track
+        lap_m: Lap length in metres
+
+    Returns:
+        TCX document text
+    """
+    times = [str(t) + ".000Z" for t in track["timestamp"].astype("datetime64[s]")]
+    laps = np.floor(track["distance"] / lap_m).astype(np.int64)
+    boundaries = np.flatnonzero(np.diff(laps)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(times)]])
+
+    parts = [_TCX_HEADER.format(start=times[0])]
+    for start, end in zip(starts, ends):
+        last = end - 1
+        total_s = (track["timestamp"][last] - track["timestamp"][start]) / np.timedelta64(1, "s")
+        parts.append(
+            f'      <Lap StartTime="{times[start]}">\n'
+            f"        <TotalTimeSeconds>{total_s:.1f}</TotalTimeSeconds>\n"
+            f"        <DistanceMeters>{track['distance'][last] - track['distance'][start]:.1f}</DistanceMeters>\n"
+            f"        <Intensity>Active</Intensity>\n"
+            f"        <TriggerMethod>Distance</TriggerMethod>\n"
+            f"        <Track>\n"
+        )
+        for i in range(start, end):
+            parts.append(_TCX_TRACKPOINT.format(
+                time=times[i],
+                lat=track["position_lat"][i],
+                lon=track["position_long"][i],
+                alt=track["enhanced_altitude"][i],
+                dist=track["distance"][i],
+                hr=track["heart_rate"][i],
+                speed=track["enhanced_speed"][i],
+                cad=track["cadence"][i],
+            ))
+        parts.append("        </Track>\n      </Lap>\n")
+    parts.append("    </Activity>\n  </Activities>\n</TrainingCenterDatabase>\n")
+    return "".join(parts)
+
+
+def write_tcx_file(path, track: Dict[str, np.ndarray]):
+    """Write a track from :func:`synthetic_track` to ``path`` as a TCX file."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(encode_tcx_activity(track))
+
+
+class ArchiveRun(NamedTuple):
+    """One activity of a synthetic archive."""
+
+    filename: str
+    start: datetime
+    lat: float
+    lon: float
+    n_points: int
+    seed: int
+
+
+def plan_archive(
+    n_runs: int,
+    formats: Sequence[str] = ("fit",),
+    hours: Tuple[float, float] = (0.5, 3.0),
+    city_share: float = 0.8,
+    seed: int = 0,
+    first_day: datetime = datetime(2020, 1, 1, tzinfo=timezone.utc),
+) -> List[ArchiveRun]:
+    """
+    Describe the activities of a synthetic archive, without writing them.
+
+    Runs are one to two days apart, start in the morning, last a uniform
+    random time within ``hours`` at 1 Hz, and start inside a random city
+    box of :data:`~running_analyzer.geo.coordinates.bounding_boxes`
+    (``city_share`` of them) or anywhere else. Formats are used in turn.
+
+    Args:
+        n_runs: Number of activities
+        formats: File formats ('fit' and/or 'tcx')
+        hours: Shortest and longest duration in hours
+        city_share: Fraction of runs starting in a known city
+        seed: Random seed; the same arguments always give the same archive
+        first_day: Date of the first run
+
+    Returns:
+        List of ArchiveRun, oldest first
+    """
+    if not formats or any(fmt not in ("fit", "tcx") for fmt in formats):
+        raise ValueError(f"Unsupported formats: {formats}")
+    rng = np.random.default_rng(seed)
+    boxes = [box for cities in bounding_boxes.values() for box in cities.values()]
+
+    runs = []
+    day = first_day
+    for i in range(n_runs):
+        day += timedelta(days=int(rng.integers(1, 3)))
+        start = day.replace(hour=int(rng.integers(6, 10)), minute=int(rng.integers(0, 60)))
+        if rng.random() < city_share:
+            box = boxes[rng.integers(len(boxes))]
+            lat, lon = rng.uniform(box["lat_min"], box["lat_max"]), rng.uniform(box["lon_min"], box["lon_max"])
+        else:
+            lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+        n_points = int(rng.uniform(*hours) * 3600)
+        fmt = formats[i % len(formats)]
+        filename = f"running_{start:%Y-%m-%d_%H-%M-%S}_{10_000_000_000 + i}.{fmt}"
+        runs.append(ArchiveRun(filename, start, float(lat), float(lon), n_points, seed * 1_000_003 + i))
+    return runs
+
+
+def write_archive_run(folder, run: ArchiveRun) -> Path:
+    """
+    Write one planned activity, unless its file already exists.
+
+    Args:
+        folder: Archive folder
+        run: Activity from :func:`plan_archive`
+
+    Returns:
+        Path of the activity file
+    """
+    path = Path(folder) / run.filename
+    if not path.exists():
+        track = synthetic_track(run.n_points, start=run.start, lat=run.lat, lon=run.lon, seed=run.seed)
+        part = path.with_name(path.name + ".part")
+        if path.suffix == ".tcx":
+            write_tcx_file(part, track)
+        else:
+            write_fit_file(part, track)
+        part.replace(path)
+    return path
+
+
+def generate_archive(folder, n_runs: int, workers: int = 1, **options) -> List[Path]:
+    """
+    Write a synthetic archive of FIT/TCX activities.
+
+    Files that already exist are kept, so an interrupted generation can be
+    resumed and a larger archive can extend a smaller one with the same
+    options.
+
+    Args:
+        folder: Destination folder (created if missing)
+        n_runs: Number of activities
+        workers: Processes writing files in parallel
+        **options: Passed to :func:`plan_archive`
+
+    Returns:
+        Paths of all activity files, oldest first
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    plan = plan_archive(n_runs, **options)
+    if workers > 1 and len(plan) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(write_archive_run, [folder] * len(plan), plan, chunksize=8))
+    return [write_archive_run(folder, run) for run in plan]
@@ -0,0 +1,11 @@
+"""
+Figure preparation module (downsampling of series and map tracks).
+"""
+
+from running_analyzer.viz.downsample import DEFAULT_MAX_POINTS, lttb_indices, track_indices
+
+__all__ = [
+    'DEFAULT_MAX_POINTS',
+    'lttb_indices',
+    'track_indices',
+]
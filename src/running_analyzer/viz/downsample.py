@@ -0,0 +1,127 @@
+"""
+Downsampling of run series before figure construction.
+
+Line charts use largest-triangle-three-buckets (LTTB), which keeps the
+visual shape of a series (peaks, dips, gaps) with a fixed number of points.
+Map tracks use distance-based simplification: one point per stretch of
+equal along-track length, so the route keeps its shape while stops and
+slow sections no longer pile up points.
+"""
+
+import os
+
+import numpy as np
+
+# Target number of points per run, for both line charts and map tracks
+DEFAULT_MAX_POINTS = int(os.environ.get("RUN_MAX_POINTS", "1500"))
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def _bucket_means(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """NaN-ignoring mean of values[edges[i]:edges[i + 1]] for every bucket."""
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums[edges[1:]] - sums[edges[:-1]]) / (counts[edges[1:]] - counts[edges[:-1]])
+
+
+def lttb_indices(x, y, target: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """
+    Indices of the points kept by largest-triangle-three-buckets.
+
+    The first and last points are always kept; every other bucket keeps the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket. Missing and infinite values are only
+    kept for buckets holding nothing else, so gaps in the series stay visible.
+
+    Args:
+        x: Monotonic x values
+        y: y values (may contain NaN or inf)
+        target: Number of points to keep
+
+    Returns:
+        Sorted integer index array of at most ``target`` points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max(target, 2):
+        return np.arange(n)
+    y = np.where(np.isfinite(y), y, np.nan)
+    if target < 3:
+        return np.array([0, n - 1])
+
+    # target - 2 buckets over the interior points 1 .. n - 2; the third point
+    # of each triangle is the mean of the next bucket, or the last point
+    edges = np.linspace(1, n - 1, target - 1).astype(np.int64)
+    next_x = np.append(_bucket_means(x, edges)[1:], x[-1]).tolist()
+    next_y = np.append(_bucket_means(y, edges)[1:], y[-1]).tolist()
+
+    # Buckets hold a handful of points, where plain float arithmetic is
+    # several times faster than a NumPy call per bucket
+    xs, ys, bounds = x.tolist(), y.tolist(), edges.tolist()
+    keep = [0]
+    ax, ay = xs[0], ys[0]
+    for i in range(target - 2):
+        cx, cy = next_x[i], next_y[i]
+        if ay != ay:
+            ay = cy
+        if cy != cy:
+            cy = ay
+
+        # Twice the triangle area is |p * by + q * bx + r|; NaN never compares greater
+        p, q = ax - cx, cy - ay
+        r = -(p * ay + q * ax)
+        best, j = -1.0, bounds[i]
+        for k in range(bounds[i], bounds[i + 1]):
+            area = abs(p * ys[k] + q * xs[k] + r)
+            if area > best:
+                best, j = area, k
+
+        keep.append(j)
+        if ys[j] == ys[j]:
+            ax, ay = xs[j], ys[j]
+
+    keep.append(n - 1)
+    return np.array(keep, dtype=np.int64)
+
+
+def track_indices(lat, lon, target: int = DEFAULT_MAX_POINTS) -> np.ndarray:
+    """
+    Indices of a track simplified to about ``target`` evenly spaced points.
+
+    The track length is split into ``target - 1`` equal stretches and the
+    first point of each stretch is kept, plus the last point. Points without
+    a position are dropped.
+
+    Args:
+        lat: Latitudes in degrees
+        lon: Longitudes in degrees
+        target: Approximate number of points to keep
+
+    Returns:
+        Sorted integer index array
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    positioned = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+    if len(positioned) <= max(target, 2):
+        return positioned
+
+    # Equirectangular step lengths are accurate to well under 1% at 1 Hz spacing
+    phi = np.radians(lat[positioned])
+    lam = np.radians(lon[positioned])
+    dx = np.diff(lam) * np.cos((phi[1:] + phi[:-1]) / 2)
+    dy = np.diff(phi)
+    along = np.concatenate(([0.0], np.cumsum(np.hypot(dx, dy)))) * EARTH_RADIUS_M
+
+    if along[-1] == 0:
+        return positioned[[0, -1]]
+
+    bins = np.floor(along / (along[-1] / (max(target, 2) - 1))).astype(np.int64)
+    first = np.flatnonzero(np.diff(bins, prepend=-1))
+    if first[-1] != len(positioned) - 1:
+        first = np.append(first, len(positioned) - 1)
+    return positioned[first]
@@ -0,0 +1,67 @@
+"""
+Tests for the batch metrics engine.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.metrics import RunBatch, compute_run_stats, hrv_values, pace_values
+
+
+def _run(n, seed):
+    rng = np.random.default_rng(seed)
+    hr = (150 + np.cumsum(rng.integers(-3, 4, n))).astype(float)
+    if n > 20:
+        hr[rng.integers(0, n, 3)] = np.nan
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-09-18 14:28", periods=n, freq="s", tz="UTC"),
+        "hr_bpm": hr,
+        "distance_m": np.cumsum(rng.uniform(2, 4, n)),
+    })
+
+
+@pytest.fixture
+def frames():
+    # Includes an empty run and a run shorter than the HRV window
+    return [("a", _run(300, 1)), ("empty", _run(0, 2)), ("short", _run(7, 3)), ("b", _run(150, 4))]
+
+
+@pytest.mark.parametrize("method", ["std", "rmssd"])
+def test_batch_hrv_matches_single_runs(frames, method):
+    batch = RunBatch.from_frames(frames)
+
+    parts = batch.split(batch.hrv(window=10, method=method))
+
+    assert len(parts) == len(frames)
+    for (_, df), part in zip(frames, parts):
+        np.testing.assert_allclose(part, hrv_values(df["hr_bpm"], 10, method), rtol=1e-9, atol=1e-6)
+
+
+def test_batch_pace_does_not_cross_runs(frames):
+    batch = RunBatch.from_frames(frames)
+
+    pace = {name: batch.split(values) for name, values in batch.pace().items()}
+
+    for i, (_, df) in enumerate(frames):
+        expected = pace_values(df["timestamp"].values, df["distance_m"].to_numpy())
+        for name, values in expected.items():
+            np.testing.assert_array_equal(pace[name][i], values)
+    assert np.isnan(pace["dt"][3][0])
+
+
+def test_batch_stats(frames):
+    stats = RunBatch.from_frames(frames).stats()
+
+    for (key, df), run_stats in zip(frames, stats):
+        if key == "empty":
+            assert all(np.isnan(v) for v in run_stats.values())
+            continue
+        expected = compute_run_stats(df)
+        assert run_stats == pytest.approx(expected, nan_ok=True)
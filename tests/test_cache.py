@@ -0,0 +1,168 @@
+"""
+Tests for the persistent run cache.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.storage import RunCache
+from running_analyzer.storage import cache as cache_module
+
+
+def _sample_df():
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(["2025-09-18T14:28:28Z", "2025-09-18T14:28:29Z"]),
+        "hr_bpm": [120, 122],
+        "distance_m": [0.0, 2.5],
+        "power_w": [None, None],
+    })
+
+
+def test_roundtrip(tmp_path):
+    """Cached frames come back with the same values and dtypes."""
+    source = tmp_path / "run.fit"
+    source.write_bytes(b"data")
+    df = _sample_df()
+
+    cache = RunCache(tmp_path / "cache")
+    cache.put(source, df)
+    cache.flush()
+
+    cached = RunCache(tmp_path / "cache").get(source)
+    pd.testing.assert_frame_equal(cached, df)
+    assert cached["power_w"].tolist() == [None, None]
+
+
+def test_changed_file_is_stale(tmp_path):
+    """Entries are ignored once the source file changes."""
+    source = tmp_path / "run.fit"
+    source.write_bytes(b"data")
+
+    cache = RunCache(tmp_path / "cache")
+    cache.put(source, _sample_df())
+    assert source in cache
+
+    source.write_bytes(b"longer data")
+    os.utime(source, ns=(0, 0))
+    assert cache.get(source) is None
+
+
+def test_parser_version_invalidates(tmp_path):
+    """A different parser version discards every entry."""
+    source = tmp_path / "run.fit"
+    source.write_bytes(b"data")
+
+    cache = RunCache(tmp_path / "cache", parser_version=1)
+    cache.put(source, _sample_df())
+    cache.flush()
+
+    assert len(RunCache(tmp_path / "cache", parser_version=1)) == 1
+    assert RunCache(tmp_path / "cache", parser_version=2).get(source) is None
+
+
+def test_prune_removes_deleted_sources(tmp_path):
+    """Entries for files that no longer exist are pruned."""
+    kept = tmp_path / "kept.fit"
+    gone = tmp_path / "gone.fit"
+    kept.write_bytes(b"a")
+    gone.write_bytes(b"b")
+
+    cache = RunCache(tmp_path / "cache")
+    cache.put(kept, _sample_df())
+    cache.put(gone, _sample_df())
+
+    assert cache.prune([kept]) == 1
+    assert len(cache) == 1
+
+
+def test_column_projection(tmp_path):
+    """Projected entries only serve subsets; full entries serve any subset."""
+    source = tmp_path / "run.fit"
+    source.write_bytes(b"data")
+    df = _sample_df()
+    cache = RunCache(tmp_path / "cache")
+
+    cache.put(source, df[["timestamp", "hr_bpm"]], columns=["hr_bpm"])
+    pd.testing.assert_frame_equal(cache.get(source, columns=["hr_bpm"]), df[["timestamp", "hr_bpm"]])
+    assert cache.get(source) is None
+    assert cache.get(source, columns=["distance_m"]) is None
+
+    cache.put(source, df)
+    pd.testing.assert_frame_equal(cache.get(source, columns=["distance_m"]), df[["timestamp", "distance_m"]])
+
+
+def test_mmap_roundtrip(tmp_path):
+    """Memory-mapped loads return the same frame, backed by read-only maps."""
+    source = tmp_path / "run.fit"
+    source.write_bytes(b"data")
+    df = _sample_df()
+    cache = RunCache(tmp_path / "cache")
+    cache.put(source, df)
+    cache.flush()
+
+    loaded = RunCache(tmp_path / "cache", mmap=True).get(source)
+
+    pd.testing.assert_frame_equal(loaded, df)
+    assert not loaded["distance_m"].to_numpy().flags.writeable
+
+
+def test_processes_share_a_cache_folder(tmp_path):
+    """Entries written by another cache instance are found and survive its manifest writes."""
+    source = tmp_path / "run.fit"
+    source.write_bytes(b"data")
+    df = _sample_df()
+    dashboard = RunCache(tmp_path / "cache")
+    pipeline = RunCache(tmp_path / "cache")
+
+    # The dashboard stores a projection, the pipeline every column, in separate entries
+    dashboard.put(source, df[["timestamp", "hr_bpm"]], meta={"summary": {}}, columns=["hr_bpm"])
+    pipeline.put(source, df)
+    pipeline.flush()
+    dashboard.flush()
+
+    assert dashboard.get_meta(source, columns=["hr_bpm"]) == {"summary": {}}
+    pd.testing.assert_frame_equal(dashboard.get(source, columns=["hr_bpm"]), df[["timestamp", "hr_bpm"]])
+    pd.testing.assert_frame_equal(dashboard.get(source), df)
+    fresh = RunCache(tmp_path / "cache")
+    pd.testing.assert_frame_equal(fresh.get(source), df)
+    assert fresh.prune([source]) == 0
+
+    # Entries of another process are pruned once their source changes or goes
+    source.write_bytes(b"longer data")
+    assert RunCache(tmp_path / "cache").prune([source]) == 1
+    assert RunCache(tmp_path / "cache").prune([]) == 1
+    assert not [p for p in (tmp_path / "cache").iterdir() if p.is_dir()]
+
+
+def test_read_errors_only_drop_the_failed_entry(tmp_path, monkeypatch):
+    """A failed read never deletes an entry rewritten by another process, or other column sets."""
+    source = tmp_path / "run.fit"
+    source.write_bytes(b"data")
+    df = _sample_df()
+    reader = RunCache(tmp_path / "cache")
+    reader.put(source, df[["timestamp", "hr_bpm"]], columns=["hr_bpm"])
+    reader.put(source, df)
+    # Another process rewrites the full entry after the reader indexed it
+    RunCache(tmp_path / "cache").put(source, df)
+
+    def unreadable(*args, **kwargs):
+        raise OSError("entry is being replaced")
+
+    monkeypatch.setattr(cache_module.np, "load", unreadable)
+    assert reader.get(source) is None
+    monkeypatch.undo()
+
+    pd.testing.assert_frame_equal(RunCache(tmp_path / "cache").get(source), df)
+    pd.testing.assert_frame_equal(reader.get(source, columns=["hr_bpm"]), df[["timestamp", "hr_bpm"]])
+
+    # The reader's own entry is removed when it cannot be read
+    entry_dir = tmp_path / "cache" / reader._lookup(source, ["hr_bpm", "timestamp"])["entry"]
+    (entry_dir / "1.npy").write_bytes(b"corrupt")
+    assert reader.get(source, columns=["hr_bpm"]) is None
+    assert not entry_dir.exists()
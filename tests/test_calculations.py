@@ -0,0 +1,74 @@
+"""
+Tests for the column-level metrics functions.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.metrics import add_hrv_metrics, add_pace_metrics, compute_run_stats, hrv_values
+
+
+def _run(n=200):
+    rng = np.random.default_rng(1)
+    hr = (150 + np.cumsum(rng.integers(-2, 3, n))).astype(float)
+    hr[[i for i in (40, 41, 120) if i < n]] = np.nan
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-09-18 14:28", periods=n, freq="s", tz="UTC"),
+        "hr_bpm": hr,
+        "distance_m": np.concatenate(([0.0, 0.0], np.cumsum(rng.uniform(2, 4, n - 2)))),
+    })
+
+
+@pytest.mark.parametrize("window", [5, 10, 60])
+def test_hrv_matches_pandas_rolling(window):
+    hr = _run()["hr_bpm"]
+
+    std = pd.Series(hrv_values(hr, window, "std"))
+    rmssd = pd.Series(hrv_values(hr, window, "rmssd"))
+
+    pd.testing.assert_series_equal(std, hr.rolling(window).std().rename(None))
+    pd.testing.assert_series_equal(rmssd, np.sqrt((hr.diff() ** 2).rolling(window).mean()).rename(None))
+
+
+def test_add_metrics_share_or_reuse_the_frame():
+    df = _run()
+
+    out = add_pace_metrics(add_hrv_metrics(df))
+    assert {"hrv", "dt", "dd", "pace_sec_per_km", "pace_min_per_km"} <= set(out.columns)
+    assert "hrv" not in df
+
+    assert add_hrv_metrics(df, inplace=True) is df
+    assert "hrv" in df
+
+    # Zero distance step gives an infinite pace, as with pandas division
+    assert np.isinf(out["pace_sec_per_km"].iloc[1])
+    assert out["dt"].iloc[1] == 1.0
+
+
+def test_add_pace_metrics_parses_string_timestamps():
+    df = _run(5)
+    df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    out = add_pace_metrics(df)
+
+    assert pd.api.types.is_datetime64_any_dtype(out["timestamp"])
+    assert out["dt"].iloc[1:].eq(1.0).all()
+
+
+def test_compute_run_stats_skips_missing_rows():
+    df = _run(5)
+    df.loc[4, "distance_m"] = np.nan
+    df["hr_bpm"] = [100.0, 110.0, np.nan, 130.0, 200.0]
+
+    stats = compute_run_stats(df)
+
+    assert stats["distance_km"] == pytest.approx(df["distance_m"].iloc[3] / 1000)
+    assert stats["avg_hr"] == pytest.approx(340 / 3)
+    assert stats["avg_pace"] == pytest.approx(3 / (df["distance_m"].iloc[3] / 1000))
@@ -0,0 +1,57 @@
+"""
+Tests for the compact run layout and memory report.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.storage import compact_run_frame, memory_report
+
+
+def _frame():
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-09-18 14:28", periods=4, freq="s", tz="UTC"),
+        "hr_bpm": np.array([120, 121, 122, 123], dtype=np.int64),
+        "distance_m": np.array([0.0, 2.5, 5.0, 7.5]),
+        "latitude": np.array([-20.3123456789, -20.3123456790, -20.3123456791, -20.3123456792]),
+        "power_w": [None, None, None, None],
+        "cadence_spm": np.array([80, None, 82, 83], dtype=object),
+    })
+
+
+def test_compact_run_frame_types():
+    """Numbers shrink losslessly, empty columns go and run_name is categorical."""
+    df = _frame()
+    compact = compact_run_frame(df, run_name="Morning Run")
+
+    assert "power_w" not in compact
+    assert compact["hr_bpm"].dtype == np.int16
+    assert compact["distance_m"].dtype == np.float32
+    assert compact["latitude"].dtype == np.float64
+    assert compact["cadence_spm"].dtype.kind == "f"
+    assert np.isnan(compact["cadence_spm"].iloc[1])
+    assert isinstance(compact["run_name"].dtype, pd.CategoricalDtype)
+    assert list(compact["run_name"].cat.categories) == ["Morning Run"]
+    assert compact["timestamp"].equals(df["timestamp"])
+    assert "power_w" in df  # input left untouched
+
+
+def test_compact_run_frame_adds_missing_timestamp():
+    compact = compact_run_frame(pd.DataFrame({"hr_bpm": [120, 121]}))
+
+    assert compact["timestamp"].isna().all()
+
+
+def test_memory_report():
+    runs = [{"name": "a", "df": compact_run_frame(_frame(), run_name="a")}]
+    report = memory_report(runs)
+
+    assert list(report.columns) == ["name", "rows", "columns", "bytes", "bytes_per_row"]
+    assert report.loc[0, "rows"] == 4
+    assert report.loc[0, "bytes"] == runs[0]["df"].memory_usage(deep=True).sum()
@@ -0,0 +1,205 @@
+"""
+Tests for batch downloads against a fake Garmin Connect client.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.downloader import DownloadManifest, GarminDownloader, TokenBucket, activity_filename
+from running_analyzer.downloader.transfer import MANIFEST_NAME
+
+
+class FakeGarmin:
+    """In-memory stand-in for garminconnect.Garmin."""
+
+    def __init__(self, count, failures=None):
+        self.activities = [
+            {
+                "activityId": 100 + i,
+                "activityType": {"typeKey": "running"},
+                "startTimeLocal": f"2025-09-{i + 1:02} 07:00:00",
+                "distance": 5000.0,
+                "duration": 1800.0,
+            }
+            for i in range(count)
+        ]
+        self.failures = dict(failures or {})
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_activities(self, start, limit):
+        return self.activities[start:start + limit]
+
+    def download_activity(self, activity_id):
+        with self._lock:
+            self.calls.append(activity_id)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.01)
+            with self._lock:
+                if self.failures.get(activity_id, 0):
+                    self.failures[activity_id] -= 1
+                    raise ConnectionError("temporary failure")
+            return f"FIT {activity_id}".encode()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _download(tmp_path, api, **kwargs):
+    downloader = GarminDownloader("user", "secret", tmp_path, api=api)
+    return downloader.download_activities_batch(show_details=False, rate=None, backoff=0, **kwargs)
+
+
+def test_parallel_download_with_retries(tmp_path):
+    api = FakeGarmin(8, failures={101: 2, 105: 1})
+
+    assert _download(tmp_path, api, workers=4) == 8
+
+    assert api.max_active > 1
+    assert len(api.calls) == 11
+    for act in api.activities:
+        path = tmp_path / activity_filename(act, "running")
+        assert path.read_bytes() == f"FIT {act['activityId']}".encode()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_failed_downloads_are_resumed(tmp_path):
+    api = FakeGarmin(4, failures={102: 5})
+
+    assert _download(tmp_path, api, workers=2, retries=1) == 3
+    assert not (tmp_path / activity_filename(api.activities[2], "running")).exists()
+    manifest = DownloadManifest(tmp_path / MANIFEST_NAME)
+    assert manifest.entries["102"]["status"] == "failed"
+    assert manifest.is_done(100)
+
+    api.calls.clear()
+    assert _download(tmp_path, api, workers=2, retries=3) == 4
+    assert api.calls == [102] * 4
+
+    # A deleted file is downloaded again
+    (tmp_path / activity_filename(api.activities[0], "running")).unlink()
+    api.calls.clear()
+    assert _download(tmp_path, api, workers=1) == 4
+    assert api.calls == [100]
+
+
+def test_token_bucket_spaces_requests():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+
+    waits = [bucket.acquire() for _ in range(5)]
+
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.5, 0.5, 0.5])
+    assert now[0] == pytest.approx(1.5)
+
+
+def _sync(tmp_path, api, **kwargs):
+    downloader = GarminDownloader("user", "secret", tmp_path, api=api)
+    return downloader.sync_activities(page_size=5, rate=None, backoff=0, retries=0, **kwargs)
+
+
+class PagedGarmin(FakeGarmin):
+    """Fake client listing activities newest first and counting list requests."""
+
+    def __init__(self, count, failures=None):
+        super().__init__(count, failures)
+        self.activities.reverse()
+        self.pages = 0
+
+    def add(self, count):
+        newest = self.activities[0]["activityId"]
+        for i in range(1, count + 1):
+            act = dict(self.activities[0], activityId=newest + i, startTimeLocal=f"2025-10-{i:02} 07:00:00")
+            self.activities.insert(0, act)
+
+    def get_activities(self, start, limit):
+        self.pages += 1
+        return super().get_activities(start, limit)
+
+
+def test_sync_fetches_only_new_activities(tmp_path):
+    api = PagedGarmin(12)
+    assert _sync(tmp_path, api) == 12
+    assert api.pages == 3
+
+    api.add(2)
+    api.pages = 0
+    api.calls.clear()
+    assert _sync(tmp_path, api) == 2
+    assert api.pages == 1
+    assert sorted(api.calls) == [112, 113]
+
+    api.pages = 0
+    assert _sync(tmp_path, api) == 0
+    assert api.pages == 1
+
+
+def test_sync_retries_failures_and_starts_from_local_files(tmp_path):
+    api = PagedGarmin(6)
+    # Activities downloaded earlier by a batch: sync starts after the newest
+    assert _download(tmp_path, api, workers=1, limit=2) == 2
+
+    api.add(3)
+    api.failures = {108: 1}
+    api.calls.clear()
+    assert _sync(tmp_path, api) == 2
+    assert sorted(api.calls) == [106, 107, 108]
+
+    api.calls.clear()
+    assert _sync(tmp_path, api) == 1
+    assert api.calls == [108]
+
+
+def test_sync_ignores_local_files_of_other_types(tmp_path):
+    api = PagedGarmin(6)
+    # A newer cycling download does not count as synced running activities
+    (tmp_path / "cycling_2025-10-01_07-00-00_999.fit").write_bytes(b"FIT")
+    assert _sync(tmp_path, api) == 6
+
+
+class FailingGarmin(PagedGarmin):
+    """Fake client whose activity list is unavailable."""
+
+    def get_activities(self, start, limit):
+        raise ConnectionError("service unavailable")
+
+
+def test_sync_survives_activity_list_failures(tmp_path):
+    assert _sync(tmp_path, FailingGarmin(3)) == 0
+    # Nothing was synced, so the next sync walks the whole history
+    assert _sync(tmp_path, PagedGarmin(3)) == 3
+
+
+def test_partial_syncs_carry_on_where_they_stopped(tmp_path):
+    api = PagedGarmin(10)
+    downloader = GarminDownloader("user", "secret", tmp_path, api=api)
+
+    def sync(**kwargs):
+        return downloader.sync_activities(page_size=2, rate=None, backoff=0, retries=0, **kwargs)
+
+    assert sync(max_pages=2) == 4
+    # The files just downloaded are not taken as the sync point
+    assert sync(max_pages=2) == 4
+    api.add(1)
+    assert sync(max_pages=2) == 2
+    assert sorted(api.calls) == list(range(100, 110))
+
+    # Once the walk is done, newer activities are picked up
+    api.calls.clear()
+    assert sync() == 1
+    assert api.calls == [110]
+    api.pages = 0
+    assert sync() == 0
+    assert api.pages == 1
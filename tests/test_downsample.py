@@ -0,0 +1,154 @@
+"""
+Tests for figure downsampling.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import create_app
+from running_analyzer.storage import FrameLoader, LazyRun, compact_run_frame
+from running_analyzer.utils.synthetic import synthetic_track
+from running_analyzer.viz import lttb_indices, track_indices
+
+
+def _reference_lttb(x, y, target):
+    """Textbook LTTB, one bucket at a time."""
+    n = len(y)
+    edges = np.linspace(1, n - 1, target - 1).astype(int)
+    keep, a = [0], 0
+    for i in range(target - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < target - 2:
+            cx, cy = x[edges[i + 1]:edges[i + 2]].mean(), y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep.append(a)
+    return np.array(keep + [n - 1])
+
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(0)
+    for n in (999, 5000, 10800):
+        x = np.arange(n, dtype=float)
+        y = np.cumsum(rng.normal(size=n))
+        np.testing.assert_array_equal(lttb_indices(x, y, 700), _reference_lttb(x, y, 700))
+
+
+def test_lttb_short_series_and_gaps():
+    assert len(lttb_indices(np.arange(10), np.arange(10.0), 100)) == 10
+
+    y = np.sin(np.arange(5000) / 50.0)
+    y[:9] = np.nan
+    y[2000:2400] = np.inf
+    keep = lttb_indices(np.arange(5000), y, 500)
+
+    assert len(keep) == 500
+    assert keep[0] == 0 and keep[-1] == 4999
+    assert np.all(np.diff(keep) > 0)
+    # Buckets made only of missing values keep one of them, so the gap is drawn
+    assert np.isinf(y[keep]).any()
+    assert np.isfinite(y[keep][(keep > 9) & ((keep < 2000) | (keep >= 2400))]).all()
+
+
+def test_track_indices_even_spacing():
+    track = synthetic_track(6000)
+    lat, lon = track["position_lat"].copy(), track["position_long"].copy()
+    lat[100:200] = np.nan
+
+    keep = track_indices(lat, lon, 300)
+
+    assert 290 <= len(keep) <= 301
+    assert keep[0] == 0 and keep[-1] == 5999
+    assert not np.isnan(lat[keep]).any()
+    # Evenly spaced apart from the jump across the points without a position
+    steps = np.sort(np.diff(track["distance"][keep]))[:-1]
+    assert steps.max() < 1.5 * np.median(steps)
+
+
+def _callback(app, output):
+    return [v for k, v in app.callback_map.items() if output in k][0]["callback"].__wrapped__
+
+
+def test_callbacks_downsample_and_report_counts():
+    runs = []
+    for seed in range(3):
+        track = synthetic_track(4000, seed=seed)
+        df = pd.DataFrame({
+            "timestamp": pd.DatetimeIndex(track["timestamp"]).tz_localize("UTC"),
+            "latitude": track["position_lat"],
+            "longitude": track["position_long"],
+            "hr_bpm": track["heart_rate"],
+            "distance_m": track["distance"],
+        })
+        runs.append({"name": f"run {seed}", "df": compact_run_frame(df, run_name=f"run {seed}")})
+
+    app = create_app(runs, max_points=500)
+    selection = ("Brazil", "Vitória", None)
+
+    map_figure, map_info = _callback(app, "map-graph")(*selection)
+    cards = _callback(app, "summary-stats")(*selection)
+    chart = _callback(app, "hrv-store")(*selection, "std", 10, "index")["hrv"]
+
+    assert len(cards) == 3
+    assert len(chart["traces"]) == 3
+    assert all(len(trace["y"]) <= 500 for trace in chart["traces"])
+    assert "1,500 of 12,000 chart points" in chart["info"]
+    assert sum(len(trace.lat) for trace in map_figure.data) <= 3 * 501
+    assert "of 12,000 map points" in map_info
+
+
+def test_runs_that_fail_to_load_are_skipped(caplog):
+    track = synthetic_track(600, seed=1)
+    df = pd.DataFrame({
+        "timestamp": pd.DatetimeIndex(track["timestamp"]).tz_localize("UTC"),
+        "latitude": track["position_lat"],
+        "longitude": track["position_long"],
+        "hr_bpm": track["heart_rate"],
+        "distance_m": track["distance"],
+    })
+
+    def load(key):
+        if key == "gone":
+            raise ValueError("source file was deleted")
+        return compact_run_frame(df, run_name=key)
+
+    loader = FrameLoader(load)
+    labels = {"country": "Brazil", "city": "Vitória"}
+    runs = [LazyRun(loader, key, name=key, path=key, **labels) for key in ("ok", "gone")]
+    app = create_app(runs, max_points=500)
+    selection = ("Brazil", "Vitória", None)
+
+    with caplog.at_level("ERROR"):
+        map_figure, _ = _callback(app, "map-graph")(*selection)
+        cards = _callback(app, "summary-stats")(*selection)
+        series = _callback(app, "series-store")(*selection, "index")
+        hrv = _callback(app, "hrv-store")(*selection, "std", 10, "index")
+
+    assert len(map_figure.data) == 1
+    assert len(cards) == 1
+    assert [trace["name"] for trace in series["pace"]["traces"]] == ["ok"]
+    assert [trace["name"] for trace in hrv["hrv"]["traces"]] == ["ok"]
+    assert "Could not load run gone" in caplog.text
+
+
+def test_inputs_only_trigger_the_outputs_they_affect():
+    app = create_app([])
+    listeners = {}
+    for output, callback in app.callback_map.items():
+        for item in callback["inputs"]:
+            listeners.setdefault(f"{item['id']}.{item['property']}", []).append(output)
+
+    assert listeners["window-slider.value"] == ["hrv-store.data"]
+    assert listeners["hrv-method.value"] == ["hrv-store.data"]
+    assert sorted(listeners["align-mode.value"]) == ["hrv-store.data", "series-store.data"]
+    # Tab switches are drawn in the browser from the stores
+    (output,) = listeners["metric-tabs.value"]
+    assert "callback" not in app.callback_map[output]
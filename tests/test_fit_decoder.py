@@ -0,0 +1,111 @@
+"""
+Equivalence tests for the vectorized FIT decoder against fitparse.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fitparse import FitFile
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.parsers import (
+    FitDecodeError,
+    decode_fit_records,
+    load_fit_to_df,
+    load_fit_to_df_reference,
+)
+from running_analyzer.utils.synthetic import FitWriter, synthetic_track, write_fit_file
+
+
+def _fitparse_columns(path):
+    """Record fields as read by fitparse, with None turned into NaN."""
+    frame = pd.DataFrame([{f.name: f.value for f in m} for m in FitFile(str(path)).get_messages("record")])
+    return frame.fillna(np.nan)
+
+
+def test_activity_matches_reference(tmp_path):
+    """A synthetic activity decodes to the same frame as through fitparse."""
+    path = tmp_path / "activity.fit"
+    write_fit_file(path, synthetic_track(600, seed=3))
+
+    fast = load_fit_to_df(path)
+    reference = load_fit_to_df_reference(path)
+
+    assert sorted(fast.columns) == sorted(reference.columns)
+    pd.testing.assert_frame_equal(fast, reference[fast.columns], check_dtype=False)
+
+
+def test_edge_cases_match_fitparse(tmp_path):
+    """Developer fields, invalid values, big-endian and compressed timestamps."""
+    base = 1_000_000_000
+    writer = FitWriter()
+    writer.define(0, 207, [(3, 1, 0x02)])
+    writer.write(0, [0])
+    writer.define(1, 206, [(0, 1, 0x02), (1, 1, 0x02), (2, 1, 0x02), (3, 16, 0x07), (8, 8, 0x07)])
+    writer.write(1, [0, 0, 0x84, "Power", "Watts"])
+    writer.define(2, 20, [(253, 4, 0x86), (3, 1, 0x02), (6, 2, 0x84), (2, 2, 0x84)],
+                  big_endian=True, dev_fields=[(0, 2, 0, 0x84)])
+    writer.write(2, [base, 150, 3000, 2600], [250])
+    writer.write(2, [base + 1, 0xFF, 3100, 2605], [251])
+    writer.define(3, 21, [(253, 4, 0x86), (0, 1, 0x00)])
+    writer.write(3, [base + 1, 0])
+    writer.define(0, 20, [(3, 1, 0x02)])
+    writer.write_compressed(0, (base + 2) & 0x1F, [155])
+    writer.write_compressed(0, (base + 3) & 0x1F, [156])
+    path = tmp_path / "edge.fit"
+    path.write_bytes(writer.to_bytes())
+
+    fast = pd.DataFrame(decode_fit_records(path))
+    reference = _fitparse_columns(path)
+
+    assert sorted(fast.columns) == sorted(reference.columns)
+    pd.testing.assert_frame_equal(fast, reference[fast.columns], check_dtype=False)
+
+
+def test_decodes_bytes():
+    """Contents can be passed directly instead of a path."""
+    writer = FitWriter()
+    writer.define(0, 20, [(3, 1, 0x02)])
+    writer.write(0, [140])
+
+    columns = decode_fit_records(writer.to_bytes())
+    assert columns["heart_rate"].tolist() == [140]
+    assert columns["heart_rate"].dtype == np.uint8
+
+
+def test_rejects_non_fit():
+    """TCX content is not mistaken for FIT."""
+    with pytest.raises(FitDecodeError):
+        decode_fit_records(b'<?xml version="1.0" encoding="UTF-8"?><TrainingCenterDatabase/>')
+
+
+def test_column_projection(tmp_path):
+    """A projected load equals the full load restricted to those columns."""
+    path = tmp_path / "activity.fit"
+    write_fit_file(path, synthetic_track(300, seed=5))
+    full = load_fit_to_df(path)
+
+    projected = load_fit_to_df(path, columns=["hr_bpm", "latitude", "vertical_osc_cm"])
+
+    assert list(projected.columns) == ["timestamp", "latitude", "hr_bpm", "vertical_osc_cm"]
+    pd.testing.assert_frame_equal(projected, full[projected.columns])
+    assert set(decode_fit_records(path, fields={"timestamp", "heart_rate"})) == {"timestamp", "heart_rate"}
+
+
+def test_rejects_truncated_files():
+    """Files cut off inside a message raise FitDecodeError."""
+    writer = FitWriter()
+    writer.define(0, 20, [(253, 4, 0x86), (3, 1, 0x02)])
+    for i in range(3):
+        writer.write(0, [1000 + i, 140])
+    data = writer.to_bytes()
+
+    # Cut inside the last record, and inside the definition message
+    for cut in (len(data) - 4, 16):
+        with pytest.raises(FitDecodeError, match="truncated record"):
+            decode_fit_records(data[:cut])
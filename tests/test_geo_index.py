@@ -0,0 +1,69 @@
+"""
+Tests for the run spatial index.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.geo import RunSpatialIndex, filter_runs_by_city
+
+BOXES = {
+    "Leoben": {"lat_min": 47.34, "lat_max": 47.40, "lon_min": 15.05, "lon_max": 15.20},
+    "Vienna": {"lat_min": 48.15, "lat_max": 48.30, "lon_min": 16.25, "lon_max": 16.45},
+}
+
+
+def _run(name, lat, lon):
+    return {"name": name, "df": pd.DataFrame({"latitude": lat, "longitude": lon})}
+
+
+def _runs():
+    line = np.linspace(0, 1, 50)
+    lat_gap = 47.36 + 0.01 * line
+    lat_gap[10] = np.nan
+    return [
+        _run("inside", 47.36 + 0.01 * line, 15.10 + 0.01 * line),
+        _run("edge within tolerance", 47.395 + 0.01 * line, 15.10 + 0.01 * line),
+        _run("crossing", 47.30 + 0.08 * line, 15.10 + 0.01 * line),
+        _run("missing positions", lat_gap, 15.10 + 0.01 * line),
+        _run("vienna", 48.20 + 0.01 * line, 16.30 + 0.01 * line),
+        _run("no positions", np.full(50, np.nan), np.full(50, np.nan)),
+        _run("glitch", np.r_[47.36, -10.0, 47.37], np.r_[15.10, 100.0, 15.11]),
+    ]
+
+
+def test_index_matches_full_scan():
+    runs = _runs()
+    index = RunSpatialIndex(runs)
+
+    for city in BOXES:
+        expected = filter_runs_by_city(runs, city, BOXES)
+        found = index.filter_runs_by_city(city, BOXES)
+
+        assert [r["name"] for r in found] == [r["name"] for r in expected]
+        for a, b in zip(found, expected):
+            pd.testing.assert_frame_equal(a["df"], b["df"])
+
+
+def test_runs_inside_are_not_copied():
+    runs = _runs()
+    found = {r["name"]: r["df"] for r in RunSpatialIndex(runs).filter_runs_by_city("Leoben", BOXES)}
+
+    assert found["inside"] is runs[0]["df"]
+    assert found["edge within tolerance"] is runs[1]["df"]
+    assert len(found["missing positions"]) == 49
+    assert len(found["crossing"]) < 50
+
+
+def test_candidates_reject_other_regions():
+    index = RunSpatialIndex(_runs(), cell_deg=0.05)
+
+    names = [index.runs[i]["name"] for i in index.candidates(BOXES["Vienna"])]
+
+    assert names == ["vienna"]
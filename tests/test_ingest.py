@@ -0,0 +1,48 @@
+"""
+Tests for parallel ingest of activity files.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.storage import parse_files
+
+TCX_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">
+  <Activities><Activity Sport="Running"><Lap><Track>{points}</Track></Lap></Activity></Activities>
+</TrainingCenterDatabase>
+"""
+
+TRACKPOINT = """<Trackpoint>
+  <Time>2025-09-18T14:28:{sec:02d}Z</Time>
+  <Position><LatitudeDegrees>-20.3</LatitudeDegrees><LongitudeDegrees>-40.3</LongitudeDegrees></Position>
+  <DistanceMeters>{dist}</DistanceMeters>
+  <HeartRateBpm><Value>{hr}</Value></HeartRateBpm>
+</Trackpoint>"""
+
+
+def _write_tcx(path, n_points):
+    points = "".join(TRACKPOINT.format(sec=i, dist=i * 3.0, hr=120 + i) for i in range(n_points))
+    path.write_text(TCX_TEMPLATE.format(points=points), encoding="utf-8")
+
+
+def test_parse_files_keeps_order_and_isolates_failures(tmp_path):
+    """Results follow input order and a bad file does not stop the rest."""
+    first = tmp_path / "a.fit"
+    broken = tmp_path / "b.fit"
+    last = tmp_path / "c.tcx"
+    _write_tcx(first, 3)
+    broken.write_text("not an activity", encoding="utf-8")
+    _write_tcx(last, 5)
+
+    for workers in (1, 2):
+        results = parse_files([first, broken, last], workers=workers)
+
+        assert [r.path for r in results] == [first, broken, last]
+        assert len(results[0].df) == 3
+        assert results[1].df is None and "XMLSyntaxError" in results[1].error
+        assert len(results[2].df) == 5
+        assert all(r.seconds >= 0 for r in results)
@@ -0,0 +1,97 @@
+"""
+Tests for the opt-in timing instrumentation.
+"""
+
+import sys
+import pstats
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import create_app
+from running_analyzer.utils import Instrumentation, instrumentation, profiled
+from running_analyzer.storage import compact_run_frame
+
+
+def test_span_records_time_and_counts():
+    recorder = Instrumentation(enabled=True)
+    for rows in (10, 30):
+        with recorder.span("stage") as s:
+            s.rows = rows
+            s.bytes = 100
+    stage = recorder.snapshot()["stages"]["stage"]
+    assert stage["calls"] == 2
+    assert stage["rows"] == 40
+    assert stage["bytes"] == 200
+    assert stage["mean_seconds"] == pytest.approx(stage["seconds"] / 2, abs=1e-6)
+    recorder.reset()
+    assert recorder.snapshot()["stages"] == {}
+
+
+def test_disabled_span_records_nothing():
+    recorder = Instrumentation(enabled=False)
+    with recorder.span("stage") as s:
+        s.rows = 10
+    assert recorder.snapshot()["stages"] == {}
+
+
+def test_span_records_failed_calls():
+    recorder = Instrumentation(enabled=True)
+    with pytest.raises(ValueError):
+        with recorder.span("stage"):
+            raise ValueError("boom")
+    assert recorder.snapshot()["stages"]["stage"]["calls"] == 1
+
+
+def test_profiled_dumps_profiles(tmp_path):
+    def work(n):
+        return sum(range(n))
+
+    assert profiled("work", profile_dir="")(work) is work
+    wrapped = profiled("work", profile_dir=str(tmp_path))(work)
+    assert wrapped(1000) == work(1000)
+    assert wrapped.__wrapped__ is work
+    profiles = list(tmp_path.glob("work-*.prof"))
+    assert len(profiles) == 1
+    assert pstats.Stats(str(profiles[0])).total_calls > 0
+
+
+def _braunau_run(n=600):
+    df = pd.DataFrame({
+        "timestamp": pd.Timestamp("2025-09-18T07:00:00Z") + pd.to_timedelta(np.arange(n), unit="s"),
+        "hr_bpm": 140 + 10 * np.sin(np.arange(n) / 30),
+        "latitude": np.linspace(48.250, 48.260, n),
+        "longitude": np.linspace(13.030, 13.045, n),
+        "distance_m": np.arange(n) * 3.0,
+    })
+    return {"name": "Run 1", "df": compact_run_frame(df, run_name="Run 1"), "path": "run1.fit"}
+
+
+def test_metrics_endpoint(monkeypatch):
+    runs = [_braunau_run()]
+
+    # Without RUN_INSTRUMENT, /metrics is only Dash's catch-all page
+    assert create_app(runs).server.test_client().get("/metrics").get_json(silent=True) is None
+
+    monkeypatch.setattr(instrumentation, "enabled", True)
+    instrumentation.reset()
+    app = create_app(runs)
+    client = app.server.test_client()
+    client.get("/")
+    run = runs[0]
+    callback = [v for k, v in app.callback_map.items() if "map-graph" in k][0]["callback"].__wrapped__
+    callback(run["country"], run["city"], None)
+
+    snapshot = client.get("/metrics").get_json()
+    assert snapshot["enabled"]
+    assert snapshot["stages"]["http./"]["calls"] == 1
+    assert snapshot["stages"]["http./"]["bytes"] > 0
+    assert snapshot["stages"]["update_map.filter"]["rows"] == 1
+    assert snapshot["stages"]["update_map.downsample"]["rows"] == 600
+    assert "update_map.figure" in snapshot["stages"]
+    instrumentation.reset()
@@ -0,0 +1,79 @@
+"""
+Tests for run summaries and on-demand sample loading.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import frame_loader, load_all_runs
+from running_analyzer.storage import FrameLoader, LazyRun, RunCache, run_summary
+
+DATA_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+
+
+def test_run_summary():
+    df = pd.DataFrame({
+        "timestamp": pd.to_datetime(["2025-09-18T14:28:28Z", "2025-09-18T14:28:29Z", "2025-09-18T14:38:28Z"]),
+        "distance_m": [0.0, np.nan, 2500.0],
+        "latitude": [np.nan, 47.37, 47.38],
+        "longitude": [np.nan, 15.07, 15.08],
+    })
+
+    summary = run_summary(df)
+
+    assert summary["start_time"] == "2025-09-18T14:28:28+00:00"
+    assert summary["duration_s"] == 600.0
+    assert summary["distance_km"] == 2.5
+    assert (summary["start_lat"], summary["start_lon"]) == (47.37, 15.07)
+    assert summary["extent"]["missing"] is True
+    assert summary["samples"] == 3
+
+
+def test_frame_loader_keeps_recent_frames():
+    loads = []
+    loader = FrameLoader(lambda key: loads.append(key) or pd.DataFrame({"key": [key]}), max_frames=2)
+    run = LazyRun(loader, "a", name="a")
+
+    assert "df" in run and not run.loaded
+    assert run["df"]["key"].tolist() == ["a"]
+    loader.get("b")
+    loader.get("a")
+    loader.get("c")
+
+    assert loads == ["a", "b", "c"]
+    assert "a" in loader and "b" not in loader
+    assert run.get("df") is loader.get("a")
+    assert (loader.hits, loader.misses) == (3, 3)
+
+
+def test_cached_runs_start_without_samples(tmp_path):
+    sources = sorted(p for p in DATA_FOLDER.glob("*.fit") if p.stat().st_size > 0)[:3]
+    if len(sources) < 3:
+        pytest.skip("sample activity files not available")
+    folder = tmp_path / "runs"
+    folder.mkdir()
+    for source in sources:
+        shutil.copy(source, folder / source.name)
+
+    eager = load_all_runs(folder, workers=1)
+    load_all_runs(folder, cache=RunCache(tmp_path / "cache"), workers=1)
+
+    cache = RunCache(tmp_path / "cache")
+    loader = frame_loader(cache, max_frames=1)
+    runs = load_all_runs(folder, cache=cache, workers=1, loader=loader)
+
+    assert len(loader) == 0 and loader.misses == 0
+    assert [type(r) for r in runs] == [LazyRun] * 3
+    for run, expected in zip(runs, eager):
+        assert (run["name"], run["country"], run["city"]) == (expected["name"], expected["country"], expected["city"])
+        assert run["summary"] == expected["summary"]
+        pd.testing.assert_frame_equal(run["df"], expected["df"])
+    assert len(loader) == 1
@@ -0,0 +1,114 @@
+"""
+Tests for the memoized metrics layer.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.metrics import MetricsCache, add_hrv_metrics, add_pace_metrics
+
+
+def _run(n=120):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-09-18 14:28", periods=n, freq="s", tz="UTC"),
+        "hr_bpm": (140 + rng.integers(-5, 5, n)).astype(np.int16),
+        "distance_m": np.arange(n, dtype=np.float32) * 3,
+    })
+
+
+def test_lru_eviction_and_counters():
+    cache = MetricsCache(max_entries=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    cache.get_or_compute(("a", 10, "std"), lambda: compute(1))
+    cache.get_or_compute(("b", 10, "std"), lambda: compute(2))
+    assert cache.get_or_compute(("a", 10, "std"), lambda: compute(3)) == 1
+    cache.get_or_compute(("c", 10, "std"), lambda: compute(4))
+
+    assert calls == [1, 2, 4]
+    assert ("b", 10, "std") not in cache  # least recently used
+    assert ("a", 10, "std") in cache
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_run_metrics_only_recomputes_on_hrv_change():
+    cache = MetricsCache()
+    df = _run()
+
+    first = cache.run_metrics("run", df, 10, "std")
+    assert cache.run_metrics("run", df, 10, "std") is first
+
+    expected = add_hrv_metrics(add_pace_metrics(df), window=10, method="std")
+    pd.testing.assert_frame_equal(first, expected)
+
+    other = cache.run_metrics("run", df, 20, "rmssd")
+    assert other is not first
+    pd.testing.assert_frame_equal(other, add_hrv_metrics(add_pace_metrics(df), window=20, method="rmssd"))
+    # Pace base computed once, plus two HRV settings
+    assert cache.misses == 3
+
+
+def test_invalidate_run():
+    cache = MetricsCache()
+    cache.run_metrics("a", _run(), 10, "std")
+    cache.run_stats("b", _run())
+
+    cache.invalidate("a")
+    assert len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_derived_values_are_cached_per_run():
+    cache = MetricsCache()
+    computed = []
+
+    def lengths(items):
+        computed.extend(run for run, _ in items)
+        return [len(df) for _, df in items]
+
+    assert cache.runs_derived([("a", _run(10)), ("b", _run(20))], ("length",), lengths) == [10, 20]
+    assert cache.runs_derived([("b", _run(20)), ("c", lambda: _run(30))], ("length",), lengths) == [20, 30]
+    assert computed == ["a", "b", "c"]
+
+    cache.invalidate("b")
+    cache.runs_derived([("b", _run(20))], ("length",), lengths)
+    assert computed == ["a", "b", "c", "b"]
+
+
+def test_values_of_runs_invalidated_while_computing_are_not_stored():
+    cache = MetricsCache()
+
+    def replaced_meanwhile(items):
+        # The watcher replaces run a while its old frame is being computed
+        cache.invalidate("a")
+        return [len(df) for _, df in items]
+
+    assert cache.runs_derived([("a", _run(10)), ("b", _run(20))], ("length",), replaced_meanwhile) == [10, 20]
+    assert ("a", ("length",), None) not in cache
+    assert ("b", ("length",), None) in cache
+
+    def cleared_meanwhile():
+        cache.invalidate()
+        return 1
+
+    assert cache.get_or_compute(("c", None, None), cleared_meanwhile) == 1
+    assert len(cache) == 0
+
+
+def test_rejects_empty_bound():
+    with pytest.raises(ValueError):
+        MetricsCache(max_entries=0)
@@ -0,0 +1,57 @@
+"""
+Tests for the shared column normalization stage.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.parsers import downcast, normalize_columns
+
+
+def test_fit_fields_are_renamed_and_converted():
+    """Semicircles, enhanced fields and unit columns are handled in one pass."""
+    df = normalize_columns({
+        "timestamp": np.array(["2025-09-18T08:00:00", "2025-09-18T08:00:01"], dtype="datetime64[s]"),
+        "position_lat": np.array([2**30, -(2**29)], dtype=np.int32),
+        "heart_rate": np.array([120, 121], dtype=np.uint8),
+        "speed": np.array([3.0, 3.1]),
+        "enhanced_speed": np.array([3.0, 3.1]),
+        "vertical_oscillation": np.array([85.0, 86.5]),
+    })
+
+    assert list(df.columns) == ["timestamp", "latitude", "hr_bpm", "speed_m_s", "vertical_osc_mm", "vertical_osc_cm"]
+    assert df["latitude"].tolist() == [90.0, -45.0]
+    assert str(df["timestamp"].dt.tz) == "UTC"
+    assert df["vertical_osc_cm"].tolist() == [8.5, 8.65]
+
+
+def test_tcx_strings_are_parsed():
+    """ISO timestamps become UTC datetimes and None values become NaN."""
+    df = normalize_columns(pd.DataFrame({
+        "timestamp": ["2025-08-11T08:30:20.000Z", "2025-08-11T08:30:21.000Z"],
+        "cadence_spm": [None, 84],
+    }))
+
+    assert df["timestamp"].iloc[1] == pd.Timestamp("2025-08-11T08:30:21", tz="UTC")
+    assert np.isnan(df["cadence_spm"].iloc[0]) and df["cadence_spm"].iloc[1] == 84
+
+    # Mixed formats fall back to pandas parsing
+    mixed = normalize_columns({"timestamp": np.array(["2025-08-11T08:30:20Z", "2025-08-11T10:30:21.5+02:00"], dtype=object)})
+    assert mixed["timestamp"].tolist() == [
+        pd.Timestamp("2025-08-11T08:30:20", tz="UTC"),
+        pd.Timestamp("2025-08-11T08:30:21.5", tz="UTC"),
+    ]
+
+
+def test_downcast_is_lossless():
+    """Arrays only shrink when every value survives the conversion."""
+    assert downcast(np.array([60, 200], dtype=np.int64)).dtype == np.int16
+    assert downcast(np.array([0, 40000], dtype=np.int64)).dtype == np.int64
+    assert downcast(np.array([1.5, np.nan])).dtype == np.float32
+    assert downcast(np.array([-20.293847561])).dtype == np.float64
@@ -0,0 +1,110 @@
+"""
+Tests for the vectorized physiological metrics.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.metrics import (
+    physiology_metrics,
+    segmented_decoupling,
+    segmented_trimp,
+    segmented_zone_seconds,
+)
+from running_analyzer.metrics.physiology import _trimp_sex, sample_seconds
+
+
+def _frame(hr, speed=None, seconds=None, **columns):
+    n = len(hr)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2025-09-18 07:00", periods=n, freq="s", tz="UTC"),
+        "hr_bpm": np.asarray(hr, dtype=np.float64),
+        **columns,
+    })
+    if speed is not None:
+        df["speed_m_s"] = np.asarray(speed, dtype=np.float64)
+    return df
+
+
+def test_sample_seconds_per_run():
+    t = np.datetime64("2025-09-18T07:00:00") + np.array([0, 1, 2, 0, 1, 31, 32]).astype("timedelta64[s]")
+    offsets = np.array([0, 3, 7])
+
+    # The last sample of a run and the sample before a pause count for nothing
+    np.testing.assert_array_equal(sample_seconds(t, offsets), [1, 1, 0, 1, 0, 1, 0])
+
+
+def test_segmented_zone_seconds():
+    values = np.array([100, 130, 170, np.nan, 150, 200], dtype=np.float64)
+    seconds = np.ones(6)
+    offsets = np.array([0, 4, 6])
+
+    zones = segmented_zone_seconds(values, seconds, [120, 160], offsets)
+
+    np.testing.assert_array_equal(zones, [[1, 1, 1], [0, 1, 1]])
+
+
+def test_segmented_trimp():
+    offsets = np.array([0, 3600, 3600])
+    hr = np.full(3600, 125.0)
+
+    # Half the heart-rate reserve for an hour; the second run has no samples
+    trimp = segmented_trimp(hr, np.ones(3600), offsets, rest_hr=60, max_hr=190)
+    assert trimp[0] == pytest.approx(60 * 0.5 * 0.64 * np.exp(1.92 * 0.5))
+    assert trimp[1] == 0.0
+    female = segmented_trimp(hr, np.ones(3600), offsets, rest_hr=60, max_hr=190, sex="female")
+    assert female[0] == pytest.approx(60 * 0.5 * 0.86 * np.exp(1.67 * 0.5))
+    with pytest.raises(ValueError):
+        segmented_trimp(hr, np.ones(3600), offsets, sex="other")
+
+
+def test_segmented_decoupling():
+    # Same speed, heart rate 10% higher in the second half
+    hr = np.concatenate([np.full(1200, 140.0), np.full(1200, 154.0), np.full(100, 150.0)])
+    speed = np.full(len(hr), 3.0)
+    offsets = np.array([0, 2400, 2500])
+
+    decoupling, drift = segmented_decoupling(hr, speed, np.ones(len(hr)), offsets)
+
+    assert decoupling[0] == pytest.approx((1 - 140 / 154) * 100)
+    assert drift[0] == pytest.approx(10.0)
+    # Too short for two halves of MIN_DECOUPLING_HALF_S
+    assert np.isnan(decoupling[1]) and np.isnan(drift[1])
+
+
+def test_physiology_metrics_batch_matches_single_runs():
+    frames = [
+        _frame(np.linspace(120, 170, 1500), speed=np.full(1500, 2.8), power_w=np.full(1500, 260.0)),
+        _frame(np.full(300, 150.0), distance_m=np.arange(300) * 3.5),
+        _frame(np.full(10, np.nan)),
+    ]
+
+    batch = physiology_metrics(frames)
+    for i, df in enumerate(frames):
+        single = physiology_metrics([df])
+        for key, values in batch.items():
+            np.testing.assert_allclose(values[i], single[key][0])
+
+    # 2.8 m/s is 84% of the 5:00 min/km threshold speed, 260 W is 104% of FTP
+    np.testing.assert_array_equal(batch["pace_zone_s"][0], [0, 1499, 0, 0, 0])
+    np.testing.assert_array_equal(batch["power_zone_s"][0], [0, 0, 0, 1499, 0])
+    # Speed derived from the distance of runs without a recorded speed
+    np.testing.assert_array_equal(batch["pace_zone_s"][1], [0, 0, 0, 0, 298])
+    assert batch["hr_s"][0] == 1499
+    assert np.isnan(batch["avg_hr"][2]) and batch["trimp"][2] == 0.0
+    assert np.isfinite(batch["decoupling_pct"][0]) and np.isnan(batch["decoupling_pct"][1])
+    assert len(physiology_metrics([])["trimp"]) == 0
+
+
+def test_unknown_trimp_sex_falls_back_with_a_warning(caplog):
+    assert _trimp_sex(" Female ") == "female"
+    with caplog.at_level("WARNING"):
+        assert _trimp_sex("femal") == "male"
+    assert "RUN_TRIMP_SEX" in caplog.text
@@ -0,0 +1,61 @@
+"""
+Tests for the download-to-cache pipeline.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.downloader import GarminDownloader
+from running_analyzer.parsers import parse_activity
+from running_analyzer.storage import IngestPipeline, RunCache
+
+DATA_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+
+
+class ArchiveGarmin:
+    """Fake Garmin Connect client serving sample activity files."""
+
+    def __init__(self, sources):
+        self.sources = {900 + i: path for i, path in enumerate(sources)}
+
+    def get_activities(self, start, limit):
+        activities = [
+            {"activityId": activity_id, "activityType": {"typeKey": "running"}, "startTimeLocal": f"2025-09-{i + 1:02} 07:00:00"}
+            for i, activity_id in enumerate(sorted(self.sources, reverse=True))
+        ]
+        return activities[start:start + limit]
+
+    def download_activity(self, activity_id):
+        return self.sources[activity_id].read_bytes()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_downloads_are_parsed_into_cache(tmp_path, workers):
+    sources = sorted(p for p in DATA_FOLDER.glob("*.fit") if p.stat().st_size > 0)[:3]
+    if len(sources) < 3:
+        pytest.skip("sample activity files not available")
+    sources.append(tmp_path / "broken.fit")
+    sources[-1].write_bytes(b"not an activity")
+
+    output = tmp_path / "runs"
+    downloader = GarminDownloader("user", "secret", output, api=ArchiveGarmin(sources))
+    with IngestPipeline(RunCache(tmp_path / "cache"), workers=workers) as pipeline:
+        assert downloader.sync_activities(rate=None, backoff=0, workers=2, on_downloaded=pipeline) == 4
+    stats = pipeline.stats.as_dict()
+
+    assert (stats["downloaded"], stats["parsed"], stats["failed"]) == (4, 3, 1)
+    assert stats["download_seconds"] >= 0 and stats["parse_seconds"] > 0
+
+    cache = RunCache(tmp_path / "cache")
+    files = sorted(output.glob("*.fit"))
+    assert len(files) == 4
+    cached = [path for path in files if path in cache]
+    assert len(cached) == 3
+    for path in cached:
+        pd.testing.assert_frame_equal(cache.get(path), parse_activity(path))
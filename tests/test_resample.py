@@ -0,0 +1,87 @@
+"""
+Tests for resampling runs onto a common elapsed-time or distance grid.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import create_app
+from running_analyzer.metrics import axis_values, resample_runs
+from running_analyzer.storage import compact_run_frame
+
+
+def _run(seconds, hr, distance=None):
+    start = pd.Timestamp("2025-09-18T07:00:00Z")
+    seconds = np.asarray(seconds, dtype=np.float64)
+    return pd.DataFrame({
+        "timestamp": start + pd.to_timedelta(seconds, unit="s"),
+        "hr_bpm": np.asarray(hr, dtype=np.float64),
+        "distance_m": seconds * 3.0 if distance is None else np.asarray(distance, dtype=np.float64),
+    })
+
+
+def test_runs_with_different_intervals_line_up():
+    """A 1 s and a 5 s recording of the same effort give the same grid values."""
+    fast = _run(np.arange(0, 120), 120 + np.arange(0, 120) / 2)
+    slow = _run(np.arange(0, 120, 5), 120 + np.arange(0, 120, 5) / 2)
+
+    a, b = resample_runs([fast, slow], ["hr_bpm"], axis="time", step=10)
+
+    assert list(a.columns) == ["elapsed_min", "hr_bpm"]
+    assert len(a) == len(b) == 12
+    np.testing.assert_allclose(a["elapsed_min"], (np.arange(12) + 0.5) * 10 / 60)
+    np.testing.assert_allclose(a["hr_bpm"], b["hr_bpm"], atol=1.01)
+
+
+def test_sparse_samples_are_interpolated_but_nan_gaps_stay():
+    """Empty bins are filled between samples; bins of NaN samples stay NaN."""
+    sparse = _run([0, 30, 60], [100, np.nan, 160])
+    other = _run([0, 10], [50, 50])
+
+    sparse_out, other_out = resample_runs([sparse, other], ["hr_bpm", "power_w"], axis="time", step=10)
+
+    # Bins 1-2 lie between the NaN sample at 30 s and its neighbours
+    assert sparse_out["hr_bpm"].tolist()[0] == 100
+    assert np.isnan(sparse_out["hr_bpm"].iloc[1:6]).all()
+    assert sparse_out["hr_bpm"].iloc[6] == 160
+    # Missing columns are NaN and never borrow values from other runs
+    assert sparse_out["power_w"].isna().all()
+    assert other_out["hr_bpm"].tolist() == [50, 50]
+
+
+def test_distance_axis():
+    run = _run(np.arange(0, 100), np.full(100, 140), distance=np.arange(0, 100) * 2.5 + 1000)
+
+    assert axis_values(run, "distance")[0] == 0
+    (out,) = resample_runs([run], ["hr_bpm"], axis="distance")
+
+    assert list(out.columns) == ["distance_km", "hr_bpm"]
+    assert len(out) == 5
+    assert (out["hr_bpm"] == 140).all()
+    with pytest.raises(ValueError):
+        resample_runs([run], ["hr_bpm"], axis="laps")
+
+
+def test_series_store_aligns_on_elapsed_time():
+    runs = []
+    for name, interval in (("1 s", 1), ("5 s", 5)):
+        df = _run(np.arange(0, 600, interval), np.full(600 // interval, 150.0)).assign(latitude=-20.3, longitude=-40.3)
+        runs.append({"name": name, "df": compact_run_frame(df, run_name=name)})
+    app = create_app(runs)
+    callback = [v for k, v in app.callback_map.items() if "series-store" in k][0]["callback"].__wrapped__
+
+    series = callback("Brazil", "Vitória", None, "time")
+    assert series["cadence"]["title"] == "Cadence data not available"
+    assert series["cadence"]["traces"] == []
+
+    traces = series["pace"]["traces"]
+    assert [len(trace["x"]) for trace in traces] == [60, 60]
+    np.testing.assert_allclose(traces[0]["x"], traces[1]["x"])
+    assert series["pace"]["x_label"] == "Elapsed time (min)"
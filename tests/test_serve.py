@@ -0,0 +1,48 @@
+"""
+Tests for the production serving entry point.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.serve import create_dash_app
+
+DATA_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+
+
+def _memory_mapped(values):
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+def test_runs_are_served_from_memory_mapped_cache(tmp_path):
+    sources = sorted(p for p in DATA_FOLDER.glob("*.fit") if p.stat().st_size > 0)[:3]
+    if len(sources) < 3:
+        pytest.skip("sample activity files not available")
+    (tmp_path / "runs").mkdir()
+    for path in sources:
+        shutil.copy(path, tmp_path / "runs")
+
+    create_dash_app(tmp_path / "runs", str(tmp_path / "cache"))
+    app = create_dash_app(tmp_path / "runs", str(tmp_path / "cache"))
+
+    runs = app.run_store.runs()
+    assert len(runs) == 3
+    assert not any(run.loaded for run in runs)
+    df = runs[0]["df"]
+    assert _memory_mapped(df["hr_bpm"].to_numpy())
+    assert _memory_mapped(df["latitude"].to_numpy())
+
+    client = app.server.test_client()
+    assert client.get("/").status_code == 200
+    assert client.get("/_dash-layout").status_code == 200
@@ -0,0 +1,53 @@
+"""
+Tests for the synthetic activity and archive generators.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import list_run_files, load_runs
+from running_analyzer.utils.synthetic import FitWriter, _nibble_crc, fit_crc, generate_archive, plan_archive
+
+
+def test_crc_table_matches_sdk_algorithm():
+    data = os.urandom(2000)
+    assert fit_crc(data) == _nibble_crc(data)
+    assert fit_crc(data[1000:], fit_crc(data[:1000])) == _nibble_crc(data)
+
+
+def test_write_rows_matches_write():
+    columns = [np.array([1, 2, 3]), np.array([-5, 0, 7]), np.array([400, 500, 65000])]
+    fields = [(253, 4, 0x86), (13, 1, 0x01), (7, 2, 0x84)]
+    rowwise, bulk = FitWriter(), FitWriter()
+    for writer in (rowwise, bulk):
+        writer.define(1, 20, fields)
+    for row in zip(*columns):
+        rowwise.write(1, row)
+    bulk.write_rows(1, columns)
+
+    assert bulk.to_bytes() == rowwise.to_bytes()
+
+
+def test_archive_is_deterministic_and_resumable(tmp_path):
+    plan = plan_archive(6, formats=("fit", "tcx"), hours=(0.05, 0.1), seed=3)
+    assert plan == plan_archive(6, formats=("fit", "tcx"), hours=(0.05, 0.1), seed=3)
+    assert [run.filename[-3:] for run in plan] == ["fit", "tcx"] * 3
+    assert all(180 <= run.n_points <= 360 for run in plan)
+
+    paths = generate_archive(tmp_path, 4, formats=("fit", "tcx"), hours=(0.05, 0.1), seed=3, city_share=1.0)
+    mtimes = [p.stat().st_mtime_ns for p in paths]
+    more = generate_archive(tmp_path, 6, formats=("fit", "tcx"), hours=(0.05, 0.1), seed=3, city_share=1.0)
+
+    assert more[:4] == paths
+    assert [p.stat().st_mtime_ns for p in paths] == mtimes
+    assert list_run_files(tmp_path) == sorted(p for p in more if p.suffix == ".fit") + sorted(p for p in more if p.suffix == ".tcx")
+
+    runs = load_runs(list_run_files(tmp_path), workers=1)
+    assert len(runs) == 6
+    assert all(run["city"] is not None for run in runs)
@@ -0,0 +1,98 @@
+"""
+Tests for ingest-time country/city tagging.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.geo import Region, load_regions, region_tree, runs_by_label, tag_runs
+
+BOXES = {
+    "Austria": {
+        "Leoben": {"lat_min": 47.34, "lat_max": 47.40, "lon_min": 15.05, "lon_max": 15.20},
+        "Öberraich": {"lat_min": 47.36, "lat_max": 47.38, "lon_min": 15.05, "lon_max": 15.10},
+    },
+    "Greece": {
+        "Athens": {"lat_min": 37.95, "lat_max": 38.05, "lon_min": 23.65, "lon_max": 23.75},
+    },
+}
+
+SQUARE_WITH_HOLE = {
+    "type": "Polygon",
+    "coordinates": [
+        [[10.0, 50.0], [10.4, 50.0], [10.4, 50.4], [10.0, 50.4], [10.0, 50.0]],
+        [[10.1, 50.1], [10.3, 50.1], [10.3, 50.3], [10.1, 50.3], [10.1, 50.1]],
+    ],
+}
+
+
+def _run(name, lat, lon):
+    return {"name": name, "df": pd.DataFrame({"latitude": lat, "longitude": lon})}
+
+
+def test_start_and_majority_labels():
+    regions = load_regions(boxes=BOXES)
+    runs = [
+        # Starts in Öberraich (nested in Leoben), mostly runs in the rest of Leoben
+        _run("leoben", np.r_[47.37, np.full(9, 47.35)], np.r_[15.07, np.full(9, 15.15)]),
+        # Entirely inside Öberraich: the smaller region wins
+        _run("oberraich", np.full(5, 47.37), np.full(5, 15.07)),
+        _run("nowhere", np.full(5, 10.0), np.full(5, 10.0)),
+        _run("no position", np.full(5, np.nan), np.full(5, np.nan)),
+    ]
+
+    tag_runs(runs, regions)
+
+    assert (runs[0]["start_city"], runs[0]["city"]) == ("Öberraich", "Leoben")
+    assert (runs[1]["country"], runs[1]["city"]) == ("Austria", "Öberraich")
+    assert runs[2]["city"] is None and runs[2]["start_city"] is None
+    assert runs[3]["country"] is None
+
+    lookup = runs_by_label(runs)
+    assert [r["name"] for r in lookup[("Austria", "Leoben")]] == ["leoben"]
+    assert ("Greece", "Athens") not in lookup
+
+
+def test_geojson_polygon_with_hole(tmp_path):
+    path = tmp_path / "regions.geojson"
+    path.write_text(json.dumps({
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"country": "Germany", "city": "Ring"}, "geometry": SQUARE_WITH_HOLE},
+            {"type": "Feature", "properties": {"name": "No country"}, "geometry": SQUARE_WITH_HOLE},
+            {"type": "Feature", "properties": {"country": "X", "city": "Line"},
+             "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}},
+        ],
+    }), encoding="utf-8")
+
+    regions = load_regions(path, boxes=BOXES)
+    ring = regions[-1]
+
+    assert len(regions) == 4
+    assert list(region_tree(regions)) == ["Austria", "Greece", "Germany"]
+    np.testing.assert_array_equal(
+        ring.contains(np.array([50.05, 50.2, 50.35, 50.5]), np.array([10.2, 10.2, 10.05, 10.2])),
+        [True, False, True, False],
+    )
+
+
+def test_multipolygon_region():
+    region = Region.from_geojson_geometry("C", "Two squares", {
+        "type": "MultiPolygon",
+        "coordinates": [
+            [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+            [[[2, 0], [3, 0], [3, 1], [2, 1], [2, 0]]],
+        ],
+    })
+
+    inside = region.contains(np.array([0.5, 0.5, 0.5]), np.array([0.5, 1.5, 2.5]))
+
+    np.testing.assert_array_equal(inside, [True, False, True])
+    assert region.bbox == {"lat_min": 0.0, "lat_max": 1.0, "lon_min": 0.0, "lon_max": 3.0}
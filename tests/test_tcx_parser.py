@@ -0,0 +1,52 @@
+"""
+Tests for the streaming TCX parser.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.parsers import iter_tcx_chunks, parse_tcx, parse_tcx_reference, read_tcx
+from running_analyzer.utils.synthetic import encode_tcx_activity, synthetic_track, write_tcx_file
+
+SAMPLE_FILE = Path(__file__).parent.parent / "data" / "fit_files" / "running_2025-08-11_10-30-20_20020801601.fit"
+
+
+def _assert_matches_reference(path):
+    pd.testing.assert_frame_equal(parse_tcx(path), parse_tcx_reference(path))
+
+
+def test_matches_reference_on_garmin_export():
+    """A real Garmin export parses to the same values as the ElementTree parser."""
+    _assert_matches_reference(SAMPLE_FILE)
+
+
+def test_matches_reference_on_synthetic(tmp_path):
+    """A synthetic activity parses to the same values as the ElementTree parser."""
+    path = tmp_path / "run.tcx"
+    write_tcx_file(path, synthetic_track(500, seed=1))
+    _assert_matches_reference(path)
+
+
+def test_chunks_are_bounded_and_complete():
+    """Chunks never exceed the requested size and add up to the full parse."""
+    data = encode_tcx_activity(synthetic_track(1000, seed=2)).encode("utf-8")
+
+    chunks = list(iter_tcx_chunks(data, chunk_size=300))
+
+    assert [len(c) for c in chunks] == [300, 300, 300, 100]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), read_tcx(data))
+
+
+def test_column_projection():
+    """A projected parse equals the full parse restricted to those columns."""
+    full = parse_tcx(SAMPLE_FILE)
+
+    projected = parse_tcx(SAMPLE_FILE, columns=["distance_m", "cadence_spm"])
+
+    assert list(projected.columns) == ["timestamp", "distance_m", "cadence_spm"]
+    pd.testing.assert_frame_equal(projected, full[projected.columns])
@@ -0,0 +1,177 @@
+"""
+Tests for training summaries and the long-term rollups.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.app import create_app, frame_loader, load_runs
+from running_analyzer.metrics import PHYSIOLOGY_SETTINGS, TrainingRollups, edwards_load, hr_zone_seconds, training_summary
+from running_analyzer.storage import RunCache, RunStore, summary_is_current
+
+
+def _summary(start, distance_km=10.0, duration_s=3600.0, zones=(0, 600, 1200, 1200, 600), avg_hr=150.0, decoupling_pct=None):
+    return {
+        "start_time": start,
+        "distance_km": distance_km,
+        "duration_s": duration_s,
+        "training": {
+            "settings": dict(PHYSIOLOGY_SETTINGS),
+            "avg_hr": avg_hr,
+            "hr_s": float(sum(zones)),
+            "hr_zone_s": list(zones),
+            "trimp": sum(zones) / 60,
+            "decoupling_pct": decoupling_pct,
+        },
+    }
+
+
+def _run(path, start, **kwargs):
+    return {"name": path, "path": path, "summary": _summary(start, **kwargs)}
+
+
+def test_hr_zone_seconds():
+    timestamps = np.datetime64("2025-09-18T07:00:00") + np.arange(8).astype("timedelta64[s]")
+    timestamps[5:] += np.timedelta64(60, "s")  # pause before the sixth sample
+    hr = np.array([90, 100, 120, np.nan, 160, 175, 180, 185], dtype=np.float64)
+
+    zones = hr_zone_seconds(pd.Series(timestamps), hr, max_hr=200)
+
+    # 90 bpm is below zone 1; the sample before the pause and the last one
+    # count for nothing, nor does the sample without heart rate
+    np.testing.assert_array_equal(zones, [1, 1, 1, 0, 1, 1])
+    zones = hr_zone_seconds(pd.Series(timestamps), hr, max_hr=180)
+    np.testing.assert_array_equal(zones, [0, 2, 1, 0, 0, 2])
+
+
+def test_training_summary():
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2025-09-18 07:00", periods=601, freq="s", tz="UTC"),
+        "hr_bpm": np.full(601, 171.0),
+    })
+    summary = training_summary(df)
+
+    assert summary["settings"] == PHYSIOLOGY_SETTINGS
+    assert summary["avg_hr"] == 171.0
+    assert summary["hr_zone_s"] == [0.0, 0.0, 0.0, 0.0, 600.0]
+    assert summary["trimp"] > 0
+    assert edwards_load(summary["hr_zone_s"]) == 50.0
+    assert training_summary(df.drop(columns="hr_bpm"))["avg_hr"] is None
+
+
+def test_rollups_by_period():
+    rollups = TrainingRollups([
+        _run("a", "2025-09-15T07:00:00+00:00"),                     # Monday
+        _run("b", "2025-09-21T23:30:00-02:00", distance_km=20.0),   # Monday 01:30 UTC
+        _run("c", "2025-10-01T07:00:00+00:00", distance_km=5.0, duration_s=1800.0),
+    ])
+
+    weeks = rollups.table("week")
+    assert weeks["start"].dt.strftime("%Y-%m-%d").tolist() == ["2025-09-15", "2025-09-22", "2025-09-29"]
+    assert weeks["distance_km"].tolist() == [10.0, 20.0, 5.0]
+    months = rollups.table("month")
+    assert months["runs"].tolist() == [2, 1]
+    assert months["pace_min_per_km"].iloc[0] == pytest.approx(7200 / 60 / 30)
+    assert months["avg_hr"].iloc[0] == pytest.approx(150.0)
+    assert months["trimp"].iloc[0] == pytest.approx(120.0)
+    assert np.isnan(months["decoupling_pct"].iloc[0])
+    assert len(rollups.table("day")) == 3
+    with pytest.raises(ValueError):
+        rollups.table("year")
+
+
+def test_rollups_update_incrementally():
+    rollups = TrainingRollups([_run("a", "2025-09-15T07:00:00+00:00"), _run("b", "2025-09-16T07:00:00+00:00")])
+    table = rollups.table("week")
+
+    # Unchanged runs are skipped and the tables stay cached
+    assert rollups.update([_run("a", "2025-09-15T07:00:00+00:00")]) == 0
+    assert rollups.table("week") is table
+
+    # A changed run is taken out of its old periods
+    assert rollups.update([_run("a", "2025-09-23T07:00:00+00:00", distance_km=3.0)]) == 2
+    assert rollups.table("week")["distance_km"].tolist() == [10.0, 3.0]
+
+    rollups.update(removed=["a", "missing"])
+    assert len(rollups) == 1
+    assert rollups.table("week")["distance_km"].tolist() == [10.0]
+    rollups.update(removed=["b"])
+    assert rollups.table("week").empty
+    assert rollups.acwr().empty
+
+
+def test_acwr():
+    # 20 minutes in zone 3 (load 60) every day for 28 days, then 7 days of 120
+    runs = [
+        _run(f"r{day}", (pd.Timestamp("2025-01-01T07:00Z") + pd.Timedelta(days=day)).isoformat(),
+             zones=(0, 0, 1200 * (1 if day < 28 else 2), 0, 0))
+        for day in range(35)
+    ]
+    acwr = TrainingRollups(runs).acwr()
+
+    assert len(acwr) == 35
+    assert acwr["acwr"].iloc[:27].isna().all()
+    assert acwr["acwr"].iloc[27] == pytest.approx(1.0)
+    assert acwr["acute"].iloc[-1] == pytest.approx(120.0)
+    assert acwr["chronic"].iloc[-1] == pytest.approx((21 * 60 + 7 * 120) / 28)
+    # TRIMP in the test summaries is one per minute with a heart rate
+    assert TrainingRollups(runs).acwr(column="trimp")["acute"].iloc[-1] == pytest.approx(40.0)
+    with pytest.raises(ValueError):
+        TrainingRollups(runs).acwr(column="distance_km")
+
+
+def test_zone_shares_and_decoupling():
+    runs = [
+        _run("a", "2025-09-15T07:00:00+00:00", decoupling_pct=4.0),
+        _run("b", "2025-09-16T07:00:00+00:00", decoupling_pct=8.0),
+        _run("c", "2025-09-17T07:00:00+00:00"),
+    ]
+    runs[0]["summary"]["training"]["pace_zone_s"] = [0, 0, 1800, 1800, 0]
+    rollups = TrainingRollups(runs)
+
+    assert rollups.table("week")["decoupling_pct"].tolist() == [6.0]
+    assert rollups.zone_shares("week")[["z2", "z3"]].iloc[0].tolist() == pytest.approx([1 / 6, 1 / 3])
+    assert rollups.zone_shares("week", kind="pace")[["pz3", "pz4"]].iloc[0].tolist() == [0.5, 0.5]
+    assert rollups.zone_shares("week", kind="power")["wz1"].isna().all()
+    with pytest.raises(ValueError):
+        rollups.zone_shares("week", kind="cadence")
+
+
+def test_store_keeps_rollups_current():
+    store = RunStore([_run("a", "2025-09-15T07:00:00+00:00")])
+    store.update([_run("b", "2025-09-16T07:00:00+00:00")])
+    assert store.rollups.table("day")["runs"].tolist() == [1, 1]
+    store.update(removed=["a"])
+    assert len(store.rollups) == 1
+
+    app = create_app(store)
+    callback = [v for k, v in app.callback_map.items() if "trend-graph" in k][0]["callback"].__wrapped__
+    assert "Weekly distance" in str(callback("week", "distance"))
+
+
+def test_stale_cached_summaries_are_recomputed(tmp_path):
+    source = Path(__file__).parent.parent / "data" / "fit_files"
+    files = sorted(source.glob("*.fit"))[:2]
+    cache = RunCache(tmp_path / "cache")
+    runs = load_runs(files, cache=cache, workers=1)
+
+    # Summaries cached before training summaries existed
+    for run in runs:
+        meta = dict(cache.get_meta(Path(run["path"])))
+        meta["summary"] = {k: v for k, v in meta["summary"].items() if k != "training"}
+        cache.set_meta(Path(run["path"]), meta)
+    cache.flush()
+    assert not summary_is_current(RunCache(tmp_path / "cache").get_meta(files[0])["summary"])
+
+    # Lazy loading reads the samples of runs whose summary is stale
+    cache = RunCache(tmp_path / "cache")
+    runs = load_runs(files, cache=cache, workers=1, loader=frame_loader(cache))
+    assert all(summary_is_current(run["summary"]) for run in runs)
+    assert RunCache(tmp_path / "cache").get_meta(files[0])["summary"] == runs[0]["summary"]
@@ -0,0 +1,146 @@
+"""
+Tests for the run store and the folder watcher.
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from running_analyzer.storage import FolderWatcher, RunCache, RunStore
+from running_analyzer.app import create_app, watch_folder
+from running_analyzer.metrics import MetricsCache
+from dash.exceptions import PreventUpdate
+
+DATA_FOLDER = Path(__file__).parent.parent / "data" / "fit_files"
+
+
+def _run(name, city=None, path=None):
+    return {"name": name, "df": pd.DataFrame({"x": [1]}), "path": path, "country": "A" if city else None, "city": city}
+
+
+def _touch(path, content, mtime):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_store_updates_replace_in_place():
+    store = RunStore([_run("a", "X", "a.fit"), _run("b", None, "b.fit")])
+    snapshot = store.runs()
+
+    stale = store.update([_run("a2", "Y", "a.fit"), _run("c", "X", "c.fit")], removed=["b.fit"])
+
+    assert stale == ["b", "a"]
+    assert [r["name"] for r in store.runs()] == ["a2", "c"]
+    assert [r["name"] for r in snapshot] == ["a", "b"]
+    assert [r["name"] for r in store.by_label()[("A", "X")]] == ["c"]
+    assert store.version == 2
+
+
+def test_watcher_waits_for_files_to_settle(tmp_path):
+    _touch(tmp_path / "old.fit", b"old", 1_000)
+    calls = []
+    watcher = FolderWatcher(tmp_path, lambda changed, removed: calls.append((changed, removed)))
+    watcher.prime()
+
+    _touch(tmp_path / "new.tcx", b"part", 2_000)
+    assert watcher.poll() == ([], [])
+
+    _touch(tmp_path / "new.tcx", b"complete", 3_000)
+    (tmp_path / "notes.txt").write_text("ignored")
+    assert watcher.poll() == ([], [])
+
+    assert watcher.poll() == ([tmp_path / "new.tcx"], [])
+
+    (tmp_path / "old.fit").unlink()
+    assert watcher.poll() == ([], [tmp_path / "old.fit"])
+    assert watcher.poll() == ([], [])
+    assert len(calls) == 2
+
+
+def test_new_download_reaches_dashboard(tmp_path):
+    sources = sorted(p for p in DATA_FOLDER.glob("*.fit") if p.stat().st_size > 0)
+    if len(sources) < 2:
+        pytest.skip("sample activity files not available")
+
+    shutil.copy(sources[0], tmp_path / sources[0].name)
+    store = RunStore()
+    metrics_cache = MetricsCache()
+    watcher = watch_folder(tmp_path, store, metrics_cache=metrics_cache)
+    watcher.poll()
+    watcher.poll()
+    assert len(store) == 1
+
+    app = create_app(store, metrics_cache=metrics_cache, refresh_seconds=5)
+    refresh = [v for k, v in app.callback_map.items() if "run-dropdown.options" in k][0]["callback"].__wrapped__
+    with pytest.raises(PreventUpdate):
+        refresh(1, store.version)
+
+    shutil.copy(sources[1], tmp_path / sources[1].name)
+    watcher.poll()
+    watcher.poll()
+
+    options, version = refresh(2, 1)
+    assert version == store.version == 2
+    assert [o["value"] for o in options] == [r["name"] for r in store.runs()]
+    assert len(options) == 2
+
+
+def test_removed_file_leaves_the_cache(tmp_path):
+    sources = sorted(p for p in DATA_FOLDER.glob("*.fit") if p.stat().st_size > 0)
+    if not sources:
+        pytest.skip("sample activity files not available")
+
+    folder = tmp_path / "runs"
+    folder.mkdir()
+    target = folder / sources[0].name
+    shutil.copy(sources[0], target)
+    cache = RunCache(tmp_path / "cache")
+    store = RunStore()
+    watcher = watch_folder(folder, store, cache=cache)
+    watcher.poll()
+    watcher.poll()
+    assert target in cache
+
+    target.unlink()
+    watcher.poll()
+    assert len(store) == 0
+    assert len(RunCache(tmp_path / "cache")) == 0
+    assert not [p for p in (tmp_path / "cache").iterdir() if p.is_dir()]
+
+
+def test_files_that_fail_to_parse_are_retried(tmp_path):
+    sources = sorted(p for p in DATA_FOLDER.glob("*.fit") if p.stat().st_size > 0)
+    if not sources:
+        pytest.skip("sample activity files not available")
+
+    target = tmp_path / sources[0].name
+    shutil.copy(sources[0], target)
+    store = RunStore()
+    metrics_cache = MetricsCache()
+    watcher = watch_folder(tmp_path, store, metrics_cache=metrics_cache)
+    watcher.poll()
+    watcher.poll()
+    assert len(store) == 1
+
+    # A rewrite that does not parse drops the old run instead of keeping it
+    _touch(target, b"not a fit file", 5_000)
+    watcher.poll()
+    watcher.poll()
+    assert len(store) == 0
+
+    # Not recorded as delivered, so later polls try it again
+    watcher.poll()
+    assert watcher.poll() == ([target], [])
+
+    shutil.copy(sources[0], target)
+    watcher.poll()
+    watcher.poll()
+    assert len(store) == 1
+    assert store.runs()[0]["path"] == str(target)